@@ -1,13 +1,78 @@
+#!/usr/bin/python3
+# VideoWriter.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, ffmpeg
+# Modules
+# sdcarchive.py - Daily archive of the series
+# sdcmovie.py - Time-lapse movie of the day
+# VideoWriter.py - Time-lapse movie out of a series directory or archive
+#
+# History see Mainmodule
+#
+# The frames are streamed one by one into ffmpeg, memory stays the same for any number of frames:
+#   VideoWriter.py -i /path/to/series -o movie.mp4 -f 30 -w 1280
 
+import os, sys, glob, getopt, time
+import sdcarchive, sdcmovie, sdccam
 
-import os
-import moviepy.video.io.ImageSequenceClip
+#( capture ticks, reader of the JPEG bytes ) of all frames below path, in time order
+#Only imgDDDHHMMSS capture frames, not the live or offline images lying next to them
+def Frames( path ):
+        frames = []
+        for indexfile in sdcarchive.Days( path ):
+                reader = sdcarchive.ArchiveReader( indexfile )
+                for entry in reader.Range( 0, float( 'inf' ) ):
+                        frames.append( ( entry.Ticks, reader, entry ) )
+        for filename in glob.glob( os.path.join( path, '**', 'img*' ), recursive = True ):
+                ticks = sdccam.ReplayCamBackend.FrameTicks( filename )
+                if ( ticks is not None ) and filename.lower().endswith( ( '.jpg', '.jpeg' ) ):
+                        frames.append( ( ticks, None, filename ) )
+        frames.sort( key = lambda f: f[0] )
+        return frames
 
-image_folder=r'C:\Users\sturm\Pictures\Slide Shows\sunny'
-fps=30
+def Read( reader, item ):
+        if reader is not None:
+                return reader.Read( item )
+        with open( item, 'rb' ) as f:
+                return f.read()
 
-image_files = [os.path.join(image_folder,img)
-               for img in os.listdir(image_folder)
-               if img.endswith(".jpg")]
-clip = moviepy.video.io.ImageSequenceClip.ImageSequenceClip(image_files, fps=fps)
-clip.write_videofile('my_video.mp4')
\ No newline at end of file
+def main( argv ):
+        path = '.'
+        output = 'sdcmovie.mp4'
+        fps = 30
+        width = 1280
+        codec = 'libx264'
+        try:
+                opts, args = getopt.getopt( argv, "i:o:f:w:c:", ["input=", "output=", "fps=", "width=", "codec="] )
+                for opt, arg in opts:
+                        if opt in ( '-i', '--input' ):
+                                path = arg
+                        elif opt in ( '-o', '--output' ):
+                                output = arg
+                        elif opt in ( '-f', '--fps' ):
+                                fps = int( arg )
+                        elif opt in ( '-w', '--width' ):
+                                width = int( arg )
+                        elif opt in ( '-c', '--codec' ):
+                                codec = arg
+        except ( getopt.GetoptError, ValueError ):
+                print( 'VideoWriter.py -i <series directory or archive> -o <mp4 file> -f <fps> -w <width> -c <codec>' )
+                exit( 2 )
+        frames = Frames( path )
+        if not frames:
+                print( 'No frames found in', path )
+                exit( 1 )
+        start = time.perf_counter()
+        encoder = sdcmovie.Encoder( output, fps, width, codec, 'mp4' )
+        try:
+                for ticks, reader, item in frames:
+                        encoder.Write( Read( reader, item ) )
+        finally:
+                ok = encoder.Close()
+        print( '{} frames in {:.1f} s to {}{}'.format( encoder.Frames, time.perf_counter() - start, output, '' if ok else ' - ffmpeg failed' ) )
+
+if __name__ == "__main__":
+        main( sys.argv[1:] )
@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+# sdcarchive.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcarchive.py - Daily archive of the series
+# sdcarchiveYYYYDDD.tar - Total images of one UTC day
+# sdcarchiveYYYYDDD.idx - Index of the day: capture time, offset and size in the tar, status row
+#
+# History see Mainmodule
+
+import os, glob, bisect, tarfile, logging
+from time import gmtime, strftime
+
+Prefix = 'sdcarchive'
+Block = 512
+IndexHead = '# ticks; offset; size; name; T_CPU; T_Cam; T_Out; Brightness; Night; Cloudy; Sunny\n'
+
+#Class Entry - one index line, Offset of the image data in the tar ( -1 and Size 0: status only )
+class Entry:
+        __slots__ = ( 'Ticks', 'Offset', 'Size', 'Name', 'Status' )
+
+        def __init__( self, ticks, offset, size, name, status ):
+                self.Ticks = ticks
+                self.Offset = offset
+                self.Size = size
+                self.Name = name
+                self.Status = status
+
+        def End( self ):
+                return self.Offset + ( self.Size + Block - 1 ) // Block * Block
+
+def ReadIndex( filename ):
+        entries = []
+        try:
+                with open( filename ) as f:
+                        for line in f:
+                                if line.startswith( '#' ):
+                                        continue
+                                cols = [ c.strip() for c in line.split( ';' ) ]
+                                try:
+                                        entries.append( Entry( float( cols[0] ), int( cols[1] ), int( cols[2] ), cols[3], cols[4:] ) )
+                                except ( ValueError, IndexError ):
+                                        continue
+        except OSError:
+                pass
+        return entries
+
+#Cut a line left partial by a crash off the end of the index, returns the bytes cut
+def RepairIndex( filename ):
+        try:
+                with open( filename, 'r+b' ) as f:
+                        data = f.read()
+                        end = data.rfind( b'\n' ) + 1
+                        if end < len( data ):
+                                f.truncate( end )
+                        return len( data ) - end
+        except OSError:
+                return 0
+
+#Class ArchiveWriter - frames appended in-process to the tar of their UTC day, no fork, no sudo
+#The tar members are written without end-of-archive blocks, tar and tarfile read such a file as is.
+#The index line follows the member, so after a crash a member without index line is overwritten;
+#a partial index line is cut first, so the next line does not continue it.
+class ArchiveWriter:
+        def __init__( self, directory ):
+                self.Directory = directory
+                self.Day = None
+                self.Tar = None
+                self.Index = None
+                self.End = 0
+                self.Count = 0
+
+        def Base( self, ticks ):
+                return os.path.join( self.Directory, strftime( Prefix + '%Y%j', gmtime( ticks ) ) )
+
+        def Open( self, ticks ):
+                self.Close()
+                base = self.Base( ticks )
+                cut = RepairIndex( base + '.idx' )
+                if cut:
+                        logging.warning( 'Archive index %s.idx: partial line of %i bytes dropped', base, cut )
+                ends = [ e.End() for e in ReadIndex( base + '.idx' ) if e.Size ]
+                self.End = max( ends ) if ends else 0
+                self.Tar = open( base + '.tar', 'r+b' if os.path.isfile( base + '.tar' ) else 'wb' )
+                self.Tar.seek( self.End )
+                self.Tar.truncate( self.End )
+                newindex = not os.path.isfile( base + '.idx' ) or ( os.path.getsize( base + '.idx' ) == 0 )
+                self.Index = open( base + '.idx', 'a' )
+                if newindex:
+                        self.Index.write( IndexHead )
+                self.Day = int( ticks // 86400 )
+                logging.info( 'Archive %s opened at %i bytes', base, self.End )
+
+        #Append the total image ( None: status row only ) and the status row of the frame
+        def Append( self, ticks, data, status ):
+                if int( ticks // 86400 ) != self.Day:
+                        self.Open( ticks )
+                offset = -1
+                size = 0
+                name = ''
+                if data:
+                        name = strftime( 'img%j%H%M%S.jpg', gmtime( ticks ) )
+                        info = tarfile.TarInfo( name )
+                        info.size = len( data )
+                        info.mtime = int( ticks )
+                        info.mode = 0o644
+                        header = info.tobuf( tarfile.USTAR_FORMAT )
+                        size = len( data )
+                        offset = self.End + len( header )
+                        self.Tar.write( header )
+                        self.Tar.write( data )
+                        self.Tar.write( bytes( -size % Block ) )
+                        self.Tar.flush()
+                        self.End = offset + size + ( -size % Block )
+                self.Index.write( '{:.3f}; {}; {}; {}; {}\n'.format( ticks, offset, size, name, '; '.join( str( s ) for s in status ) ) )
+                self.Index.flush()
+                self.Count += 1
+
+        def Stats( self ):
+                return { 'archived': self.Count, 'archivemb': round( self.End / 1048576.0, 1 ) }
+
+        def Close( self ):
+                if self.Tar is not None:
+                        self.Tar.close()
+                        self.Index.close()
+                self.Tar = None
+                self.Index = None
+                self.Day = None
+
+#Class ArchiveReader - random access and range reads of one day for time-lapse and replay tools
+class ArchiveReader:
+        def __init__( self, indexfile ):
+                self.TarFile = indexfile[ :-4 ] + '.tar'
+                self.Entries = ReadIndex( indexfile )
+                self.Ticks = [ e.Ticks for e in self.Entries ]
+                self.File = None
+
+        #Latest entry not newer than ticks, None if before the first one
+        def Find( self, ticks ):
+                index = bisect.bisect_right( self.Ticks, ticks ) - 1
+                return self.Entries[ index ] if index >= 0 else None
+
+        #Entries start <= ticks < end, images only unless status is set
+        def Range( self, start, end, status = 0 ):
+                first = bisect.bisect_left( self.Ticks, start )
+                last = bisect.bisect_left( self.Ticks, end )
+                return [ e for e in self.Entries[ first:last ] if status or e.Size ]
+
+        def Read( self, entry ):
+                if self.File is None:
+                        self.File = open( self.TarFile, 'rb' )
+                self.File.seek( entry.Offset )
+                return self.File.read( entry.Size )
+
+        def Close( self ):
+                if self.File is not None:
+                        self.File.close()
+                self.File = None
+
+#Index files of all archived days below directory, in time order
+def Days( directory ):
+        return sorted( glob.glob( os.path.join( directory, '**', Prefix + '*.idx' ), recursive = True ),
+                       key = os.path.basename )
@@ -0,0 +1,353 @@
+#!/usr/bin/python3
+# sdccam.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
+# sdcarchive.py - Daily archive of the series
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import io, os, re, time, bisect, calendar, logging
+from time import gmtime
+from PIL import Image
+import sdcarchive
+
+try:
+        import picamera
+except ImportError:
+        picamera = None
+
+#Class Clock - station time, running in real time or accelerated for replay
+class Clock:
+        def __init__( self ):
+                self.Speed = 1.0
+                self.Origin = 0.0
+                self.StartMono = time.monotonic()
+                self.Active = 0
+
+        #Run station time from origin ticks with speed factor ( 1.0 = wall clock )
+        def Init( self, speed, origin ):
+                self.Speed = float( speed )
+                self.Origin = float( origin ) if origin else time.time()
+                self.StartMono = time.monotonic()
+                self.Active = 1
+
+        def Simulated( self ):
+                return self.Active
+
+        #Station time in ticks like time.time()
+        def Time( self ):
+                if not self.Active:
+                        return time.time()
+                return self.Origin + ( time.monotonic() - self.StartMono ) * self.Speed
+
+        #Station monotonic seconds like time.monotonic()
+        def Monotonic( self ):
+                if not self.Active:
+                        return time.monotonic()
+                return self.StartMono + ( time.monotonic() - self.StartMono ) * self.Speed
+
+        #Sleep station seconds
+        def Sleep( self, seconds ):
+                if seconds > 0:
+                        time.sleep( seconds / self.Speed )
+
+        #Wait on a threading event for station seconds, True if the event was set
+        def Wait( self, event, seconds ):
+                return event.wait( max( seconds, 0 ) / self.Speed )
+
+#Station clock shared by all modules
+SysClock = Clock()
+
+#Class CamBackend - interface of a camera source
+class CamBackend:
+        Name = 'none'
+        Simulated = 0
+
+        def __init__( self ):
+                self.Width = 0
+                self.Height = 0
+                self.AnalogGain = 1.0
+                self.DigitalGain = 1.0
+                self.ExposureSpeed = 1000
+                self.Continuous = 0
+                self.Region = None
+
+        #Capture only box ( x1, y1, x2, y2 ) of the sensor, None the full sensor; returns the box of the frames
+        def SetRegion( self, box ):
+                self.Region = None
+                return ( 0, 0, self.Width, self.Height )
+
+        #Let the exposure control settle before a capture
+        def Warmup( self ):
+                return
+
+        #Keep the camera running with converged exposure between captures
+        def SetContinuous( self, on ):
+                self.Continuous = on
+
+        #Capture one frame to file, update gain and exposure metadata
+        def Capture( self, filename ):
+                self.CaptureImage().convert( 'RGB' ).save( filename )
+
+        #Capture one frame as PIL image held in memory, update gain and exposure metadata
+        def CaptureImage( self ):
+                raise NotImplementedError
+
+        def Close( self ):
+                return
+
+#Class PiCamBackend - Raspberry Pi camera via picamera
+class PiCamBackend( CamBackend ):
+        Name = 'picam'
+        ContinuousFramerate = 5
+        #Sensor mode with the full field of view at full resolution, unbinned, per sensor ( picamera revision )
+        FullModes = { 'ov5647': 2, 'imx219': 2, 'imx477': 3 }
+
+        def __init__( self ):
+                CamBackend.__init__( self )
+                if picamera is None:
+                        raise RuntimeError( 'picamera not installed' )
+                self.Cam = picamera.PiCamera()
+                self.SensorMode = self.FullModes.get( self.Cam.revision, 2 )
+                self.Cam.sensor_mode = self.SensorMode
+                self.Cam.resolution = self.Cam.MAX_RESOLUTION
+                self.Width = self.Cam.resolution.width
+                self.Height = self.Cam.resolution.height
+                self.Buffer = None
+                self.Stride = 0
+                self.Size = ( self.Width, self.Height )
+
+        #Camera writes rgba rows padded to 32 columns and 16 lines
+        #The buffer is kept across the captures, reallocated only if the frame size changes
+        def AllocBuffer( self ):
+                padwidth = ( self.Size[0] + 31 ) // 32 * 32
+                padheight = ( self.Size[1] + 15 ) // 16 * 16
+                self.Stride = padwidth * 4
+                self.Buffer = bytearray( self.Stride * padheight )
+
+        #Region of interest: the ISP reads the box out of the full sensor ( zoom ) and outputs it 1:1,
+        #so capture buffer and frame hold the box only. Width aligned to 32, height to 16 pixels.
+        #The sensor mode is pinned to the full one first: with the smaller resolution picamera would pick
+        #a binned or cropped mode, the box would not be sensor pixels 1:1 and the zoom would miss the field of view.
+        def SetRegion( self, box ):
+                if box is not None:
+                        x1 = max( 0, box[0] // 32 * 32 )
+                        y1 = max( 0, box[1] // 16 * 16 )
+                        x2 = min( self.Width, x1 + ( box[2] - x1 + 31 ) // 32 * 32 )
+                        y2 = min( self.Height, y1 + ( box[3] - y1 + 15 ) // 16 * 16 )
+                        box = ( x1, y1, x2, y2 )
+                if ( box == self.Region ) and ( self.Buffer is not None ):
+                        return box or ( 0, 0, self.Width, self.Height )
+                full = box or ( 0, 0, self.Width, self.Height )
+                if self.Cam.sensor_mode != self.SensorMode:
+                        self.Cam.sensor_mode = self.SensorMode
+                self.Cam.zoom = ( full[0] / float( self.Width ), full[1] / float( self.Height ),
+                                  ( full[2] - full[0] ) / float( self.Width ), ( full[3] - full[1] ) / float( self.Height ) )
+                self.Cam.resolution = ( full[2] - full[0], full[3] - full[1] )
+                if ( full[2] - full[0], full[3] - full[1] ) != self.Size:
+                        self.Size = ( full[2] - full[0], full[3] - full[1] )
+                        self.Buffer = None
+                self.Region = box
+                logging.info( 'Camera region %s', full )
+                return full
+
+        #preview() + sleep() for brightness control, not needed while running continuous
+        def Warmup( self ):
+                if self.Continuous:
+                        return
+                self.Cam.start_preview()
+                SysClock.Sleep( 1 )
+                self.Cam.stop_preview()
+
+        #Continuous: preview keeps auto exposure converged, frames are grabbed from the video port
+        def SetContinuous( self, on ):
+                on = 1 if on else 0
+                if on == self.Continuous:
+                        return
+                if on:
+                        self.Cam.framerate = self.ContinuousFramerate
+                        self.Cam.start_preview()
+                else:
+                        self.Cam.stop_preview()
+                self.Continuous = on
+
+        def Capture( self, filename ):
+                self.Cam.capture( filename, use_video_port = bool( self.Continuous ) )
+                self.ReadExposure()
+
+        #Capture into the reused buffer, the image shares its memory (no file, no conversion copy)
+        def CaptureImage( self ):
+                if self.Buffer is None:
+                        self.AllocBuffer()
+                self.Cam.capture( self.Buffer, format = 'rgba', use_video_port = bool( self.Continuous ) )
+                self.ReadExposure()
+                return Image.frombuffer( 'RGBX', self.Size, self.Buffer, 'raw', 'RGBX', self.Stride, 1 )
+
+        def ReadExposure( self ):
+                self.AnalogGain = float( self.Cam.analog_gain )
+                self.DigitalGain = float( self.Cam.digital_gain )
+                self.ExposureSpeed = float( self.Cam.exposure_speed )
+
+        def Close( self ):
+                if self.Continuous:
+                        self.Cam.stop_preview()
+                self.Cam.close()
+
+#Class ReplayCamBackend - frames and brightness out of an archived image series
+class ReplayCamBackend( CamBackend ):
+        Name = 'replay'
+        Simulated = 1
+        FramePattern = re.compile( r'img(\d{3})(\d{2})(\d{2})(\d{2})\.(jpg|jpeg|png|bmp)$', re.IGNORECASE )
+        StatusPattern = re.compile( r'sdcstatus.*\.txt$' )
+        DefaultBright = 100000
+        NightBright = 100
+
+        def __init__( self, path ):
+                CamBackend.__init__( self )
+                self.Path = path
+                self.Ticks = []
+                self.Files = []
+                self.BrightTicks = []
+                self.Bright = []
+                self.ScanFrames()
+                self.ScanStatus()
+                self.ScanArchive()
+                if not self.Files:
+                        raise RuntimeError( 'No replay frames found in ' + path )
+                with self.OpenFrame( 0 ) as im:
+                        self.Width, self.Height = im.size
+                logging.info( 'Replay %i frames from %s', len( self.Files ), path )
+
+        #Capture time of an imgDDDHHMMSS frame out of its name, None for other files
+        #The name has no year: taken from the file time, a day ahead of it is the year before
+        @classmethod
+        def FrameTicks( cls, filename ):
+                match = cls.FramePattern.match( os.path.basename( filename ) )
+                if not match:
+                        return None
+                mtime = os.path.getmtime( filename )
+                year = gmtime( mtime ).tm_year
+                doy, hh, mm, ss = [ int( v ) for v in match.groups()[:4] ]
+                ticks = cls.DayTicks( year, doy ) + hh * 3600 + mm * 60 + ss
+                if ticks > mtime + 86400:
+                        ticks = cls.DayTicks( year - 1, doy ) + hh * 3600 + mm * 60 + ss
+                return ticks
+
+        #Collect imgDDDHHMMSS.jpg frames of images%j directories
+        def ScanFrames( self ):
+                frames = []
+                for root, dirs, files in os.walk( self.Path ):
+                        for name in files:
+                                filename = os.path.join( root, name )
+                                ticks = self.FrameTicks( filename )
+                                if ticks is not None:
+                                        frames.append( ( ticks, filename ) )
+                frames.sort()
+                self.Ticks = [ f[0] for f in frames ]
+                self.Files = [ f[1] for f in frames ]
+
+        #Collect brightness values of sdcstatus*.txt logs written by sdcfun2.LogStatus
+        def ScanStatus( self ):
+                rows = []
+                for root, dirs, files in os.walk( self.Path ):
+                        for name in files:
+                                if not self.StatusPattern.match( name ):
+                                        continue
+                                with open( os.path.join( root, name ) ) as logfile:
+                                        for line in logfile:
+                                                cols = [ c.strip() for c in line.split( ';' ) ]
+                                                try:
+                                                        ticks = calendar.timegm( time.strptime( cols[0] + ' ' + cols[1], '%d-%b-%Y %H:%M:%S' ) )
+                                                        rows.append( ( ticks, float( cols[5] ) ) )
+                                                except ( ValueError, IndexError ):
+                                                        continue
+                rows.sort()
+                self.BrightTicks = [ r[0] for r in rows ]
+                self.Bright = [ r[1] for r in rows ]
+
+        #Frames and brightness out of sdcarchive days, frames are ( tar file, offset, size )
+        def ScanArchive( self ):
+                frames = list( zip( self.Ticks, self.Files ) )
+                rows = list( zip( self.BrightTicks, self.Bright ) )
+                for indexfile in sdcarchive.Days( self.Path ):
+                        reader = sdcarchive.ArchiveReader( indexfile )
+                        for entry in reader.Entries:
+                                if entry.Size:
+                                        frames.append( ( entry.Ticks, ( reader.TarFile, entry.Offset, entry.Size ) ) )
+                                try:
+                                        rows.append( ( entry.Ticks, float( entry.Status[3] ) ) )
+                                except ( ValueError, IndexError ):
+                                        pass
+                frames.sort( key = lambda f: f[0] )
+                rows.sort()
+                self.Ticks = [ f[0] for f in frames ]
+                self.Files = [ f[1] for f in frames ]
+                self.BrightTicks = [ r[0] for r in rows ]
+                self.Bright = [ r[1] for r in rows ]
+
+        #Image of frame index, out of its file or its tar member
+        def OpenFrame( self, index ):
+                source = self.Files[ index ]
+                if isinstance( source, tuple ):
+                        with open( source[0], 'rb' ) as f:
+                                f.seek( source[1] )
+                                return Image.open( io.BytesIO( f.read( source[2] ) ) )
+                return Image.open( source )
+
+        @staticmethod
+        def DayTicks( year, doy ):
+                return calendar.timegm( ( year, 1, 1, 0, 0, 0 ) ) + ( doy - 1 ) * 86400
+
+        #Ticks the replay clock should start from
+        def FirstTicks( self ):
+                return self.Ticks[0]
+
+        #Index of the latest frame not newer than ticks
+        def FrameIndex( self, ticks ):
+                return max( 0, bisect.bisect_right( self.Ticks, ticks ) - 1 )
+
+        def CaptureImage( self ):
+                ticks = SysClock.Time()
+                index = self.FrameIndex( ticks )
+                frame = self.OpenFrame( index )
+                if frame.mode != 'RGB':
+                        frame = frame.convert( 'RGB' )
+                else:
+                        frame.load()
+                bright = self.DefaultBright
+                if self.Bright:
+                        bright = self.Bright[ max( 0, bisect.bisect_right( self.BrightTicks, ticks ) - 1 ) ]
+                #After the series has ended the replay turns into night
+                if ticks > self.Ticks[-1] + 600:
+                        bright = self.NightBright
+                self.AnalogGain = 1.0
+                self.DigitalGain = 1.0
+                self.ExposureSpeed = 1e9 / max( bright, 1.0 ) / 1.01
+                if self.Region is not None:
+                        frame = frame.crop( self.Region )
+                return frame
+
+        #Region cut out of the decoded frame, so the loop sees the frames of a region capture
+        def SetRegion( self, box ):
+                self.Region = None
+                if box is not None:
+                        self.Region = ( max( 0, box[0] ), max( 0, box[1] ), min( self.Width, box[2] ), min( self.Height, box[3] ) )
+                return self.Region or ( 0, 0, self.Width, self.Height )
+
+#Open camera backend by spec 'picam' or 'replay:<directory>'
+def OpenCamera( spec ):
+        if spec.startswith( 'replay:' ):
+                return ReplayCamBackend( spec[ len( 'replay:' ): ] )
+        return PiCamBackend()
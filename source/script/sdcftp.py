@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+# sdcftp.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdcftp.py - Persistent FTP session
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import io, time, ftplib, threading, logging
+
+#Class FTPSession - long-lived FTP control connection
+#Kept alive by NOOP while idle, reconnected with exponential backoff after errors.
+#The session state is the reachability of the host, no ping needed.
+class FTPSession:
+        KeepAliveS = 60
+        BackoffMinS = 2
+        BackoffMaxS = 300
+
+        def __init__( self, timeout = 10 ):
+                self.Timeout = timeout
+                self.Host = ''
+                self.User = ''
+                self.Password = ''
+                self.ftp = None
+                self.Lock = threading.RLock()
+                self.LastUse = 0.0
+                self.NextTry = 0.0
+                self.BackoffS = 0
+                self.Reachable = 0
+                self.Reconnects = 0
+                self.Running = 0
+                self.Thread = None
+
+        #Set access parameter, a changed server or login closes the session
+        def Configure( self, host, user, password ):
+                with self.Lock:
+                        if ( host, user, password ) != ( self.Host, self.User, self.Password ):
+                                self.Close()
+                                self.Host = host
+                                self.User = user
+                                self.Password = password
+                                self.NextTry = 0.0
+                                self.BackoffS = 0
+
+        def Connected( self ):
+                return self.ftp is not None
+
+        #Connect and login unless connected or still backing off, returns 1 if connected
+        def Connect( self ):
+                with self.Lock:
+                        if self.ftp is not None:
+                                return 1
+                        now = time.monotonic()
+                        if now < self.NextTry:
+                                return 0
+                        ftp = None
+                        try:
+                                logging.debug( 'Opening FTP connection' )
+                                ftp = ftplib.FTP( self.Host, timeout = self.Timeout )
+                                ftp.login( self.User, self.Password )
+                                logging.debug( 'Connected to FTP server' )
+                        except ( ftplib.all_errors ) as e:
+                                if ftp is not None:
+                                        ftp.close()
+                                self.Failed( 'Error connecting to FTP server: %s' % e )
+                                return 0
+                        self.ftp = ftp
+                        self.Reachable = 1
+                        self.BackoffS = 0
+                        self.LastUse = now
+                        self.Reconnects += 1
+                        return 1
+
+        #Drop the connection and wait before the next try, doubling the wait up to BackoffMaxS
+        def Failed( self, text ):
+                logging.warning( text )
+                self.Close()
+                self.Reachable = 0
+                self.BackoffS = min( max( self.BackoffS * 2, self.BackoffMinS ), self.BackoffMaxS )
+                self.NextTry = time.monotonic() + self.BackoffS
+
+        #The keepalive may have dropped the connection since Connect: a temporary FTP error then,
+        #so the upload stage spools the frame as for any failed transfer
+        def Session( self ):
+                if self.ftp is None:
+                        raise ftplib.error_temp( '421 Not connected' )
+                return self.ftp
+
+        def Store( self, name, data ):
+                with self.Lock:
+                        self.Session().storbinary( 'STOR ' + name, io.BytesIO( data ) )
+                        self.LastUse = time.monotonic()
+
+        #Fetch a file as bytes, None if the server has no such file
+        def Retrieve( self, name ):
+                buf = io.BytesIO()
+                with self.Lock:
+                        try:
+                                self.Session().retrbinary( 'RETR ' + name, buf.write )
+                        except ftplib.error_perm:
+                                return None
+                        finally:
+                                self.LastUse = time.monotonic()
+                return buf.getvalue()
+
+        #NOOP if idle for KeepAliveS, a dead connection is dropped
+        def KeepAlive( self ):
+                with self.Lock:
+                        if self.ftp is None:
+                                return
+                        if time.monotonic() - self.LastUse < self.KeepAliveS:
+                                return
+                        try:
+                                self.ftp.voidcmd( 'NOOP' )
+                                self.LastUse = time.monotonic()
+                        except ( ftplib.all_errors ) as e:
+                                self.Failed( 'FTP keepalive failed: %s' % e )
+
+        def Loop( self ):
+                while self.Running:
+                        time.sleep( 5 )
+                        self.KeepAlive()
+
+        #Background keepalive between cycles
+        def Start( self ):
+                if self.Thread is not None:
+                        return
+                self.Running = 1
+                self.Thread = threading.Thread( target = self.Loop, name = 'sdc-ftpkeepalive', daemon = True )
+                self.Thread.start()
+
+        def Close( self ):
+                with self.Lock:
+                        if self.ftp is None:
+                                return
+                        try:
+                                self.ftp.quit()
+                        except ( ftplib.all_errors ):
+                                self.ftp.close()
+                        self.ftp = None
+                        logging.debug( 'FTP closed' )
+
+        def Stop( self ):
+                self.Running = 0
+                self.Close()
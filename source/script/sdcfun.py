@@ -9,6 +9,7 @@ VERSION = "Dec_08_2019"
 # sundialcam.py - Mainmodule
 # sdcfun.py - Functions for parameter handling
 # sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
 # station.cfg - Containing working parameter
 # remotecmd.cfg - Containing remote commands parameter
 # sundialcam.log - Log file
@@ -16,18 +17,90 @@ VERSION = "Dec_08_2019"
 #
 # History see Mainmodule
 
-import configparser, os, time, math
+import configparser, os, time, math, signal, logging
 from math import sin
 from time import gmtime, strftime
 from datetime import date, datetime, timedelta
 
-config = configparser.ConfigParser()
-status = configparser.ConfigParser()
-info   = configparser.ConfigParser()
-remote = configparser.ConfigParser()
+#Parameter file layout: section, key, object ( run or cam ), attribute, type, fallback ( None: key required )
+Params = (
+        ( 'Header', 'idname',           'run', 'IDName',           str,   None ),
+        ( 'Header', 'idno',             'run', 'IDNo',             str,   None ),
+        ( 'FTP',    'host',             'run', 'Host',             str,   None ),
+        ( 'FTP',    'port',             'run', 'Port',             int,   None ),
+        ( 'FTP',    'user',             'run', 'User',             str,   None ),
+        ( 'FTP',    'password',         'run', 'Password',         str,   None ),
+        ( 'REST',   'api_url',          'run', 'ApiUrl',           str,   None ),
+        ( 'REST',   'api_key',          'run', 'ApiKey',           str,   None ),
+        ( 'REST',   'restmode',         'run', 'RestMode',         str,   'json' ),
+        ( 'Total',  'cropperc',         'cam', 'CropPerc',         int,   None ),
+        ( 'Total',  'cropaspratioperc', 'cam', 'CropAspRatioPerc', int,   None ),
+        ( 'Total',  'cropcentpercx',    'cam', 'CropCentPercX',    int,   None ),
+        ( 'Total',  'cropcentpercy',    'cam', 'CropCentPercY',    int,   None ),
+        ( 'Total',  'cropwebwidth',     'cam', 'CropWebWidth',     int,   None ),
+        ( 'Total',  'zoomperc',         'cam', 'ZoomPerc',         int,   None ),
+        ( 'Total',  'zoomaspratioperc', 'cam', 'ZoomAspRatioPerc', int,   None ),
+        ( 'Total',  'zoomwebwidth',     'cam', 'ZoomWebWidth',     int,   None ),
+        ( 'Total',  'renditions',       'run', 'Renditions',       str,   'total:crop:0, detail:zoom:0' ),
+        ( 'Total',  'jpegquality',      'run', 'JpegQuality',      int,   75 ),
+        ( 'Total',  'jpegprogressive',  'run', 'JpegProgressive',  int,   0 ),
+        ( 'Total',  'jpegoptimize',     'run', 'JpegOptimize',     int,   0 ),
+        ( 'Detail', 'periodm',          'run', 'PeriodM',          int,   None ),
+        ( 'Detail', 'ftpupload',        'run', 'FTPupload',        int,   None ),
+        ( 'Detail', 'stream',           'run', 'Stream',           int,   None ),
+        ( 'Detail', 'series',           'run', 'Series',           int,   None ),
+        ( 'Detail', 'zoommove',         'run', 'ZoomMove',         int,   None ),
+        ( 'Detail', 'zoomdrawrect',     'run', 'ZoomDrawRect',     int,   None ),
+        ( 'Detail', 'camoffline',       'run', 'CamOffLine',       int,   None ),
+        ( 'Detail', 'remotecmd',        'run', 'RemoteCMD',        int,   None ),
+        ( 'Detail', 'dumplive',         'run', 'DumpLive',         int,   0 ),
+        ( 'Detail', 'continuous',       'run', 'Continuous',       int,   0 ),
+        ( 'Detail', 'noonperiods',      'run', 'NoonPeriodS',      int,   30 ),
+        ( 'Detail', 'pipeline',         'run', 'Pipeline',         int,   1 ),
+        ( 'Detail', 'changethres',      'run', 'ChangeThres',      float, 0.0 ),
+        ( 'Detail', 'changemaxs',       'run', 'ChangeMaxS',       int,   900 ),
+        ( 'Detail', 'spoolmb',          'run', 'SpoolMB',          int,   50 ),
+        ( 'Detail', 'spoolbatch',       'run', 'SpoolBatch',       int,   10 ),
+        ( 'Detail', 'spoolworkers',     'run', 'SpoolWorkers',     int,   2 ),
+        ( 'Detail', 'sensorperiods',    'run', 'SensorPeriodS',    int,   30 ),
+        ( 'Detail', 'zoomcentpercx',    'cam', 'ZoomCentPercX',    int,   None ),
+        ( 'Detail', 'zoomcentpercy',    'cam', 'ZoomCentPercY',    int,   None ),
+        ( 'Dial',   'dialw12x',         'cam', 'DialW12X',         int,   None ),
+        ( 'Dial',   'dialw12y',         'cam', 'DialW12Y',         int,   None ),
+        ( 'Dial',   'dials12x',         'cam', 'DialS12X',         int,   None ),
+        ( 'Dial',   'dials12y',         'cam', 'DialS12Y',         int,   None ),
+        ( 'Dial',   'diale09x',         'cam', 'DialE09X',         int,   None ),
+        ( 'Dial',   'diale09y',         'cam', 'DialE09Y',         int,   None ),
+        ( 'Dial',   'diale15x',         'cam', 'DialE15X',         int,   None ),
+        ( 'Dial',   'diale15y',         'cam', 'DialE15Y',         int,   None ),
+        ( 'Sky',    'brightnight',      'run', 'SkyBrightNight',   int,   3100 ),
+        ( 'Sky',    'brightday',        'run', 'SkyBrightDay',     int,   3500 ),
+        ( 'Sky',    'brightsunlow',     'run', 'SkyBrightSunLow',  int,   260000 ),
+        ( 'Sky',    'brightsunhigh',    'run', 'SkyBrightSunHigh', int,   300000 ),
+        ( 'Sky',    'contrastlow',      'run', 'SkyContrastLow',   float, 0.0 ),
+        ( 'Sky',    'contrasthigh',     'run', 'SkyContrastHigh',  float, 0.0 ),
+        ( 'Sky',    'saturationlow',    'run', 'SkySatLow',        float, 0.0 ),
+        ( 'Sky',    'saturationhigh',   'run', 'SkySatHigh',       float, 0.0 ),
+        ( 'Movie',  'movie',            'run', 'Movie',            int,   0 ),
+        ( 'Movie',  'fps',              'run', 'MovieFPS',         int,   24 ),
+        ( 'Movie',  'width',            'run', 'MovieWidth',       int,   1280 ),
+        ( 'Movie',  'codec',            'run', 'MovieCodec',       str,   'libx264' ),
+        ( 'Movie',  'segment',          'run', 'MovieSegment',     int,   60 ),
+        ( 'Memory', 'lowmemory',        'run', 'LowMemory',        int,   0 ),
+        ( 'Memory', 'budgetmb',         'run', 'MemoryBudgetMB',   int,   0 ),
+        ( 'Memory', 'trace',            'run', 'MemoryTrace',      int,   0 ) )
 
 #Class RunPar with parameter
 class RunPar:
+        __slots__ = ( 'IDName', 'IDNo', 'PeriodM', 'FTPupload', 'Stream', 'Series', 'ZoomMove', 'ZoomDrawRect',
+                      'CamOffLine', 'RemoteCMD', 'DumpLive', 'Continuous', 'NoonPeriodS', 'Pipeline', 'ChangeThres',
+                      'ChangeMaxS', 'SpoolMB', 'SpoolBatch', 'SpoolWorkers', 'SensorPeriodS', 'Renditions', 'JpegQuality',
+                      'JpegProgressive', 'JpegOptimize', 'SkyBrightNight', 'SkyBrightDay',
+                      'SkyBrightSunLow', 'SkyBrightSunHigh', 'SkyContrastLow', 'SkyContrastHigh', 'SkySatLow', 'SkySatHigh',
+                      'Movie', 'MovieFPS', 'MovieWidth', 'MovieCodec', 'MovieSegment',
+                      'LowMemory', 'MemoryBudgetMB', 'MemoryTrace', 'Host', 'Port', 'User', 'Password',
+                      'ApiUrl', 'ApiKey', 'RestMode' )
+
         def __init__( self ):
                 self.IDName = 'IDName'
                 self.IDNo = 'IDNo'
@@ -39,12 +112,43 @@ class RunPar:
                 self.ZoomDrawRect = 1
                 self.CamOffLine = 0
                 self.RemoteCMD = 0
+                self.DumpLive = 0
+                self.Continuous = 0
+                self.NoonPeriodS = 30
+                self.Pipeline = 1
+                self.ChangeThres = 0.0
+                self.ChangeMaxS = 900
+                self.SpoolMB = 50
+                self.SpoolBatch = 10
+                self.SpoolWorkers = 2
+                self.SensorPeriodS = 30
+                self.Renditions = 'total:crop:0, detail:zoom:0'
+                self.JpegQuality = 75
+                self.JpegProgressive = 0
+                self.JpegOptimize = 0
+                self.SkyBrightNight = 3100
+                self.SkyBrightDay = 3500
+                self.SkyBrightSunLow = 260000
+                self.SkyBrightSunHigh = 300000
+                self.SkyContrastLow = 0.0
+                self.SkyContrastHigh = 0.0
+                self.SkySatLow = 0.0
+                self.SkySatHigh = 0.0
+                self.Movie = 0
+                self.MovieFPS = 24
+                self.MovieWidth = 1280
+                self.MovieCodec = 'libx264'
+                self.MovieSegment = 60
+                self.LowMemory = 0
+                self.MemoryBudgetMB = 0
+                self.MemoryTrace = 0
                 self.Host = 'host'
                 self.Port = 22
                 self.User = 'user'
                 self.Password = 'password'
                 self.ApiUrl = 'api_url'
                 self.ApiKey = 'api_key'
+                self.RestMode = 'json'
 
         def Init( self, periodm, ftpupload, stream, series, zoommove, zoomdrawrect, sysoffline, remotecmd ):
                 self.IDName = 'idname'
@@ -67,13 +171,21 @@ class RunPar:
         def AdjustPeriod( self, periodm ):
                 ret = 0
                 if( periodm == 0):
-                        ret = 30
+                        #Noon period below 30 sec only with continuous capture, fitting into a minute
+                        ret = min( max( int( self.NoonPeriodS ), 10 if self.Continuous else 30 ), 30 )
+                        ret = 60 // ( 60 // ret )
                 elif( periodm > 15 ):
                         ret = 900
                 else:
                         ret = 60 * int( periodm )
                 return ret
 
+        #Capture slot within a minute: hh:mm:00 and hh:mm:30, shorter for short noon periods
+        def SlotPeriod( self, periods ):
+                if periods < 30:
+                        return self.AdjustPeriod( 0 )
+                return 30
+
 #Class Cam with parameter
 class Cam:
         def __init__( self, camwidth, camheight ):
@@ -237,48 +349,60 @@ class Cam:
                 
                 return savepar
 
-#Write parameter file, if not exist
+#Parameter values of run and cam, keyed by ( section, key )
+def ParameterValues( cam, run ):
+        ret = {}
+        for section, key, target, attr, kind, fallback in Params:
+                ret[ ( section, key ) ] = kind( getattr( cam if target == 'cam' else run, attr ) )
+        return ret
+
+#Read and convert all parameter of the file, raises if a required one is missing
+def ReadParameter( filename ):
+        config = configparser.ConfigParser()
+        with open( filename ) as configfile:
+                config.read_file( configfile )
+        ret = {}
+        for section, key, target, attr, kind, fallback in Params:
+                if ( fallback is not None ) and not config.has_option( section, key ):
+                        ret[ ( section, key ) ] = fallback
+                elif kind is str:
+                        ret[ ( section, key ) ] = config.get( section, key )
+                elif kind is float:
+                        ret[ ( section, key ) ] = config.getfloat( section, key )
+                else:
+                        ret[ ( section, key ) ] = config.getint( section, key )
+        return ret
+
+#Write parameter file if not exist ( or must ), only if a value changed, atomic via temp file and rename
 def WriteParameter( filename, cam, run, must ):
-        if ( not os.path.isfile( filename ) ) or must:
-                config[ 'Header' ] = { 'idname': run.IDName,
-                                       'idno': run.IDNo }
-                config[ 'FTP'    ] = { 'host': run.Host,
-                                       'port': run.Port,
-                                       'user': run.User,
-                                       'password': run.Password }
-                config[ 'REST'   ] = { 'api_url' : run.ApiUrl,
-                                       'api_key' : run.ApiKey }
-                config[ 'Total'  ] = { 'cropperc': cam.CropPerc,
-                                       'cropaspratioperc': cam.CropAspRatioPerc,
-                                       'cropcentpercx': cam.CropCentPercX,
-                                       'cropcentpercy': cam.CropCentPercY,
-                                       'cropwebwidth': cam.CropWebWidth,
-                                       'zoomperc': cam.ZoomPerc,
-                                       'zoomaspratioperc': cam.ZoomAspRatioPerc,
-                                       'zoomwebwidth': cam.ZoomWebWidth }
-                config[ 'Detail' ] = { 'periodm': run.PeriodM,
-                                       'ftpupload': run.FTPupload,
-                                       'stream': run.Stream,
-                                       'series': run.Series,
-                                       'zoommove': run.ZoomMove,
-                                       'zoomdrawrect': run.ZoomDrawRect,
-                                       'camoffline': run.CamOffLine,
-                                       'remotecmd': run.RemoteCMD,
-                                       'zoomcentpercx': cam.ZoomCentPercX,
-                                       'zoomcentpercy': cam.ZoomCentPercY }
-                config[ 'Dial'   ] = { 'dialw12x': cam.DialW12X,
-                                       'dialw12y': cam.DialW12Y,
-                                       'dials12x': cam.DialS12X,
-                                       'dials12y': cam.DialS12Y,
-                                       'diale09x': cam.DialE09X,
-                                       'diale09y': cam.DialE09Y,
-                                       'diale15x': cam.DialE15X,
-                                       'diale15y': cam.DialE15Y }
-                with open( filename, 'w' ) as configfile:
-                        config.write( configfile )
+        exists = os.path.isfile( filename )
+        if exists and not must:
+                return 0
+        values = ParameterValues( cam, run )
+        if exists:
+                try:
+                        if ReadParameter( filename ) == values:
+                                return 0
+                except ( OSError, configparser.Error, ValueError ):
+                        pass
+        config = configparser.ConfigParser()
+        for ( section, key ), value in values.items():
+                if not config.has_section( section ):
+                        config.add_section( section )
+                config.set( section, key, str( value ) )
+        tmpname = filename + '.tmp'
+        with open( tmpname, 'w' ) as configfile:
+                config.write( configfile )
+                configfile.flush()
+                os.fsync( configfile.fileno() )
+        os.replace( tmpname, filename )
+        logging.info( 'Parameter file %s written', filename )
+        return 1
 
 #Classe RunStatus with parameter
 class RunStatus:
+        __slots__ = ( 'SWVersion', 'ImgUTC', 'ImgLAT', 'CPUTemp', 'CamTemp', 'OutTemp', 'IMGBright', 'Sunny', 'Cloudy', 'Night', 'Pipeline', 'Latency' )
+
         def __init__( self, swversion ):
                 self.SWVersion = swversion
                 self.ImgUTC = 'none'
@@ -290,6 +414,8 @@ class RunStatus:
                 self.Sunny = 0
                 self.Cloudy = 0
                 self.Night = 0
+                self.Pipeline = {}
+                self.Latency = {}
 
         def Init( self, imgutc, imglat, cputemp, camtemp, outtemp, imgbright, sunny, cloudy, night ):
                 self.ImgUTC = imgutc
@@ -302,61 +428,92 @@ class RunStatus:
                 self.Cloudy = cloudy
                 self.Night = night
 
-#Write status file
-def WriteStatus( filename, runstat ):
-        status[ 'System' ] = { 'swversion': runstat.SWVersion,
-                               'capturetime': runstat.ImgUTC,
-                               'capturelat': runstat.ImgLAT,
-                               'cputemperature': runstat.CPUTemp,
-                               'cameratemperature': runstat.CamTemp,
-                               'outcasetemperature': runstat.OutTemp }
-        status[ 'Dial'   ] = { 'brightness': runstat.IMGBright,
-                               'sunny': runstat.Sunny,
-                               'cloudy': runstat.Cloudy,
-                               'night': runstat.Night }
-        with open( filename, 'w' ) as statusfile:
-                status.write( statusfile )
+#Set parameter values onto run and cam
+def SetParameter( values, cam, run ):
+        for section, key, target, attr, kind, fallback in Params:
+                setattr( cam if target == 'cam' else run, attr, values[ ( section, key ) ] )
 
 #Read parameter file
 def GetParameter( filename, cam ):
         ret = RunPar()
-        config.read( filename )
-        cam.CropPerc          = config.getint( 'Total',  'cropperc' )
-        cam.CropAspRatioPerc  = config.getint( 'Total',  'cropaspratioperc' )
-        cam.CropCentPercX     = config.getint( 'Total',  'cropcentpercx' )
-        cam.CropCentPercY     = config.getint( 'Total',  'cropcentpercy' )
-        cam.CropWebWidth      = config.getint( 'Total',  'cropwebwidth' )
-        cam.ZoomPerc          = config.getint( 'Total',  'zoomperc' )
-        cam.ZoomAspRatioPerc  = config.getint( 'Total',  'zoomaspratioperc' )
-        cam.ZoomWebWidth      = config.getint( 'Total',  'zoomwebwidth' )
-        cam.DialW12X          = config.getint( 'Dial',   'dialw12x' )
-        cam.DialW12Y          = config.getint( 'Dial',   'dialw12y' )
-        cam.DialS12X          = config.getint( 'Dial',   'dials12x' )
-        cam.DialS12Y          = config.getint( 'Dial',   'dials12y' )
-        cam.DialE09X          = config.getint( 'Dial',   'diale09x' )
-        cam.DialE09Y          = config.getint( 'Dial',   'diale09y' )
-        cam.DialE15X          = config.getint( 'Dial',   'diale15x' )
-        cam.DialE15Y          = config.getint( 'Dial',   'diale15y' )
-        ret.IDName            = config.get(    'Header', 'idname' )
-        ret.IDNo              = config.get(    'Header', 'idno' )
-        ret.Host              = config.get(    'FTP',    'host' )
-        ret.Port              = config.getint( 'FTP',    'port' )
-        ret.User              = config.get(    'FTP',    'user' )
-        ret.Password          = config.get(    'FTP',    'password' )
-        ret.ApiUrl            = config.get(    'REST',   'api_url' )
-        ret.ApiKey            = config.get(    'REST',   'api_key' )
-        ret.PeriodM           = config.getint( 'Detail', 'periodm' )
-        ret.FTPupload         = config.getint( 'Detail', 'ftpupload' )
-        ret.Stream            = config.getint( 'Detail', 'stream' )
-        ret.Series            = config.getint( 'Detail', 'series' )
-        ret.ZoomMove          = config.getint( 'Detail', 'zoommove' )
-        ret.ZoomDrawRect      = config.getint( 'Detail', 'zoomdrawrect' )
-        ret.CamOffLine        = config.getint( 'Detail', 'camoffline' )
-        ret.RemoteCMD         = config.getint( 'Detail', 'remotecmd' )
-        cam.ZoomCentPercX     = config.getint( 'Detail', 'zoomcentpercx' )
-        cam.ZoomCentPercY     = config.getint( 'Detail', 'zoomcentpercy' )
+        SetParameter( ReadParameter( filename ), cam, ret )
         return ret
 
+#Class ConfigStore - station.cfg parsed once and kept in memory
+#Reparsed only when the file was modified or replaced ( inode, mtime, size ) or on SIGHUP,
+#remote commands overlay the file values in memory and are never written to the SD card.
+class ConfigStore:
+        __slots__ = ( 'FileName', 'Stamp', 'Values', 'Remote', 'Hangup', 'Reloads', 'Check', 'Override' )
+
+        def __init__( self, filename ):
+                self.FileName = filename
+                self.Stamp = None
+                self.Values = None
+                self.Remote = None
+                self.Hangup = 0
+                self.Reloads = 0
+                self.Check = None
+                self.Override = {}
+
+        #Reload on SIGHUP ( kill -HUP ), main thread only
+        def Watch( self ):
+                if hasattr( signal, 'SIGHUP' ):
+                        signal.signal( signal.SIGHUP, self.OnHangup )
+
+        def OnHangup( self, signum, frame ):
+                self.Hangup = 1
+
+        def FileStamp( self ):
+                try:
+                        st = os.stat( self.FileName )
+                        return ( st.st_ino, st.st_mtime_ns, st.st_size )
+                except OSError:
+                        return None
+
+        #Reparse if the file changed, returns 1 if reloaded
+        #A broken file or one refused by Check ( raising ValueError ) keeps the last values, the first load raises
+        def Load( self ):
+                stamp = self.FileStamp()
+                if ( self.Values is not None ) and ( stamp == self.Stamp ) and not self.Hangup:
+                        return 0
+                self.Hangup = 0
+                try:
+                        values = ReadParameter( self.FileName )
+                        if self.Check is not None:
+                                self.Check( values )
+                except ( OSError, configparser.Error, ValueError ) as e:
+                        if self.Values is None:
+                                raise
+                        #Tried again once the file changes
+                        self.Stamp = stamp
+                        logging.warning( 'Parameter file %s not reloaded: %s', self.FileName, e )
+                        return 0
+                self.Stamp = stamp
+                self.Values = values
+                if self.Check is not None:
+                        self.Override = {}
+                self.Reloads += 1
+                logging.info( 'Parameter file %s loaded', self.FileName )
+                return 1
+
+        #Operating parameter: file values onto cam and a new RunPar, remote commands on top if enabled
+        #Override ( RunPar attribute: value ) holds until a file passing the check is loaded
+        def Get( self, cam ):
+                ret = RunPar()
+                SetParameter( self.Values, cam, ret )
+                for attr, value in self.Override.items():
+                        setattr( ret, attr, value )
+                if ret.RemoteCMD and ( self.Remote is not None ):
+                        self.Remote.Apply( cam, ret )
+                return ret
+
+        #Write cam and run into the file if a value changed, without any remote overlay
+        def Save( self, cam, run, must = 1 ):
+                return WriteParameter( self.FileName, cam, run, must )
+
+        def Stats( self ):
+                return { 'configreloads': self.Reloads }
+
 #Class Station with parameter
 class Station:
         def __init__( self ):
@@ -387,6 +544,7 @@ class Station:
 #Read station info file
 def GetStationInfo( filename ):
         ret = Station()
+        config = configparser.ConfigParser()
         config.read( filename )
         ret.Name              = config.get(      'Info', 'name' )
         ret.Location          = config.get(      'Info', 'location' )
@@ -404,6 +562,7 @@ def GetStationInfo( filename ):
 #Write station information file, if not exist
 def WriteStationInfo( filename, run, station ):
         if not os.path.isfile( filename ):
+                info = configparser.ConfigParser()
                 info[ 'Header' ] = { 'idname': run.IDName,
                                      'idno': run.IDNo }
                 info[ 'Info'   ] = { 'name': station.Name,
@@ -422,27 +581,46 @@ def WriteStationInfo( filename, run, station ):
 
 #Class Remote with parameter
 class Remote(object):
+        __slots__ = ( 'CamOffLine', 'PeriodM', 'Series', 'ZoomMove', 'ZoomDrawRect', 'ZoomCentPercX', 'ZoomCentPercY',
+                      'Profile', 'ProfileCycles' )
+
         def __init__( self ):
                 self.CamOffLine = 0
-                self.PerodM = 1
+                self.PeriodM = 1
                 self.Series = 0
                 self.ZoomMove = 0
                 self.ZoomDrawRect = 0
                 self.ZoomCentPercX = 0
                 self.ZoomCentPercY = 0
+                self.Profile = 0
+                self.ProfileCycles = 10
         def Init( self ):
                 self.CamOffLine = 0
-                self.PerodM = 1
+                self.PeriodM = 1
                 self.Series = 0
                 self.ZoomMove = 0
                 self.ZoomDrawRect = 0
                 self.ZoomCentPercX = 0
                 self.ZoomCentPercY = 0
+                self.Profile = 0
+                self.ProfileCycles = 10
+
+        #Overlay remote commands onto the operating parameter
+        def Apply( self, cam, run ):
+                run.CamOffLine     = self.CamOffLine
+                run.PeriodM        = self.PeriodM
+                run.Series         = self.Series
+                run.ZoomMove       = self.ZoomMove
+                run.ZoomDrawRect   = self.ZoomDrawRect
+                cam.ZoomCentPercX  = self.ZoomCentPercX
+                cam.ZoomCentPercY  = self.ZoomCentPercY
 
 #Read Remote file
 def GetRemote( filename ):
         ret = Remote()
-        remote.read( filename )
+        remote = configparser.ConfigParser()
+        with open( filename ) as remotefile:
+                remote.read_file( remotefile )
 
         ret.CamOffLine     = remote.getint( 'Command', 'camoffline' )
         ret.PeriodM        = remote.getint( 'Command', 'periodm' )
@@ -451,18 +629,24 @@ def GetRemote( filename ):
         ret.ZoomDrawRect   = remote.getint( 'Command', 'zoomdrawrect' )
         ret.ZoomCentPercX  = remote.getint( 'Detail',  'zoomcentpercx' )
         ret.ZoomCentPercY  = remote.getint( 'Detail',  'zoomcentpercy' )
+        #Profiling session: a new id starts it, files of older servers have none
+        ret.Profile        = remote.getint( 'Profile', 'session', fallback = 0 )
+        ret.ProfileCycles  = remote.getint( 'Profile', 'cycles', fallback = 10 )
 
         return ret
 
 #Write remote command file
 def WriteRemote(filename, remoteInput):
+        remote = configparser.ConfigParser()
         remote[ 'Command' ] = { 'camoffline': remoteInput.CamOffLine,
-                                'periodm': remoteInput.PerodM,
+                                'periodm': remoteInput.PeriodM,
                                 'series': remoteInput.Series, 
                                 'zoommove': remoteInput.ZoomMove, 
                                 'zoomdrawrect': remoteInput.ZoomDrawRect }
         remote[ 'Detail'  ] = { 'zoomcentpercx': remoteInput.ZoomCentPercX,
                                 'zoomcentpercy': remoteInput.ZoomCentPercY }
+        remote[ 'Profile' ] = { 'session': remoteInput.Profile,
+                                'cycles': remoteInput.ProfileCycles }
         
-        with open( filename, 'w' ) as stationfile:
-                info.write( stationfile )
\ No newline at end of file
+        with open( filename, 'w' ) as remotefile:
+                remote.write( remotefile )
@@ -9,6 +9,7 @@ VERSION = "Dec_08_2019"
 # sundialcam.py - Mainmodule
 # sdcfun.py - Functions for parameter handling
 # sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
 # station.cfg - Containing working parameter
 # remotecmd.cfg - Containing remote commands parameter
 # sundialcam.log - Log file
@@ -17,28 +18,11 @@ VERSION = "Dec_08_2019"
 # History see Mainmodule
 
 import configparser, os, time, math
+import numpy
 from math import sin
 from time import gmtime, strftime
 from datetime import date, datetime, timedelta
 
-#Waiting to get an exact capturing time = hh:mm:00 or hh:mm:30
-def WaitCapture( goaltime, prolog ):
-        settime = goaltime - prolog - 1
-        ticksact = time.time()
-        now = time.localtime( ticksact )
-        nowS = int( time.strftime( "%S", now ) ) % goaltime
-        nowMS = ticksact - int( ticksact )
-        sleeptime = settime - nowS - nowMS
-        if ( sleeptime > 0 ):
-            time.sleep( sleeptime )
-        while 1:
-            ticksact = time.time()
-            now = time.localtime( ticksact )
-            nowS = int( time.strftime( "%S", now ) ) - sleeptime
-            nowMS = ticksact - int( ticksact )
-            if ( nowMS + nowS > prolog ):
-                break
-
 #Log status data to text file
 def LogStatus( logticks, temp_CPU, temp_Cam, temp_Out, brightness ):
         logfile = strftime( 'sdcstatus%Y%b%d.txt', gmtime( logticks ) )
@@ -54,54 +38,82 @@ def LogStatus( logticks, temp_CPU, temp_Cam, temp_Out, brightness ):
         status_text.close()
         return
 
+#Array versions of the sun functions below: numpy arrays ( or scalars ) of ticks, longitudes
+#and latitudes, broadcast against each other, evaluated in one pass for batch annotation of archives
+
+#Calculate equition of time [s] out of ticks within +/-2 sec
+def aEoTs( ticks ):
+        pideg  = numpy.pi / 180
+        dayrel = numpy.asarray( ticks, dtype = numpy.float64 ) / 60 / 60 / 24 - 10957.54
+        L      = 36000.769 / 36525 * dayrel + 280.4656
+        G      = 35999.05 / 36525 * dayrel + 357.528
+        Lambda = L % 360.0 + 1.915 * numpy.sin( G % 360.0 * pideg ) + 0.02 * numpy.sin( 2 * G * pideg )
+        eotdeg = -1.918 * numpy.sin( G * pideg ) - 0.02 * numpy.sin( 2 * G * pideg ) + 2.466 * numpy.sin( 2 * Lambda * pideg ) - 0.053 * numpy.sin( 4 * Lambda * pideg )
+        return eotdeg * 4 * 60
+
+#Calculate equition of longitude [s] out of longitude
+def aEoLs( longitude ):
+        return numpy.asarray( longitude, dtype = numpy.float64 ) * 24 / 360 * 60 * 60
+
+#Offset LAT - UTC [s] = EoT + EoL
+def aLATOffsetS( ticks, longitude ):
+        return aEoTs( ticks ) + aEoLs( longitude )
+
+#Calculate half day length in [h] from noon to sunset out of day of year and latitude
+#Returns hours and polar state: 1 polar day ( 12 h ), -1 polar night ( 0 h ), 0 sun rises and sets
+def aNoonToSetH( dayyear, latitude ):
+        #Latitude from Degree to Rad
+        latirad = numpy.radians( numpy.asarray( latitude, dtype = numpy.float64 ) )
+        #Declination of Sun at this day
+        declisun = 0.4095 * numpy.sin( 0.016906 * ( numpy.asarray( dayyear, dtype = numpy.float64 ) - 80.086 ))
+        #Definition of Sun height for rise and set - from Min to Rad
+        sunset_h = -50.0 / 60.0 / 57.29578
+        cosh = ( numpy.sin( sunset_h ) - numpy.sin( latirad ) * numpy.sin( declisun )) / ( numpy.cos( latirad ) * numpy.cos( declisun ))
+        polar = numpy.where( cosh <= -1.0, 1, numpy.where( cosh >= 1.0, -1, 0 ) )
+        return 12 * numpy.arccos( numpy.clip( cosh, -1.0, 1.0 ) ) / numpy.pi, polar
+
+#Local mean solar day number and day of year of ticks at longitude
+def aSolarDay( ticks, longitude ):
+        day = numpy.floor( ( numpy.asarray( ticks, dtype = numpy.float64 ) + aEoLs( longitude ) ) / 86400 ).astype( numpy.int64 )
+        date64 = day.astype( 'datetime64[D]' )
+        dayyear = ( date64 - date64.astype( 'datetime64[Y]' ) ).astype( numpy.int64 ) + 1
+        return day, dayyear
+
+#Calculate noon, sunrise and sunset in UTC ticks of the solar day of ticks, plus polar state
+#Polar day gives sunrise/sunset 12 h off noon, polar night sunrise = sunset = noon
+def aSunRiseSetUTC( ticks, longitude, latitude ):
+        day, dayyear = aSolarDay( ticks, longitude )
+        noonlat = day * 86400.0 + 43200.0 - aEoLs( longitude )
+        noonutc = noonlat - aEoTs( noonlat )
+        noontoseth, polar = aNoonToSetH( dayyear, latitude )
+        return noonutc, noonutc - noontoseth * 3600, noonutc + noontoseth * 3600, polar
+
 #Calculate equition of time [s] out of actual date within +/-2 sec
 def fEoTs( dayticks ):
-        eots   = 0.0
-        pideg  = 3.14159265 / 180
-        dayrel       = dayticks / 60 / 60 / 24 - 10957.54
-        eps0         = 23.4391667 - dayrel / 36525 * 0.0130056
-        L            = 36000.769 / 36525 * dayrel + 280.4656
-        G            = 35999.05 / 36525 * dayrel + 357.528
-        Lred         = L % 360.0
-        Gred         = G % 360.0
-        Lambda       = Lred + 1.915 * sin( Gred * pideg ) + 0.02 * sin( 2 * Gred * pideg )
-        eotdeg       = -1.918 * sin( G * pideg ) - 0.02 * sin( 2 * G * pideg ) + 2.466 * sin( 2 * Lambda * pideg ) - 0.053 * sin( 4 * Lambda * pideg )
-        #eots         = eotdeg * 4 * 60 - 1.8
-        eots         = eotdeg * 4 * 60
-        return eots
+        return float( aEoTs( dayticks ) )
 
 #Calculate equition of longitude [s] out of longitude
 def fEoLs( long ):
-        ret = 0
-        ret = long * 24 / 360
-        return ret * 60 * 60
+        return float( aEoLs( long ) )
+
+#Calculate half day length in [h] from noon to sunset out of day of year and latitude
+#Polar day returns 12 h, polar night 0 h
+def NoonToSetH( dayyear, latitude ):
+        return float( aNoonToSetH( dayyear, latitude )[0] )
 
 #Calculate noon, sunset, and sunrise time in [h] out of ticks, longitude, and latitude
+#The day is the local mean solar date of ticks ( UTC date shifted by the longitude )
 def SunRiseSetUTC( ticks, longitude, latitude ):
-        dayyear = int( strftime( '%j', gmtime( ticks ) ) )
-        #Latitude from Degree to Rad
-        latirad = math.pi * latitude / 180
-        #Declination of Sun at this day
-        declisun = 0.4095 * math.sin( 0.016906 * ( dayyear - 80.086 ))
-        #Definition of Sun height for rise and set - from Min to Rad
-        sunset_h = -50.0 / 60.0 / 57.29578
-        #From Noon to Set in hours
-        noontoseth = 12 * math.acos(( math.sin(sunset_h ) - math.sin( latirad ) * math.sin( declisun )) / ( math.cos( latirad ) * math.cos( declisun ))) / math.pi
-        #Equition of Time
-        eoth = fEoTs( ticks ) / 60 / 60
-        #Equition of Longitude
-        eolh = longitude / 15
-        #Calculate noon LAT and UTC, sunrise and sunset
-        noonlat = datetime.combine( datetime.today(), datetime.strptime( '12:00:00', '%H:%M:%S').time() )
-        noonutc = noonlat + timedelta( hours = -eoth - eolh )
-        sunriseutc = noonlat + timedelta( hours = -noontoseth - eoth - eolh )
-        sunsetutc = noonlat + timedelta( hours = noontoseth - eoth - eolh )
-        return noonutc, sunriseutc, sunsetutc
+        noonutc, sunriseutc, sunsetutc, polar = aSunRiseSetUTC( ticks, longitude, latitude )
+        epoch = datetime( 1970, 1, 1 )
+        return ( epoch + timedelta( seconds = float( noonutc ) ), epoch + timedelta( seconds = float( sunriseutc ) ),
+                 epoch + timedelta( seconds = float( sunsetutc ) ) )
 
-#Summarize images of the day - e.g. make movie
-def DoAfterSunset():
-        #For future use
-        return
+#Summarize images of the day - finish the time-lapse movie
+def DoAfterSunset( movie ):
+        if movie is None:
+                return None
+        return movie.Finish()
 
 ###Calculate equition of time [s] out of day of year
 ##def fEoTs( doy ):
@@ -0,0 +1,288 @@
+#!/usr/bin/python3
+# sdcimage.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
+# sdcoverlay.py - Info overlay of the total image
+# sdcimage.py - Image processing stages
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import os, io, time, logging
+import numpy
+from PIL import Image, ImageDraw, ImageFilter
+
+#Class BlurMask - privacy blur of the accessible region of the total web image
+#The mask is kept in memory at web size and rebuilt only if the web size changes,
+#the blur runs on the bounding box of the mask only.
+class BlurMask:
+        def __init__( self, filename, radius ):
+                self.FileName = filename
+                self.Radius = radius
+                self.Size = None
+                self.Mask = None
+                self.Box = None
+
+        #Load the mask file or create it with the default polygon
+        def Build( self, width, height ):
+                if not os.path.isfile( self.FileName ):
+                        #create polygon mask
+                        mask = Image.new( 'L', ( width, height ), 0 )
+                        maskdraw = ImageDraw.Draw( mask )
+                        #the follwing polygon defines the blur region
+                        maskdraw.polygon( [ ( 2, height - 70 ),
+                                            ( width - 3, height - 130 ),
+                                            ( width - 3, height - 3 ),
+                                            ( 2, height - 3 ) ], fill = "white" )
+                        mask.save( self.FileName )
+                else:
+                        with Image.open( self.FileName ) as maskfile:
+                                mask = maskfile.convert( 'L' )
+                if mask.size != ( width, height ):
+                        mask = mask.resize( ( width, height ) )
+                self.Size = ( width, height )
+                self.Box = mask.getbbox()
+                self.Mask = mask.crop( self.Box ) if self.Box else None
+                logging.debug( 'Blur mask %ix%i box %s', width, height, self.Box )
+
+        #Blur out within the mask, in place
+        def Apply( self, out ):
+                if out.size != self.Size:
+                        self.Build( out.size[0], out.size[1] )
+                if self.Box is None:
+                        return
+                #Blur a margin around the box too, so the edge is not darkened by the border
+                margin = 3 * self.Radius
+                x1, y1, x2, y2 = self.Box
+                region = ( max( x1 - margin, 0 ), max( y1 - margin, 0 ),
+                           min( x2 + margin, out.size[0] ), min( y2 + margin, out.size[1] ) )
+                blurred = out.crop( region ).filter( ImageFilter.GaussianBlur( self.Radius ) )
+                inner = ( x1 - region[0], y1 - region[1], x2 - region[0], y2 - region[1] )
+                out.paste( blurred.crop( inner ), ( x1, y1 ), self.Mask )
+
+#Class ChangeGate - skip uploads of frames visually unchanged against the last uploaded one
+#The signature is the luminance of a 32x16 thumbnail, the difference its mean absolute change in percent.
+class ChangeGate:
+        ThumbSize = ( 32, 16 )
+
+        def __init__( self ):
+                self.Last = None
+                self.Skipped = 0
+
+        def Signature( self, image ):
+                thumb = image.resize( self.ThumbSize, Image.BOX ).convert( 'L' )
+                return numpy.asarray( thumb, dtype = numpy.float32 )
+
+        #Mean absolute luminance change in percent of full scale
+        def Difference( self, sig ):
+                return float( numpy.abs( sig - self.Last[0] ).mean() ) * 100.0 / 255.0
+
+        #Upload needed: gate off ( thres <= 0 ), nothing uploaded yet, changed, or last upload older than maxs
+        def Changed( self, sig, ticks, thres, maxs ):
+                if ( thres <= 0 ) or ( self.Last is None ):
+                        return 1
+                if ticks - self.Last[1] >= maxs:
+                        return 1
+                if self.Difference( sig ) >= thres:
+                        return 1
+                self.Skipped += 1
+                return 0
+
+        #Remember the signature of a frame whose images were uploaded
+        def Commit( self, sig, ticks ):
+                if sig is not None:
+                        self.Last = ( sig, ticks )
+
+#Class Rendition - one web image out of a region of the camera frame
+class Rendition:
+        __slots__ = ( 'Name', 'Region', 'Width', 'BudgetKB' )
+
+        def __init__( self, name, region, width, budgetkb ):
+                self.Name = name
+                self.Region = region
+                self.Width = width
+                self.BudgetKB = budgetkb
+
+#Renditions out of station.cfg: name:region:width[:budget kB], comma separated
+#Region crop is the sundial crop, zoom the magnifier region; width 0 is the web width of station.cfg,
+#without budget the JPEG quality of station.cfg is used as is.
+#total and detail are the web images as before, the others are saved beside them as img<name>.jpg.
+def ParseRenditions( text ):
+        renditions = []
+        for item in text.split( ',' ):
+                if not item.strip():
+                        continue
+                cols = [ c.strip() for c in item.split( ':' ) ]
+                if ( len( cols ) not in ( 3, 4 ) ) or ( cols[1] not in ( 'crop', 'zoom' ) ):
+                        raise ValueError( 'Rendition ' + item.strip() )
+                renditions.append( Rendition( cols[0], cols[1], int( cols[2] ), int( cols[3] ) if len( cols ) == 4 else 0 ) )
+        return renditions
+
+#Class RenditionEngine - all renditions resized straight out of the camera frame, no intermediate crop copies
+#Each rendition is one box resize of its region: Pillow reduces by an integer factor first ( reducing_gap ),
+#then resamples, so the cost follows the output size. A JPEG not yet decoded is decoded scaled down
+#( draft, DCT scaling ) to the smallest size still large enough for all renditions, a decoded one stays as is.
+class RenditionEngine:
+        Default = 'total:crop:0, detail:zoom:0'
+        ReducingGap = 3.0
+
+        def __init__( self ):
+                self.Text = None
+                self.Renditions = ParseRenditions( self.Default )
+                self.LastS = 0.0
+
+        #Reparse only if the declaration changed, a broken one keeps the previous renditions
+        def Configure( self, text ):
+                if text == self.Text:
+                        return
+                self.Text = text
+                try:
+                        renditions = ParseRenditions( text )
+                        names = [ r.Name for r in renditions ]
+                        if ( 'total' not in names ) or ( 'detail' not in names ):
+                                raise ValueError( 'total and detail needed' )
+                        self.Renditions = renditions
+                except ValueError as e:
+                        logging.warning( 'Renditions %s not used: %s', text, e )
+
+        def Find( self, name ):
+                for r in self.Renditions:
+                        if r.Name == name:
+                                return r
+                return None
+
+        def Region( self, name ):
+                r = self.Find( name )
+                return r.Region if r else None
+
+        def BudgetKB( self, name ):
+                r = self.Find( name )
+                return r.BudgetKB if r else 0
+
+        #Region boxes in camera coordinates, the zoom box is relative to the crop
+        def Boxes( self, cam ):
+                crop = ( cam.CropX1, cam.CropY1, cam.CropX2, cam.CropY2 )
+                zoom = ( cam.CropX1 + cam.ZoomX1, cam.CropY1 + cam.ZoomY1, cam.CropX1 + cam.ZoomX2, cam.CropY1 + cam.ZoomY2 )
+                return { 'crop': crop, 'zoom': zoom }
+
+        #Output size, width 0 keeps the web sizes of station.cfg
+        def Size( self, rendition, cam, box ):
+                if rendition.Width <= 0:
+                        if rendition.Region == 'crop':
+                                return ( cam.CropWebWidth, cam.CropWebHeight )
+                        return ( cam.ZoomWebWidth, cam.ZoomWebHeight )
+                bw = max( box[2] - box[0], 1 )
+                bh = max( box[3] - box[1], 1 )
+                return ( rendition.Width, max( 1, int( round( rendition.Width * bh / bw ) ) ) )
+
+        #Dictionary name: RGB image of all renditions, image is the camera frame, origin its top left on the sensor
+        def Render( self, image, cam, origin = ( 0, 0 ) ):
+                start = time.perf_counter()
+                boxes = self.Boxes( cam )
+                if origin != ( 0, 0 ):
+                        boxes = dict( ( k, ( b[0] - origin[0], b[1] - origin[1], b[2] - origin[0], b[3] - origin[1] ) ) for k, b in boxes.items() )
+                sizes = [ ( r, self.Size( r, cam, boxes[ r.Region ] ) ) for r in self.Renditions ]
+                scale = 1.0
+                if image.format == 'JPEG':
+                        need = max( size[0] / float( max( boxes[ r.Region ][2] - boxes[ r.Region ][0], 1 ) ) for r, size in sizes )
+                        width = image.size[0]
+                        image.draft( 'RGB', ( int( image.size[0] * need + 1 ), int( image.size[1] * need + 1 ) ) )
+                        scale = image.size[0] / float( width )
+                out = {}
+                for r, size in sizes:
+                        box = tuple( v * scale for v in boxes[ r.Region ] )
+                        im = image.resize( size, Image.BICUBIC, box = box, reducing_gap = self.ReducingGap )
+                        if im.mode != 'RGB':
+                                im = im.convert( 'RGB' )
+                        out[ r.Name ] = im
+                self.LastS = time.perf_counter() - start
+                return out
+
+        def Stats( self ):
+                return { 'renderms': round( self.LastS * 1000, 1 ) }
+
+#Class JpegEncoder - JPEG bytes of a rendition encoded once, all transports send these bytes
+#With a budget the quality is the highest one whose JPEG fits into it, searched outwards from the quality
+#of the last frame, so a steady scene needs two or three encodes.
+class JpegEncoder:
+        QualityMin = 30
+
+        def __init__( self ):
+                self.Quality = 75
+                self.Progressive = 0
+                self.Optimize = 0
+                self.Last = {}
+                self.Sizes = {}
+                self.Encodes = 0
+
+        def Configure( self, quality, progressive, optimize ):
+                self.Quality = min( max( quality, self.QualityMin ), 95 )
+                self.Progressive = progressive
+                self.Optimize = optimize
+
+        def EncodeAt( self, image, quality ):
+                buf = io.BytesIO()
+                image.save( buf, 'JPEG', quality = quality, progressive = bool( self.Progressive ), optimize = bool( self.Optimize ) )
+                self.Encodes += 1
+                return buf.getvalue()
+
+        #JPEG bytes of the rendition name, budgetkb 0 is the configured quality
+        def Encode( self, name, image, budgetkb ):
+                if budgetkb <= 0:
+                        quality = self.Quality
+                        data = self.EncodeAt( image, quality )
+                else:
+                        budget = budgetkb * 1024
+                        quality = min( self.Last.get( name, self.Quality ), self.Quality )
+                        data = self.EncodeAt( image, quality )
+                        #Galloping away from the last quality brackets the result, bisection within the bracket
+                        step = 1
+                        if len( data ) <= budget:
+                                low, high = quality, self.Quality
+                                while low + step <= high:
+                                        trial = self.EncodeAt( image, low + step )
+                                        if len( trial ) > budget:
+                                                high = low + step - 1
+                                                break
+                                        low, data = low + step, trial
+                                        step *= 2
+                        else:
+                                low, high, over, data = self.QualityMin, quality - 1, data, None
+                                while high >= low:
+                                        probe = max( quality - step, low )
+                                        trial = self.EncodeAt( image, probe )
+                                        if len( trial ) <= budget:
+                                                low, data = probe, trial
+                                                break
+                                        high, over = probe - 1, trial
+                                        step *= 2
+                                #Not even the minimum quality fits: sent anyway
+                                if data is None:
+                                        low, high, data = self.QualityMin, self.QualityMin, over
+                        while low < high:
+                                mid = ( low + high + 1 ) // 2
+                                trial = self.EncodeAt( image, mid )
+                                if len( trial ) <= budget:
+                                        low, data = mid, trial
+                                else:
+                                        high = mid - 1
+                        quality = low
+                self.Last[ name ] = quality
+                self.Sizes[ name ] = len( data )
+                return data
+
+        def Stats( self ):
+                return { 'jpegquality': self.Last.get( 'total', self.Quality ),
+                         'jpegkb': round( self.Sizes.get( 'total', 0 ) / 1024.0, 1 ),
+                         'jpegencodes': self.Encodes }
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+# sdcmemory.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcimage.py - Image processing stages
+# sdcmemory.py - Memory budget and per stage memory report
+# station.cfg - Containing working parameter
+#
+# History see Mainmodule
+
+import os, resource, threading, tracemalloc, logging
+import sdcfun, sdcimage
+
+PageSize = os.sysconf( 'SC_PAGE_SIZE' ) if hasattr( os, 'sysconf' ) else 4096
+MB = 1048576.0
+
+#Resident set size in bytes, 0 if /proc is not there
+def RSS():
+        try:
+                with open( '/proc/self/statm' ) as f:
+                        return int( f.read().split()[1] ) * PageSize
+        except ( OSError, ValueError, IndexError ):
+                return 0
+
+#Peak resident set size of the process in bytes
+def PeakRSS():
+        return resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss * 1024
+
+#Queue depth of the pipeline stages, one frame less in flight in low memory mode
+def PipeDepth( run ):
+        return 1 if run.LowMemory else 2
+
+#Estimated image memory in bytes of the configuration, on top of the baseline of the process
+#Capture buffer ( region or full sensor ), renditions of all frames in flight, the transient of the
+#largest resize, the decode of the offline / night JPEG and the overlay layer.
+def Estimate( cam, run, camwidth, camheight ):
+        if run.LowMemory:
+                w, h = cam.CropX2 - cam.CropX1, cam.CropY2 - cam.CropY1
+        else:
+                w, h = camwidth, camheight
+        capture = ( w + 31 ) // 32 * 32 * ( ( h + 15 ) // 16 * 16 ) * 4
+        engine = sdcimage.RenditionEngine()
+        engine.Configure( run.Renditions )
+        boxes = engine.Boxes( cam )
+        renditions = 0
+        transient = 0
+        need = 0.0
+        for r in engine.Renditions:
+                box = boxes[ r.Region ]
+                size = engine.Size( r, cam, box )
+                renditions += size[0] * size[1] * 4
+                transient = max( transient, size[0] * ( box[3] - box[1] ) * 4 )
+                need = max( need, size[0] / float( max( box[2] - box[0], 1 ) ) )
+        scale = 1
+        while ( scale < 8 ) and ( 1.0 / ( scale * 2 ) >= need ):
+                scale *= 2
+        decode = ( camwidth // scale ) * ( camheight // scale ) * 4
+        frames = ( 1 + PipeDepth( run ) ) if run.Pipeline else 1
+        overlay = cam.CropWebWidth * cam.CropWebHeight * 4
+        return capture + frames * renditions + max( transient, decode ) + overlay
+
+#Class MemoryMonitor - resident memory per pipeline stage and the budget check of the configuration
+#RSS is read at the end of each stage, the growth within the stage is kept as its peak.
+#The baseline starts as the RSS at startup and is raised to the measured peak less the image estimate
+#after each cycle, so a reloaded parameter file is checked against what the station really needs.
+#With trace on, tracemalloc adds the peak of the python allocations ( JPEG bytes, numpy arrays ) per stage;
+#the image memory of Pillow is not traced, RSS covers it. Stages on other threads overlap the traced peaks.
+class MemoryMonitor:
+        def __init__( self, camwidth, camheight ):
+                self.CamWidth = camwidth
+                self.CamHeight = camheight
+                self.Baseline = RSS()
+                self.Trace = 0
+                self.Stages = {}
+                self.Local = threading.local()
+                self.ImageB = 0
+                self.EstimateB = 0
+                self.BudgetB = 0
+                self.Over = 0
+
+        def SetTrace( self, on ):
+                on = 1 if on else 0
+                if on == self.Trace:
+                        return
+                if on:
+                        tracemalloc.start()
+                else:
+                        tracemalloc.stop()
+                self.Trace = on
+
+        def Begin( self, stage ):
+                self.Local.Start = RSS()
+                if self.Trace and hasattr( tracemalloc, 'reset_peak' ):
+                        tracemalloc.reset_peak()
+
+        def End( self, stage ):
+                rss = RSS()
+                growth = max( 0, rss - getattr( self.Local, 'Start', rss ) )
+                traced = tracemalloc.get_traced_memory()[1] if self.Trace else 0
+                last = self.Stages.get( stage, ( 0, 0, 0 ) )
+                self.Stages[ stage ] = ( max( last[0], rss ), max( last[1], growth ), max( last[2], traced ) )
+
+        #Raises ValueError if the estimated peak exceeds the budget ( budgetmb 0: no check )
+        def Check( self, cam, run ):
+                image = Estimate( cam, run, self.CamWidth, self.CamHeight )
+                budget = run.MemoryBudgetMB * MB
+                if ( budget > 0 ) and ( self.Baseline + image > budget ):
+                        raise ValueError( 'estimated peak {:.0f} MB exceeds the memory budget of {} MB{}'.format(
+                                          ( self.Baseline + image ) / MB, run.MemoryBudgetMB, '' if run.LowMemory else ', lowmemory = 1 may fit' ) )
+                self.ImageB = image
+                self.EstimateB = self.Baseline + image
+                self.BudgetB = budget
+
+        #Baseline out of the measured peak, warning once if the peak went over the budget
+        def Calibrate( self ):
+                peak = PeakRSS()
+                self.Baseline = max( self.Baseline, peak - self.ImageB )
+                self.EstimateB = self.Baseline + self.ImageB
+                if ( self.BudgetB > 0 ) and ( peak > self.BudgetB ) and not self.Over:
+                        self.Over = 1
+                        logging.warning( 'Memory peak %.1f MB over the budget of %.0f MB', peak / MB, self.BudgetB / MB )
+
+        #Check of the parameter file values for the ConfigStore, a refused file is not loaded
+        def CheckParameter( self, values ):
+                cam = sdcfun.Cam( self.CamWidth, self.CamHeight )
+                run = sdcfun.RunPar()
+                sdcfun.SetParameter( values, cam, run )
+                cam.AdjustParameterset()
+                self.Check( cam, run )
+
+        def Report( self ):
+                lines = [ 'Memory baseline {:.1f} MB estimate {:.1f} MB budget {:.0f} MB peak {:.1f} MB'.format(
+                          self.Baseline / MB, self.EstimateB / MB, self.BudgetB / MB, PeakRSS() / MB ) ]
+                for stage, ( rss, growth, traced ) in sorted( self.Stages.items() ):
+                        lines.append( '  {:10s} rss {:6.1f} MB  growth {:6.1f} MB  python peak {:6.1f} MB'.format(
+                                      stage, rss / MB, growth / MB, traced / MB ) )
+                return lines
+
+        def Stats( self ):
+                stats = { 'rssmb': round( RSS() / MB, 1 ), 'rsspeakmb': round( PeakRSS() / MB, 1 ),
+                          'rssestmb': round( self.EstimateB / MB, 1 ) }
+                for stage, ( rss, growth, traced ) in self.Stages.items():
+                        stats[ stage + 'rssmb' ] = round( rss / MB, 1 )
+                        if self.Trace:
+                                stats[ stage + 'pymb' ] = round( traced / MB, 1 )
+                return stats
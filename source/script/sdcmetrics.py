@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+# sdcmetrics.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcpipe.py - Capture, processing and upload pipeline
+# sdcmetrics.py - Latency of every stage, rolling p50 / p95 / max
+# sdcmetrics.prom - Prometheus textfile of the latencies on the ramdisk
+#
+# History see Mainmodule
+
+import os, time, threading, collections
+
+#Class Window - durations of the last Size runs of one stage, count and sum since start
+class Window:
+        __slots__ = ( 'Samples', 'Count', 'Sum' )
+
+        def __init__( self, size ):
+                self.Samples = collections.deque( maxlen = size )
+                self.Count = 0
+                self.Sum = 0.0
+
+        #( p50, p95, max ) in seconds of the window, nearest rank
+        def Quantiles( self ):
+                values = sorted( self.Samples )
+                if not values:
+                        return ( 0.0, 0.0, 0.0 )
+                n = len( values )
+                return ( values[ ( n - 1 ) // 2 ], values[ min( n - 1, int( n * 0.95 ) ) ], values[-1] )
+
+#Class LatencyMetrics - every stage timed with the monotonic clock into a rolling window
+#Stages report from any thread: Begin / End like the memory monitor ( pipeline stages ),
+#or Since( stage, start ) which returns the end, so consecutive steps chain without a second clock read.
+class LatencyMetrics:
+        Size = 120
+
+        def __init__( self ):
+                self.Windows = {}
+                self.Lock = threading.Lock()
+                self.Local = threading.local()
+                self.Written = 0
+
+        def Observe( self, stage, seconds ):
+                with self.Lock:
+                        window = self.Windows.get( stage )
+                        if window is None:
+                                window = self.Windows[ stage ] = Window( self.Size )
+                        window.Samples.append( seconds )
+                        window.Count += 1
+                        window.Sum += seconds
+
+        def Since( self, stage, start ):
+                end = time.monotonic()
+                self.Observe( stage, end - start )
+                return end
+
+        def Begin( self, stage ):
+                if not hasattr( self.Local, 'Start' ):
+                        self.Local.Start = {}
+                self.Local.Start[ stage ] = time.monotonic()
+
+        def End( self, stage ):
+                start = getattr( self.Local, 'Start', {} ).pop( stage, None )
+                if start is not None:
+                        self.Since( stage, start )
+
+        #{ stage: ( p50, p95, max, count ) } in seconds, stages in name order
+        def Snapshot( self ):
+                with self.Lock:
+                        return collections.OrderedDict( ( stage, self.Windows[ stage ].Quantiles() + ( self.Windows[ stage ].Count, self.Windows[ stage ].Sum ) )
+                                                        for stage in sorted( self.Windows ) )
+
+        #Status block: p50 / p95 / max in ms and the runs per stage
+        def Summary( self ):
+                return collections.OrderedDict( ( stage, { 'p50ms': round( p50 * 1000, 1 ), 'p95ms': round( p95 * 1000, 1 ),
+                                                           'maxms': round( top * 1000, 1 ), 'count': count } )
+                                                for stage, ( p50, p95, top, count, total ) in self.Snapshot().items() )
+
+        #Prometheus textfile for the node exporter, replaced as a whole
+        def Write( self, filename, station ):
+                lines = [ '# HELP sdcam_stage_seconds Stage latency of the sundial cam over the last {} runs'.format( self.Size ),
+                          '# TYPE sdcam_stage_seconds summary' ]
+                maxlines = [ '# HELP sdcam_stage_max_seconds Longest stage run over the last {} runs'.format( self.Size ),
+                             '# TYPE sdcam_stage_max_seconds gauge' ]
+                for stage, ( p50, p95, top, count, total ) in self.Snapshot().items():
+                        labels = 'station="{}",stage="{}"'.format( str( station ).replace( '\\', '\\\\' ).replace( '"', '\\"' ), stage )
+                        lines.append( 'sdcam_stage_seconds{{{},quantile="0.5"}} {:.6f}'.format( labels, p50 ) )
+                        lines.append( 'sdcam_stage_seconds{{{},quantile="0.95"}} {:.6f}'.format( labels, p95 ) )
+                        lines.append( 'sdcam_stage_seconds_sum{{{}}} {:.6f}'.format( labels, total ) )
+                        lines.append( 'sdcam_stage_seconds_count{{{}}} {}'.format( labels, count ) )
+                        maxlines.append( 'sdcam_stage_max_seconds{{{}}} {:.6f}'.format( labels, top ) )
+                tmpname = filename + '.tmp'
+                with open( tmpname, 'w' ) as f:
+                        f.write( '\n'.join( lines + maxlines ) + '\n' )
+                os.replace( tmpname, filename )
+                self.Written += 1
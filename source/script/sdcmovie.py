@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+# sdcmovie.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, ffmpeg
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcarchive.py - Daily archive of the series
+# sdcmovie.py - Time-lapse movie of the day
+# sdcmovieYYYYDDD_NNN.ts - Finished segments of the day
+# sdcmovieYYYYDDD.txt - Segment list of the day, ffmpeg concat format with the last frame time
+# sdcmovieYYYYDDD.mp4 - Movie of the day
+#
+# History see Mainmodule
+
+import os, re, glob, shutil, subprocess, logging
+from time import gmtime, strftime
+import sdcarchive
+
+Prefix = 'sdcmovie'
+
+#ffmpeg reading JPEG bytes from stdin, the frames are not decoded in python
+def EncodeCommand( output, fps, width, codec, form ):
+        return [ 'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y',
+                 '-f', 'image2pipe', '-c:v', 'mjpeg', '-framerate', str( fps ), '-i', '-',
+                 '-vf', 'scale={}:-2,format=yuv420p'.format( width ),
+                 '-c:v', codec, '-preset', 'veryfast', '-crf', '23', '-f', form, output ]
+
+#Class Encoder - one ffmpeg process fed frame by frame through a pipe
+class Encoder:
+        def __init__( self, output, fps, width, codec, form ):
+                self.Output = output
+                self.Frames = 0
+                self.Process = subprocess.Popen( EncodeCommand( output, fps, width, codec, form ),
+                                                 stdin = subprocess.PIPE, stdout = subprocess.DEVNULL )
+
+        def Write( self, data ):
+                self.Process.stdin.write( data )
+                self.Frames += 1
+
+        #Returns 1 if ffmpeg finished the file
+        def Close( self ):
+                try:
+                        self.Process.stdin.close()
+                except OSError:
+                        pass
+                return int( self.Process.wait() == 0 )
+
+#Class MovieEncoder - time-lapse of the day encoded while the frames come in
+#Frames go into segments of Segment frames, a segment is listed only after ffmpeg finished it, so
+#after a crash or reboot the unlisted segment is dropped and its frames are fed again out of the archive.
+#Finish concatenates the segments without re-encoding, so the movie is ready seconds after sunset.
+class MovieEncoder:
+        def __init__( self, directory, archivedir, fps, width, codec, segment ):
+                self.Directory = directory
+                self.ArchiveDir = archivedir
+                self.Configure( fps, width, codec, segment )
+                #ffmpeg looked up with the first frame, a station with movie = 0 gets no warning
+                self.Enabled = None
+                self.Day = None
+                self.Base = ''
+                self.Segments = []
+                self.Done = 0.0
+                self.Encoder = None
+                self.Last = 0.0
+                self.Frames = 0
+                self.Failed = 0
+
+        def Configure( self, fps, width, codec, segment ):
+                self.FPS = max( 1, fps )
+                self.Width = width
+                self.Codec = codec
+                self.Segment = max( 1, segment )
+
+        #Segment list: ( file, last frame ticks, frames ) of the finished segments
+        def ReadList( self ):
+                segments = []
+                try:
+                        with open( self.Base + '.txt' ) as f:
+                                name = None
+                                for line in f:
+                                        m = re.match( r"file '(.+)'", line )
+                                        if m:
+                                                name = m.group( 1 )
+                                                continue
+                                        m = re.match( r'# last ([0-9.]+) frames ([0-9]+)', line )
+                                        if m and name and name.endswith( '.ts' ):
+                                                segments.append( ( name, float( m.group( 1 ) ), int( m.group( 2 ) ) ) )
+                                                name = None
+                except OSError:
+                        pass
+                return segments
+
+        def WriteList( self ):
+                tmpname = self.Base + '.txt.tmp'
+                with open( tmpname, 'w' ) as f:
+                        for name, last, frames in self.Segments:
+                                f.write( "file '{}'\n# last {:.3f} frames {}\n".format( name, last, frames ) )
+                        f.flush()
+                        os.fsync( f.fileno() )
+                os.replace( tmpname, self.Base + '.txt' )
+
+        def Open( self, ticks ):
+                self.Close()
+                self.Day = int( ticks // 86400 )
+                self.Base = os.path.join( self.Directory, strftime( Prefix + '%Y%j', gmtime( ticks ) ) )
+                self.Segments = self.ReadList()
+                self.Done = max( [ s[1] for s in self.Segments ] or [ 0.0 ] )
+                #Segments of a crashed run
+                listed = set( s[0] for s in self.Segments )
+                prefix = os.path.basename( self.Base ) + '_'
+                for name in os.listdir( self.Directory ):
+                        if name.startswith( prefix ) and name.endswith( '.ts' ) and name not in listed:
+                                os.remove( os.path.join( self.Directory, name ) )
+                logging.info( 'Movie %s opened with %i segments', self.Base, len( self.Segments ) )
+                self.Prune()
+                self.CatchUp( ticks )
+
+        #Segments and list of earlier days whose movie is finished
+        def Prune( self ):
+                for listname in glob.glob( os.path.join( self.Directory, Prefix + '???????.txt' ) ):
+                        base = listname[ :-4 ]
+                        if ( base == self.Base ) or not os.path.isfile( base + '.mp4' ):
+                                continue
+                        for name in glob.glob( base + '_*.ts' ):
+                                os.remove( name )
+                        os.remove( listname )
+
+        #Frames archived before ticks but not in a finished segment
+        def CatchUp( self, ticks ):
+                indexfile = os.path.join( self.ArchiveDir, strftime( sdcarchive.Prefix + '%Y%j.idx', gmtime( ticks ) ) )
+                if not os.path.isfile( indexfile ):
+                        return
+                reader = sdcarchive.ArchiveReader( indexfile )
+                entries = [ e for e in reader.Range( self.Done, ticks ) if e.Ticks > self.Done ]
+                if entries:
+                        logging.info( 'Movie catching up %i frames out of the archive', len( entries ) )
+                for entry in entries:
+                        self.Write( entry.Ticks, reader.Read( entry ) )
+                reader.Close()
+
+        def Write( self, ticks, data ):
+                if self.Encoder is None:
+                        name = '{}_{:03d}.ts'.format( os.path.basename( self.Base ), len( self.Segments ) )
+                        self.Encoder = Encoder( os.path.join( self.Directory, name ), self.FPS, self.Width, self.Codec, 'mpegts' )
+                self.Encoder.Write( data )
+                self.Last = ticks
+                self.Frames += 1
+                if self.Encoder.Frames >= self.Segment:
+                        self.CloseSegment()
+
+        #Add the JPEG of an archived frame
+        def Add( self, ticks, data ):
+                if self.Enabled is None:
+                        self.Enabled = shutil.which( 'ffmpeg' ) is not None
+                        if not self.Enabled:
+                                logging.warning( 'Movie off - ffmpeg not found' )
+                if not self.Enabled:
+                        return
+                try:
+                        if int( ticks // 86400 ) != self.Day:
+                                if self.Day is not None:
+                                        self.Finish()
+                                self.Open( ticks )
+                        if ticks > max( self.Done, self.Last ):
+                                self.Write( ticks, data )
+                except OSError as e:
+                        self.Drop( e )
+
+        #ffmpeg gone: the segment is dropped, its frames come again out of the archive with the next Open
+        def Drop( self, error ):
+                self.Failed += 1
+                logging.warning( 'Movie encoder failed: %s', error )
+                if self.Encoder is not None:
+                        self.Encoder.Close()
+                        if os.path.isfile( self.Encoder.Output ):
+                                os.remove( self.Encoder.Output )
+                        self.Encoder = None
+                self.Day = None
+
+        def CloseSegment( self ):
+                if self.Encoder is None:
+                        return
+                encoder = self.Encoder
+                self.Encoder = None
+                if not encoder.Close():
+                        self.Drop( 'segment ' + encoder.Output )
+                        return
+                self.Segments.append( ( os.path.basename( encoder.Output ), self.Last, encoder.Frames ) )
+                self.Done = self.Last
+                self.WriteList()
+
+        #Concatenate the segments into the movie of the day, returns its file name or None
+        #The concat input is always the MPEG-TS segments of the day, so a later run of the day makes the
+        #movie again out of all of them; the segments are removed once the next day is opened.
+        def Finish( self ):
+                if ( not self.Enabled ) or ( self.Day is None ):
+                        return None
+                self.CloseSegment()
+                if not self.Segments:
+                        return None
+                movie = self.Base + '.mp4'
+                tmpname = self.Base + '.tmp.mp4'
+                try:
+                        result = subprocess.run( [ 'ffmpeg', '-hide_banner', '-loglevel', 'error', '-y', '-f', 'concat', '-safe', '0',
+                                                   '-i', self.Base + '.txt', '-c', 'copy', '-movflags', '+faststart', tmpname ],
+                                                 stdout = subprocess.DEVNULL )
+                        if result.returncode != 0:
+                                logging.warning( 'Movie %s not finished, segments kept', movie )
+                                return None
+                        os.replace( tmpname, movie )
+                finally:
+                        if os.path.isfile( tmpname ):
+                                os.remove( tmpname )
+                logging.info( 'Movie %s finished, %i frames', movie, sum( s[2] for s in self.Segments ) )
+                return movie
+
+        #Keep the segment fed so far, the frames of the open segment are not lost
+        def Close( self ):
+                self.CloseSegment()
+
+        def Stats( self ):
+                return { 'movieframes': self.Frames, 'moviesegments': len( self.Segments ), 'moviefailed': self.Failed }
@@ -0,0 +1,124 @@
+#!/usr/bin/python3
+# sdcoverlay.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
+# sdcoverlay.py - Info overlay of the total image
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+from PIL import Image, ImageDraw, ImageColor
+
+#Class GlyphCache - pre-rasterised glyph masks per font and character
+class GlyphCache:
+        def __init__( self ):
+                self.Glyphs = {}
+
+        #Mask, offset to the pen position and advance of one character
+        def Glyph( self, font, char ):
+                key = ( id( font ), char )
+                glyph = self.Glyphs.get( key )
+                if glyph is None:
+                        x0, y0, x1, y1 = font.getbbox( char )
+                        mask = None
+                        if ( x1 > x0 ) and ( y1 > y0 ):
+                                mask = Image.new( 'L', ( x1 - x0, y1 - y0 ), 0 )
+                                ImageDraw.Draw( mask ).text( ( -x0, -y0 ), char, font = font, fill = 255 )
+                        glyph = ( mask, x0, y0, font.getlength( char ) )
+                        self.Glyphs[ key ] = glyph
+                return glyph
+
+        #Draw text onto image by pasting the cached glyph masks
+        def Text( self, image, xy, text, font, fill ):
+                fill = ImageColor.getcolor( fill, image.mode )
+                penx = float( xy[0] )
+                for char in text:
+                        mask, dx, dy, advance = self.Glyph( font, char )
+                        if mask is not None:
+                                image.paste( fill, ( int( round( penx ) ) + dx, int( xy[1] ) + dy ), mask )
+                        penx += advance
+
+#Class Tile - opaque box of the static layer with its static text already drawn
+class Tile:
+        def __init__( self, box, fill, texts ):
+                self.X = int( box[0] )
+                self.Y = int( box[1] )
+                width = int( box[2] ) - self.X + 1
+                height = int( box[3] ) - self.Y + 1
+                self.Image = Image.new( 'RGB', ( width, height ), fill )
+                draw = ImageDraw.Draw( self.Image )
+                for xy, text, font, color in texts:
+                        draw.text( ( xy[0] - self.X, xy[1] - self.Y ), text, font = font, fill = color )
+
+#Class Overlay - info print onto the total image
+#Static layer (brand, name, boxes, labels, today's sunrise/noon/sunset) is rendered once per change,
+#per frame only the tiles are pasted and the changing strings drawn from the glyph cache.
+class Overlay:
+        def __init__( self, fontbrand, fontname, fonttext ):
+                self.FontBrand = fontbrand
+                self.FontName = fontname
+                self.FontText = fonttext
+                self.Glyphs = GlyphCache()
+                self.Key = None
+                self.Tiles = []
+                self.Width = 0
+                self.Height = 0
+
+        #Build the static layer if geometry, station name or the day's times changed
+        def Prepare( self, width, height, name, sunrise, noon, sunset ):
+                key = ( width, height, name, sunrise, noon, sunset )
+                if key == self.Key:
+                        return
+                self.Key = key
+                self.Width = width
+                self.Height = height
+                tiles = []
+                #Brand
+                tiles.append( Tile( ( 0, 0, 95, 14 ), "gray",
+                                    [ ( ( 2, 1 ), 'Sdcam@kepleruhr', self.FontBrand, "white" ) ] ) )
+                #Station name
+                namecent = width / 2
+                namelenpix2 = 52 / 16 * len( name )
+                tiles.append( Tile( ( namecent - namelenpix2 - 15, 2, namecent + namelenpix2 + 15, 20 ), "white",
+                                    [ ( ( namecent - namelenpix2, 5 ), name, self.FontName, "black" ) ] ) )
+                #Noon, Sunrise, Sunset (UTC) on top of the image
+                tiles.append( Tile( ( width - 119, 2, width - 3, 78 ), "white",
+                                    [ ( ( width - 116,  6 ), 'Today locals in UTC:', self.FontText, "black" ),
+                                      ( ( width - 111, 25 ), 'Sunrise  ' + sunrise, self.FontText, "black" ),
+                                      ( ( width - 111, 44 ), 'Noon      ' + noon, self.FontText, "black" ),
+                                      ( ( width - 111, 63 ), 'Sunset   ' + sunset, self.FontText, "black" ) ] ) )
+                #Boxes for capturing time (UTC, EoT, EoL, LAT) and temperatures
+                for x1, x2 in ( ( 2, 160 ), ( 163, 240 ), ( 243, 334 ), ( 337, 494 ) ):
+                        tiles.append( Tile( ( x1, height - 22, x2, height - 3 ), "white", [] ) )
+                tiles.append( Tile( ( width - 269, height - 22, width - 3, height - 3 ), "white",
+                                    [ ( ( width - 265, height - 18 ), 'Temp:', self.FontText, "black" ) ] ) )
+                self.Tiles = tiles
+
+        #Paste the static tiles and draw the changing strings onto out, zoomrect None if not shown
+        def Render( self, out, imgutc, imgeot, imgeol, imglat, outtemp, camtemp, cputemp, zoomrect ):
+                for tile in self.Tiles:
+                        out.paste( tile.Image, ( tile.X, tile.Y ) )
+                width = self.Width
+                texty = self.Height - 18
+                text = self.Glyphs.Text
+                text( out, (   5, texty ), imgutc, self.FontText, "black" )
+                text( out, ( 166, texty ), imgeot, self.FontText, "black" )
+                text( out, ( 246, texty ), imgeol, self.FontText, "black" )
+                text( out, ( 340, texty ), imglat, self.FontText, "black" )
+                text( out, ( width - 223, texty ), 'Out ' + outtemp + '°C', self.FontText, "black" )
+                text( out, ( width - 153, texty ), 'Case ' + camtemp + '°C', self.FontText, "black" )
+                text( out, ( width -  75, texty ), 'CPU ' + cputemp + '°C', self.FontText, "black" )
+                #Zoom window as outline only
+                if zoomrect is not None:
+                        ImageDraw.Draw( out ).rectangle( zoomrect, outline = "white" )
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# sdcpipe.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
+# sdcpipe.py - Pipelined capture / process / upload stages
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import time, threading, logging, collections
+
+#Class DropQueue - bounded queue, a full queue drops its oldest item so the producer never waits
+class DropQueue:
+        def __init__( self, depth ):
+                self.Depth = max( 1, int( depth ) )
+                self.Items = collections.deque()
+                self.Cond = threading.Condition()
+                self.Dropped = 0
+
+        #Append item, returns the dropped item or None
+        def Put( self, item ):
+                dropped = None
+                with self.Cond:
+                        if len( self.Items ) >= self.Depth:
+                                dropped = self.Items.popleft()
+                                self.Dropped += 1
+                        self.Items.append( item )
+                        self.Cond.notify()
+                return dropped
+
+        #Oldest item, waits up to timeout seconds ( None = forever ), returns None on timeout
+        def Get( self, timeout = None ):
+                with self.Cond:
+                        if not self.Items:
+                                self.Cond.wait( timeout )
+                        if not self.Items:
+                                return None
+                        return self.Items.popleft()
+
+        def Len( self ):
+                return len( self.Items )
+
+#Class Stage - one pipeline stage, running func on its own worker thread or inline
+class Stage:
+        def __init__( self, name, func, depth, threaded ):
+                self.Name = name
+                self.Func = func
+                self.Queue = DropQueue( depth )
+                self.Next = None
+                self.Threaded = threaded
+                self.Busy = 0
+                self.LatencyS = 0.0
+                self.LatencyMaxS = 0.0
+                self.Count = 0
+                self.Errors = 0
+                self.Running = 0
+                self.Thread = None
+                self.Monitors = []
+
+        def Start( self ):
+                if not self.Threaded:
+                        return
+                self.Running = 1
+                self.Thread = threading.Thread( target = self.Loop, name = 'sdc-' + self.Name, daemon = True )
+                self.Thread.start()
+
+        def Submit( self, item ):
+                if not self.Threaded:
+                        self.Execute( item )
+                        return
+                dropped = self.Queue.Put( item )
+                if dropped is not None:
+                        logging.warning( 'Pipeline %s queue full - dropped oldest frame', self.Name )
+
+        #Run func on item, hand the result to the next stage
+        def Execute( self, item ):
+                self.Busy = 1
+                start = time.monotonic()
+                for monitor in self.Monitors:
+                        monitor.Begin( self.Name )
+                try:
+                        result = self.Func( item )
+                except Exception as e:
+                        self.Errors += 1
+                        result = None
+                        logging.exception( 'Pipeline %s failed: %s', self.Name, e )
+                for monitor in self.Monitors:
+                        monitor.End( self.Name )
+                self.LatencyS = time.monotonic() - start
+                self.LatencyMaxS = max( self.LatencyMaxS, self.LatencyS )
+                self.Count += 1
+                self.Busy = 0
+                if ( result is not None ) and ( self.Next is not None ):
+                        self.Next.Submit( result )
+
+        def Loop( self ):
+                while self.Running or self.Queue.Len():
+                        item = self.Queue.Get( 0.5 )
+                        if item is not None:
+                                self.Execute( item )
+
+        #Let the worker finish the queued items, at most timeout seconds
+        def Stop( self, timeout ):
+                self.Running = 0
+                if self.Thread is not None:
+                        self.Thread.join( timeout )
+
+#Class Pipeline - chain of stages fed by the capture loop
+class Pipeline:
+        def __init__( self, threaded, depth ):
+                self.Threaded = threaded
+                self.Depth = depth
+                self.Stages = []
+                self.CaptureS = 0.0
+
+        #Monitor with Begin( stage ) / End( stage ) around every stage run, e.g. the memory report or the latencies
+        def AddMonitor( self, monitor ):
+                for stage in self.Stages:
+                        stage.Monitors.append( monitor )
+
+        def AddStage( self, name, func ):
+                stage = Stage( name, func, self.Depth, self.Threaded )
+                if self.Stages:
+                        self.Stages[-1].Next = stage
+                self.Stages.append( stage )
+                return stage
+
+        def Start( self ):
+                for stage in self.Stages:
+                        stage.Start()
+
+        def Submit( self, item ):
+                self.Stages[0].Submit( item )
+
+        #Stop stages in order, so each one can still hand over to the next
+        def Stop( self, timeout ):
+                for stage in self.Stages:
+                        stage.Stop( timeout )
+
+        #Queue depths and stage latencies for the status output
+        def Stats( self ):
+                stats = { 'capturems': int( self.CaptureS * 1000 ) }
+                for stage in self.Stages:
+                        stats[ stage.Name + 'queue' ] = stage.Queue.Len() + stage.Busy
+                        stats[ stage.Name + 'ms' ] = int( stage.LatencyS * 1000 )
+                        stats[ stage.Name + 'maxms' ] = int( stage.LatencyMaxS * 1000 )
+                        stats[ stage.Name + 'dropped' ] = stage.Queue.Dropped
+                return stats
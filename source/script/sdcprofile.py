@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+# sdcprofile.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcpipe.py - Capture, processing and upload pipeline
+# sdcprofile.py - Remote triggered profiling session
+# sdcprofileNNN.txt - Result of profiling session NNN, uploaded via FTP or REST
+# remotecmd.cfg - Containing remote commands parameter
+#
+# History see Mainmodule
+
+import os, io, glob, time, cProfile, pstats, tracemalloc, threading, logging
+from time import gmtime, strftime
+
+Prefix = 'sdcprofile'
+
+#Class Profiler - cProfile and tracemalloc for a number of cycles, started by the remote command profile
+#The session id of the command has to change for a new session, a session done stays done after a restart
+#since its result file is kept. Off, Begin / End test one attribute only: no profiler, no tracing.
+#Each thread gets its own cProfile, enabled around the capture cycle and the pipeline stages; from python 3.12
+#on only one profiler can run at a time, a stage overlapping another one is not profiled then.
+class Profiler:
+        MaxCycles = 100
+        TopFunctions = 40
+        TopAllocations = 25
+
+        def __init__( self, directory ):
+                self.Directory = directory
+                self.Active = 0
+                self.Session = 0
+                self.Cycles = 0
+                self.Left = 0
+                self.Profiles = {}
+                self.Lock = threading.Lock()
+                self.Tracing = 0
+                self.Start = 0.0
+                self.Finishing = 0
+                self.Skipped = 0
+                self.Result = None
+
+        def FileName( self, session ):
+                return os.path.join( self.Directory, '{}{}.txt'.format( Prefix, session ) )
+
+        #Remote command: session id ( 0 = none ) and cycles, a new id starts a session
+        def Request( self, session, cycles ):
+                if ( session <= 0 ) or ( session == self.Session ) or self.Active or self.Finishing:
+                        return
+                self.Session = session
+                if os.path.isfile( self.FileName( session ) ):
+                        return
+                for filename in glob.glob( os.path.join( self.Directory, Prefix + '*.txt' ) ):
+                        os.remove( filename )
+                self.Cycles = min( max( 1, cycles ), self.MaxCycles )
+                self.Left = self.Cycles
+                self.Profiles = {}
+                self.Skipped = 0
+                self.Tracing = 0
+                if not tracemalloc.is_tracing():
+                        tracemalloc.start()
+                        self.Tracing = 1
+                self.Start = time.time()
+                self.Active = 1
+                logging.info( 'Profiling session %i for %i cycles', session, self.Cycles )
+
+        def Begin( self, stage ):
+                if not self.Active:
+                        return
+                name = threading.current_thread().name
+                with self.Lock:
+                        if not self.Active:
+                                return
+                        entry = self.Profiles.get( name )
+                        if entry is None:
+                                entry = self.Profiles[ name ] = [ cProfile.Profile(), 0 ]
+                        try:
+                                entry[0].enable()
+                                entry[1] = 1
+                        except ValueError:
+                                self.Skipped += 1
+
+        def End( self, stage ):
+                if not ( self.Active or self.Finishing ):
+                        return
+                entry = self.Profiles.get( threading.current_thread().name )
+                if ( entry is not None ) and entry[1]:
+                        entry[0].disable()
+                        entry[1] = 0
+
+        #End of a capture cycle: counts down, the result is written once no stage is profiled anymore
+        def Cycle( self ):
+                if self.Active:
+                        self.Left -= 1
+                        if self.Left > 0:
+                                return
+                        self.Active = 0
+                        self.Finishing = 1
+                if self.Finishing:
+                        with self.Lock:
+                                if any( entry[1] for entry in self.Profiles.values() ):
+                                        return
+                        self.Finishing = 0
+                        self.Finish()
+
+        def Finish( self ):
+                #Allocations alive at the end, taken before the stats are built; the peak is the one since tracing started
+                snapshot = None
+                if tracemalloc.is_tracing():
+                        current, peak = tracemalloc.get_traced_memory()
+                        snapshot = tracemalloc.take_snapshot().filter_traces( (
+                                tracemalloc.Filter( False, tracemalloc.__file__ ),
+                                tracemalloc.Filter( False, cProfile.__file__ ),
+                                tracemalloc.Filter( False, __file__ ),
+                                tracemalloc.Filter( False, '<frozen importlib._bootstrap>' ),
+                                tracemalloc.Filter( False, '<unknown>' ) ) )
+                        if self.Tracing:
+                                tracemalloc.stop()
+                self.Tracing = 0
+                out = io.StringIO()
+                out.write( 'Profiling session {} of {} cycles, {} to {} UTC\n'.format( self.Session, self.Cycles,
+                           strftime( '%d-%b-%Y %H:%M:%S', gmtime( self.Start ) ), strftime( '%H:%M:%S', gmtime() ) ) )
+                out.write( 'Threads: {}, stages not profiled: {}\n\n'.format( ', '.join( sorted( self.Profiles ) ), self.Skipped ) )
+                stats = None
+                for entry in self.Profiles.values():
+                        entry[0].create_stats()
+                        if not entry[0].stats:
+                                continue
+                        if stats is None:
+                                stats = pstats.Stats( entry[0], stream = out )
+                        else:
+                                stats.add( entry[0] )
+                if stats is not None:
+                        stats.strip_dirs().sort_stats( 'cumulative' ).print_stats( self.TopFunctions )
+                        stats.sort_stats( 'tottime' ).print_stats( self.TopFunctions // 2 )
+                self.Profiles = {}
+                if snapshot is not None:
+                        out.write( 'Python allocations: current {:.1f} MB peak {:.1f} MB, top {} lines\n'.format(
+                                   current / 1048576.0, peak / 1048576.0, self.TopAllocations ) )
+                        for stat in snapshot.statistics( 'lineno' )[ :self.TopAllocations ]:
+                                out.write( '  {}\n'.format( stat ) )
+                else:
+                        out.write( 'Python allocations: tracemalloc stopped during the session\n' )
+                data = out.getvalue().encode( 'utf-8' )
+                filename = self.FileName( self.Session )
+                tmpname = filename + '.tmp'
+                with open( tmpname, 'wb' ) as f:
+                        f.write( data )
+                os.replace( tmpname, filename )
+                self.Result = ( os.path.basename( filename ), data )
+                logging.info( 'Profiling session %i written to %s', self.Session, filename )
+
+        #Result waiting for the upload: ( file name, bytes ) or None, kept until Sent
+        def Ready( self ):
+                return self.Result
+
+        def Sent( self ):
+                self.Result = None
+
+        def Stats( self ):
+                return { 'profilesession': self.Session, 'profileleft': self.Left if self.Active else 0,
+                         'profilepending': int( self.Result is not None ) }
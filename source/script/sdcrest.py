@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+# sdcrest.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdcrest.py - REST push client
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import json, uuid, base64, logging
+import requests
+from requests.adapters import HTTPAdapter
+
+#Push not delivered: connection, timeout or HTTP error status, worth spooling
+TransportError = requests.exceptions.RequestException
+
+#Push accepted by the server but its answer unreadable, not to be sent again
+class ResponseError( Exception ):
+        pass
+
+#JSON object as chunks out of ( key, value ) fields, a value given as bytes is taken as JSON encoded already
+#( the status of the publisher, base64 images ) and embedded as it is, without a parse and dump again
+def JSONChunks( fields ):
+        chunks = [ b'{' ]
+        for key, value in fields:
+                if len( chunks ) > 1:
+                        chunks.append( b', ' )
+                chunks.append( json.dumps( key ).encode( 'utf-8' ) + b': ' )
+                chunks.append( value if isinstance( value, bytes ) else json.dumps( value ).encode( 'utf-8' ) )
+        chunks.append( b'}' )
+        return chunks
+
+def ComposeJSON( fields ):
+        return b''.join( JSONChunks( fields ) )
+
+#Binary data as JSON string value, base64 encoded
+def Base64JSON( data ):
+        return b'"' + base64.b64encode( data ) + b'"'
+
+#Class ChunkBody - request body read chunk by chunk, the chunks are not joined to one copy
+#Rewindable: requests seeks back to the start for a redirect, the body is sent again in full then.
+class ChunkBody:
+        BlockSize = 65536
+
+        def __init__( self, chunks ):
+                self.Chunks = chunks
+                self.Length = sum( len( chunk ) for chunk in chunks )
+                self.Position = 0
+                self.Index = 0
+                self.Offset = 0
+
+        def __len__( self ):
+                return self.Length
+
+        def __iter__( self ):
+                while True:
+                        data = self.read( self.BlockSize )
+                        if not data:
+                                return
+                        yield data
+
+        def tell( self ):
+                return self.Position
+
+        def seek( self, offset, whence = 0 ):
+                if whence == 1:
+                        offset += self.Position
+                elif whence == 2:
+                        offset += self.Length
+                self.Position = min( max( offset, 0 ), self.Length )
+                self.Index = 0
+                self.Offset = self.Position
+                while ( self.Index < len( self.Chunks ) ) and ( self.Offset >= len( self.Chunks[ self.Index ] ) ):
+                        self.Offset -= len( self.Chunks[ self.Index ] )
+                        self.Index += 1
+                return self.Position
+
+        def read( self, size = -1 ):
+                if ( size is None ) or ( size < 0 ):
+                        size = self.Length - self.Position
+                out = []
+                while ( size > 0 ) and ( self.Index < len( self.Chunks ) ):
+                        chunk = self.Chunks[ self.Index ]
+                        data = chunk[ self.Offset:self.Offset + size ]
+                        out.append( data )
+                        size -= len( data )
+                        self.Offset += len( data )
+                        self.Position += len( data )
+                        if self.Offset >= len( chunk ):
+                                self.Index += 1
+                                self.Offset = 0
+                return b''.join( out )
+
+#Class MultipartBody - multipart/form-data body, parts as ( name, filename, content type, bytes )
+class MultipartBody( ChunkBody ):
+        def __init__( self, parts ):
+                self.Boundary = uuid.uuid4().hex
+                chunks = []
+                for name, filename, ctype, data in parts:
+                        head = '--' + self.Boundary + '\r\nContent-Disposition: form-data; name="' + name + '"'
+                        if filename:
+                                head += '; filename="' + filename + '"'
+                        head += '\r\nContent-Type: ' + ctype + '\r\n\r\n'
+                        chunks.append( head.encode( 'utf-8' ) )
+                        chunks.append( data )
+                        chunks.append( b'\r\n' )
+                chunks.append( ( '--' + self.Boundary + '--\r\n' ).encode( 'utf-8' ) )
+                ChunkBody.__init__( self, chunks )
+
+        def ContentType( self ):
+                return 'multipart/form-data; boundary=' + self.Boundary
+
+#Class RestClient - push to the earth-lat server on a pooled keep-alive session
+#'json' is the base64 JSON push the server takes today ( default ),
+#'multipart' sends the images as binary parts next to a small JSON part, opt-in once the server has PushMultipart.
+class RestClient:
+        ConnectTimeoutS = 5
+        ReadTimeoutS = 30
+        FallbackStatus = ( 404, 405, 415 )
+
+        def __init__( self, mode ):
+                self.Mode = mode
+                self.Configured = mode
+                self.Session = requests.Session()
+                self.Session.mount( 'https://', HTTPAdapter( pool_connections = 1, pool_maxsize = 2 ) )
+                self.Session.mount( 'http://', HTTPAdapter( pool_connections = 1, pool_maxsize = 2 ) )
+
+        #Mode out of station.cfg, a fallback to JSON holds until the configured mode changes
+        def SetMode( self, mode ):
+                if ( mode != self.Configured ) and ( mode in ( 'multipart', 'json' ) ):
+                        self.Configured = mode
+                        self.Mode = mode
+
+        #Push station data, status and images ( None = not sent ), returns the response 'value'
+        #data as dict or as ( key, value ) fields for JSONChunks, further files as ( name, filename, content type, bytes )
+        def Push( self, apiurl, apikey, stationid, data, imgtotal, imgdetail, files = () ):
+                headers = { 'x-functions-key': apikey }
+                fields = list( data.items() ) if isinstance( data, dict ) else list( data )
+                timeout = ( self.ConnectTimeoutS, self.ReadTimeoutS )
+                if self.Mode == 'multipart':
+                        parts = [ ( 'data', '', 'application/json', ComposeJSON( fields ) ) ]
+                        if imgtotal is not None:
+                                parts.append( ( 'imgTotal', 'imgtotal.jpg', 'image/jpeg', imgtotal ) )
+                        if imgdetail is not None:
+                                parts.append( ( 'imgDetail', 'imgdetail.jpg', 'image/jpeg', imgdetail ) )
+                        parts.extend( files )
+                        body = MultipartBody( parts )
+                        bodyheaders = dict( headers )
+                        bodyheaders[ 'Content-Type' ] = body.ContentType()
+                        route = apiurl + '%s/PushMultipart' % stationid
+                        response = self.Session.post( route, data = body, headers = bodyheaders, timeout = timeout )
+                        if response.status_code not in self.FallbackStatus:
+                                response.raise_for_status()
+                                return self.Value( response )
+                        logging.warning( 'REST server without multipart push (%i) - falling back to JSON', response.status_code )
+                        self.Mode = 'json'
+                if imgtotal is not None:
+                        fields.append( ( 'imgTotal', Base64JSON( imgtotal ) ) )
+                if imgdetail is not None:
+                        fields.append( ( 'imgDetail', Base64JSON( imgdetail ) ) )
+                for name, filename, ctype, filedata in files:
+                        fields.append( ( name, Base64JSON( filedata ) ) )
+                body = ChunkBody( JSONChunks( fields ) )
+                bodyheaders = dict( headers )
+                bodyheaders[ 'Content-Type' ] = 'application/json'
+                route = apiurl + '%s/Push' % stationid
+                response = self.Session.post( route, data = body, headers = bodyheaders, timeout = timeout )
+                response.raise_for_status()
+                return self.Value( response )
+
+        #'value' of the JSON answer, ResponseError if there is none
+        @staticmethod
+        def Value( response ):
+                try:
+                        return response.json()[ 'value' ]
+                except ( ValueError, KeyError, TypeError ) as e:
+                        raise ResponseError( 'bad response body: %s' % e )
+
+        def Close( self ):
+                self.Session.close()
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+# sdcsched.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
+# sdcsched.py - Capture slot scheduler
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import math, threading, logging
+from sdccam import SysClock
+
+#Class SlotScheduler - capture slots on the wall clock grid ( hh:mm:00, hh:mm:30, ... )
+#Waits in the kernel on a monotonic deadline, no busy loop and no drift from relative sleeps.
+#The deadline is checked against the wall clock every ChunkS, so an NTP step moves it to the new time.
+class SlotScheduler:
+        ChunkS = 30.0
+        StepS = 0.5
+
+        def __init__( self ):
+                self.Event = threading.Event()
+                self.SlotTicks = 0.0
+                self.LastSlot = 0.0
+                self.Offset = self.ClockOffset()
+                self.Count = 0
+                self.JitterS = 0.0
+                self.JitterMaxS = 0.0
+                self.JitterSumS = 0.0
+                self.Missed = 0
+                self.Steps = 0
+
+        #Wall clock minus monotonic clock, changes on an NTP step only
+        def ClockOffset( self ):
+                return SysClock.Time() - SysClock.Monotonic()
+
+        #Next slot on the slots grid at least periods after the last one, or the next one ahead
+        #of now + lead if the cycle overran
+        def Plan( self, periods, slots, lead ):
+                now = SysClock.Time()
+                earliest = now + lead
+                slot = earliest
+                if self.LastSlot:
+                        slot = max( self.LastSlot + periods - 0.5, earliest )
+                        if self.LastSlot + periods < earliest:
+                                self.Missed += 1
+                                logging.warning( 'Capture slot missed - cycle overran by %.1f sec', earliest - self.LastSlot - periods )
+                self.SlotTicks = math.ceil( slot / slots ) * slots
+                return self.SlotTicks
+
+        #Sleep until lead seconds before the planned slot
+        def Approach( self, lead ):
+                target = self.SlotTicks - lead
+                while True:
+                        offset = self.ClockOffset()
+                        if abs( offset - self.Offset ) > self.StepS:
+                                self.Steps += 1
+                                logging.warning( 'Clock stepped by %.1f sec - slot deadline moved', offset - self.Offset )
+                                self.Offset = offset
+                        #Absolute monotonic deadline of the wall clock target
+                        remain = target - offset - SysClock.Monotonic()
+                        if remain <= 0:
+                                break
+                        if SysClock.Wait( self.Event, min( remain, self.ChunkS ) ):
+                                self.Event.clear()
+                                break
+                return target
+
+        #Sleep until lead seconds before the planned slot and record the jitter, returns the slot ticks
+        def Wait( self, lead ):
+                target = self.Approach( lead )
+                self.Record( SysClock.Time() - target )
+                self.LastSlot = self.SlotTicks
+                return self.SlotTicks
+
+        def Record( self, late ):
+                self.Count += 1
+                self.JitterS = late
+                self.JitterMaxS = max( self.JitterMaxS, abs( late ) )
+                self.JitterSumS += abs( late )
+
+        #Slot timing for the status output
+        def Stats( self ):
+                return { 'slotjitterms': int( self.JitterS * 1000 ),
+                         'slotjittermaxms': int( self.JitterMaxS * 1000 ),
+                         'slotjittermeanms': int( self.JitterSumS / max( self.Count, 1 ) * 1000 ),
+                         'slotmissed': self.Missed,
+                         'clocksteps': self.Steps }
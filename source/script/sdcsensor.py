@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+# sdcsensor.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcsensor.py - Background sampler of the temperature sensors
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import os, glob, time, threading, logging, collections
+
+#Thermal zone of the CPU in sysfs, millidegrees; None if there is none
+def ThermalZone():
+        zones = sorted( glob.glob( '/sys/class/thermal/thermal_zone*' ) )
+        for zone in zones:
+                try:
+                        with open( zone + '/type' ) as f:
+                                if 'cpu' in f.read().lower():
+                                        return zone + '/temp'
+                except OSError:
+                        pass
+        if zones:
+                return zones[0] + '/temp'
+        return None
+
+#Class Channel - one temperature with its filter, the latest reading is a ( value, monotonic ticks ) tuple
+#replaced as a whole, so readers need no lock.
+#Rejected: 85.0 ( DS18B20 power-on value ), out of the sensor range, or a jump of more than OutlierC
+#against the median of the last readings unless it persists for Confirm readings.
+class Channel:
+        OutlierC = 10.0
+        Confirm = 3
+        MinC = -55.0
+        MaxC = 125.0
+
+        def __init__( self, name, read ):
+                self.Name = name
+                self.Read = read
+                self.History = collections.deque( maxlen = 5 )
+                self.Latest = None
+                self.Suspect = 0
+                self.Rejected = 0
+                self.Errors = 0
+
+        def Accept( self, value ):
+                if ( value == 85.0 ) or not ( self.MinC <= value <= self.MaxC ):
+                        return 0
+                if len( self.History ) >= 3:
+                        median = sorted( self.History )[ len( self.History ) // 2 ]
+                        if abs( value - median ) > self.OutlierC:
+                                self.Suspect += 1
+                                if self.Suspect < self.Confirm:
+                                        return 0
+                                self.History.clear()
+                self.Suspect = 0
+                return 1
+
+        def Sample( self ):
+                try:
+                        value = float( self.Read() )
+                except Exception as e:
+                        self.Errors += 1
+                        logging.debug( 'Sensor %s not read: %s', self.Name, e )
+                        return
+                if not self.Accept( value ):
+                        self.Rejected += 1
+                        logging.debug( 'Sensor %s reading %.1f rejected', self.Name, value )
+                        return
+                self.History.append( value )
+                self.Latest = ( value, time.monotonic() )
+
+#Class SensorSampler - W1 thermometers and CPU temperature sampled every PeriodS on its own thread
+#One W1 sensor is the case, two are outside ( first ) and case ( second ) as before.
+class SensorSampler:
+        def __init__( self, w1sensors, periods, metrics ):
+                self.PeriodS = max( 1, periods )
+                self.Channels = {}
+                zone = ThermalZone()
+                if zone is not None:
+                        self.Add( 'cpu', lambda: self.ReadZone( zone ) )
+                if len( w1sensors ) == 1:
+                        self.Add( 'cam', w1sensors[0].get_temperature )
+                elif len( w1sensors ) >= 2:
+                        self.Add( 'out', w1sensors[0].get_temperature )
+                        self.Add( 'cam', w1sensors[1].get_temperature )
+                self.Stop = threading.Event()
+                self.Thread = None
+                self.Metrics = metrics
+
+        def Add( self, name, read ):
+                self.Channels[ name ] = Channel( name, read )
+
+        #Period out of station.cfg after a reload, taken by the next wait of the loop
+        def SetPeriod( self, periods ):
+                self.PeriodS = max( 1, periods )
+
+        @staticmethod
+        def ReadZone( zone ):
+                with open( zone ) as f:
+                        return int( f.read() ) / 1000.0
+
+        def SampleAll( self ):
+                start = time.monotonic()
+                for channel in list( self.Channels.values() ):
+                        channel.Sample()
+                self.Metrics.Since( 'sensor', start )
+
+        def Loop( self ):
+                while not self.Stop.is_set():
+                        start = time.monotonic()
+                        self.SampleAll()
+                        self.Stop.wait( max( self.PeriodS - ( time.monotonic() - start ), 0.1 ) )
+
+        #First readings before the loop starts, then in the background
+        def Start( self ):
+                self.SampleAll()
+                self.Thread = threading.Thread( target = self.Loop, name = 'sdc-sensors', daemon = True )
+                self.Thread.start()
+
+        def Close( self ):
+                self.Stop.set()
+                if self.Thread is not None:
+                        self.Thread.join( 5 )
+
+        #Latest value and its age in seconds, None if never read
+        def Get( self, name ):
+                channel = self.Channels.get( name )
+                if ( channel is None ) or ( channel.Latest is None ):
+                        return None
+                value, ticks = channel.Latest
+                return value, time.monotonic() - ticks
+
+        #Status text: value with one decimal, 'TT.T' if missing or older than three periods, default if no such sensor
+        def Text( self, name, default ):
+                if name not in self.Channels:
+                        return default
+                reading = self.Get( name )
+                if ( reading is None ) or ( reading[1] > 3 * self.PeriodS ):
+                        return 'TT.T'
+                return '%.1f' % reading[0]
+
+        def Stats( self ):
+                ages = [ self.Get( name ) for name in self.Channels ]
+                return { 'sensorrejected': sum( c.Rejected for c in self.Channels.values() ),
+                         'sensorerrors': sum( c.Errors for c in self.Channels.values() ),
+                         'sensoragemaxs': int( max( [ a[1] for a in ages if a is not None ] or [ 0 ] ) ) }
@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+# sdcsky.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdccam.py - Camera backends and station clock
+# sdcsky.py - Sky and brightness classifier
+# station.cfg - Containing working parameter
+#
+# History see Mainmodule
+#
+# Batch mode re-classifies an archived series with the thresholds of station.cfg, to tune them per station:
+#   sdcsky.py -a /path/to/archive -c station.cfg -o sky.csv
+
+import sys, time, bisect, getopt
+import numpy
+from PIL import Image
+from time import gmtime, strftime
+
+#Class Hysteresis - two threshold switch: on above High, off at or below Low, kept in between
+#High <= 0 disables the switch, it stays on.
+class Hysteresis:
+        def __init__( self, low, high, state = 0 ):
+                self.Low = low
+                self.High = high
+                self.State = state
+
+        def Set( self, low, high ):
+                self.Low = min( low, high )
+                self.High = high
+
+        def Update( self, value ):
+                if self.High <= 0:
+                        self.State = 1
+                elif value > self.High:
+                        self.State = 1
+                elif value <= self.Low:
+                        self.State = 0
+                return self.State
+
+#Class SkyStats - statistics of one thumbnail
+class SkyStats:
+        __slots__ = ( 'Lum', 'LumLow', 'LumHigh', 'Hist', 'Contrast', 'Saturation' )
+
+        def __init__( self ):
+                self.Lum = 0.0
+                self.LumLow = 0.0
+                self.LumHigh = 0.0
+                self.Hist = None
+                self.Contrast = 0.0
+                self.Saturation = 0.0
+
+#Class SkyClassifier - Night / Cloudy / Sunny out of the exposure brightness and a thumbnail of the crop
+#Day and sun brightness as before ( 1e9 / exposure / gain ), sunny additionally needs the shadow
+#contrast in the dial ( zoom ) region and the colour saturation, each switch with its own hysteresis.
+class SkyClassifier:
+        ThumbWidth = 128
+
+        def __init__( self ):
+                self.Day = Hysteresis( 3100, 3500 )
+                self.SunBright = Hysteresis( 260000, 300000 )
+                self.Shadow = Hysteresis( 0, 0, 1 )
+                self.Colour = Hysteresis( 0, 0, 1 )
+                self.Last = SkyStats()
+                self.LastS = 0.0
+
+        #Thresholds out of station.cfg
+        def Configure( self, run ):
+                self.Day.Set( run.SkyBrightNight, run.SkyBrightDay )
+                self.SunBright.Set( run.SkyBrightSunLow, run.SkyBrightSunHigh )
+                self.Shadow.Set( run.SkyContrastLow, run.SkyContrastHigh )
+                self.Colour.Set( run.SkySatLow, run.SkySatHigh )
+
+        #Statistics of the box ( None = whole image ) out of a thumbnail, dialbox relative to the box
+        def Measure( self, image, box, dialbox ):
+                start = time.perf_counter()
+                if box is None:
+                        box = ( 0, 0 ) + image.size
+                bw = max( box[2] - box[0], 1 )
+                bh = max( box[3] - box[1], 1 )
+                size = ( self.ThumbWidth, max( 8, int( round( self.ThumbWidth * bh / bw ) ) ) )
+                thumb = image.resize( size, Image.BOX, box = box, reducing_gap = 2.0 )
+                if thumb.mode != 'RGB':
+                        thumb = thumb.convert( 'RGB' )
+                rgb = numpy.asarray( thumb, dtype = numpy.float32 )
+                lum = rgb[ :, :, 0 ] * 0.299 + rgb[ :, :, 1 ] * 0.587 + rgb[ :, :, 2 ] * 0.114
+                stats = SkyStats()
+                stats.Lum = float( lum.mean() )
+                stats.Hist = numpy.bincount( numpy.minimum( lum, 255 ).astype( numpy.int32 ).ravel() // 16, minlength = 16 )
+                stats.LumLow, stats.LumHigh = [ float( v ) for v in numpy.percentile( lum, ( 5, 95 ) ) ]
+                #Shadow contrast: spread of the luminance in the dial region
+                sx = size[0] / bw
+                sy = size[1] / bh
+                x1 = min( max( int( dialbox[0] * sx ), 0 ), size[0] - 1 )
+                y1 = min( max( int( dialbox[1] * sy ), 0 ), size[1] - 1 )
+                x2 = max( min( int( dialbox[2] * sx + 0.999 ), size[0] ), x1 + 1 )
+                y2 = max( min( int( dialbox[3] * sy + 0.999 ), size[1] ), y1 + 1 )
+                low, high = numpy.percentile( lum[ y1:y2, x1:x2 ], ( 5, 95 ) )
+                stats.Contrast = float( high - low )
+                #Saturation in percent, grey sky is low, sunlit colours high
+                top = rgb.max( axis = 2 )
+                stats.Saturation = float( ( ( top - rgb.min( axis = 2 ) ) / numpy.maximum( top, 1.0 ) ).mean() * 100.0 )
+                self.Last = stats
+                self.LastS = time.perf_counter() - start
+                return stats
+
+        #Night, cloudy, sunny out of the exposure brightness and the thumbnail statistics
+        def Classify( self, bright, stats ):
+                day = self.Day.Update( bright )
+                sun = self.SunBright.Update( bright )
+                shadow = self.Shadow.Update( stats.Contrast )
+                colour = self.Colour.Update( stats.Saturation )
+                sunny = day and sun and shadow and colour
+                return int( not day ), int( day and not sunny ), int( sunny )
+
+        def Stats( self ):
+                return { 'skyms': round( self.LastS * 1000, 1 ),
+                         'skylum': int( self.Last.Lum ),
+                         'skycontrast': int( self.Last.Contrast ),
+                         'skysaturation': int( self.Last.Saturation ) }
+
+#Re-classify an archived series: the archived images are the total web images, so the crop is the whole image
+def Batch( path, cfgfile, camsize, output ):
+        import sdcfun, sdccam
+        cam = sdcfun.Cam( camsize[0], camsize[1] )
+        run = sdcfun.GetParameter( cfgfile, cam )
+        cam.AdjustParameterset()
+        replay = sdccam.ReplayCamBackend( path )
+        sky = SkyClassifier()
+        sky.Configure( run )
+        counts = [ 0, 0, 0 ]
+        contrast = { 0: [], 1: [] }
+        saturation = { 0: [], 1: [] }
+        start = time.perf_counter()
+        with open( output, 'w' ) as out:
+                out.write( 'utc; brightness; lum; lumlow; lumhigh; contrast; saturation; night; cloudy; sunny\n' )
+                for index, ticks in enumerate( replay.Ticks ):
+                        bright = replay.DefaultBright
+                        if replay.Bright:
+                                bright = replay.Bright[ max( 0, bisect.bisect_right( replay.BrightTicks, ticks ) - 1 ) ]
+                        with replay.OpenFrame( index ) as im:
+                                im.draft( 'RGB', ( im.size[0] // 2, im.size[1] // 2 ) )
+                                scale = im.size[0] / float( cam.CropWebWidth )
+                                dialbox = [ int( v * scale ) for v in ( cam.ZoomX1w, cam.ZoomY1w, cam.ZoomX2w, cam.ZoomY2w ) ]
+                                stats = sky.Measure( im, None, dialbox )
+                        night, cloudy, sunny = sky.Classify( bright, stats )
+                        counts[ 0 if night else ( 1 if cloudy else 2 ) ] += 1
+                        if not night:
+                                contrast[ sky.SunBright.State ].append( stats.Contrast )
+                                saturation[ sky.SunBright.State ].append( stats.Saturation )
+                        out.write( '{}; {}; {:.1f}; {:.1f}; {:.1f}; {:.1f}; {:.1f}; {}; {}; {}\n'.format(
+                                   strftime( '%d-%b-%Y %H:%M:%S', gmtime( ticks ) ), bright, stats.Lum, stats.LumLow, stats.LumHigh,
+                                   stats.Contrast, stats.Saturation, night, cloudy, sunny ) )
+        frames = len( replay.Files )
+        print( 'Classified {} frames in {:.1f} ms/frame: night {} cloudy {} sunny {}'.format(
+               frames, ( time.perf_counter() - start ) / max( frames, 1 ) * 1000, counts[0], counts[1], counts[2] ) )
+        #Hints for the thresholds: sunny by brightness against cloudy by brightness
+        for name, values in ( ( 'contrast', contrast ), ( 'saturation', saturation ) ):
+                for state, label in ( ( 1, 'sun bright' ), ( 0, 'cloudy bright' ) ):
+                        if values[ state ]:
+                                p = numpy.percentile( values[ state ], ( 10, 50, 90 ) )
+                                print( '  {:10s} {:13s} p10 {:6.1f}  p50 {:6.1f}  p90 {:6.1f}'.format( name, label, p[0], p[1], p[2] ) )
+
+def main( argv ):
+        path = '.'
+        cfgfile = 'station.cfg'
+        output = 'sdcsky.csv'
+        camsize = ( 2592, 1944 )
+        try:
+                opts, args = getopt.getopt( argv, "a:c:o:w:", ["archive=", "config=", "output=", "camsize="] )
+                for opt, arg in opts:
+                        if opt in ( '-a', '--archive' ):
+                                path = arg
+                        elif opt in ( '-c', '--config' ):
+                                cfgfile = arg
+                        elif opt in ( '-o', '--output' ):
+                                output = arg
+                        elif opt in ( '-w', '--camsize' ):
+                                camsize = tuple( int( v ) for v in arg.split( 'x' ) )
+        except ( getopt.GetoptError, ValueError ):
+                print( 'sdcsky.py -a <archive directory> -c <station.cfg> -o <csv file> -w <camera width>x<height>' )
+                exit( 2 )
+        Batch( path, cfgfile, camsize, output )
+
+if __name__ == "__main__":
+        main( sys.argv[1:] )
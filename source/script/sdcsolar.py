@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+# sdcsolar.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdcsolar.py - Solar position out of Chebyshev tables
+# sdcsolargen.py - Generator, validation and benchmark of the solar tables
+# sdcsolar.json - Chebyshev tables of EoT and declination
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import json, math, logging
+import numpy
+
+#Sun height for rise and set: refraction 34' plus semidiameter 16'
+RiseSetDeg = -50.0 / 60.0
+
+#Class SolarTable - apparent solar EoT [s] and declination [deg] over UTC ticks
+#Chebyshev coefficients per segment of SegS seconds, generated by sdcsolargen.py
+#out of the IAU 2006/2000A theory, fit error below 1 ms EoT and 0.01 arcsec declination.
+class SolarTable:
+        def __init__( self, data ):
+                self.Version = data[ 'version' ]
+                self.Theory = data[ 'theory' ]
+                self.StartTicks = float( data[ 'start' ] )
+                self.SegS = float( data[ 'segS' ] )
+                self.EoT = data[ 'eot' ]
+                self.Decl = data[ 'decl' ]
+                self.Count = len( self.EoT )
+                self.EndTicks = self.StartTicks + self.Count * self.SegS
+                self.EoTArr = numpy.array( self.EoT, dtype = numpy.float64 )
+                self.DeclArr = numpy.array( self.Decl, dtype = numpy.float64 )
+
+        def Covers( self, ticks ):
+                return self.StartTicks <= ticks < self.EndTicks
+
+        #Segment index and position -1..1 inside the segment
+        def Segment( self, ticks ):
+                if not self.Covers( ticks ):
+                        raise ValueError( 'Solar table does not cover ticks %r' % ticks )
+                pos = ( ticks - self.StartTicks ) / self.SegS
+                index = int( pos )
+                return index, 2.0 * ( pos - index ) - 1.0
+
+        #Clenshaw recurrence of one Chebyshev series
+        @staticmethod
+        def Cheb( coef, x ):
+                b1 = 0.0
+                b2 = 0.0
+                x2 = 2.0 * x
+                for c in reversed( coef[1:] ):
+                        b1, b2 = x2 * b1 - b2 + c, b1
+                return x * b1 - b2 + coef[0]
+
+        #Equation of time [s] = apparent - mean solar time, positive when the sundial is ahead
+        def EoTs( self, ticks ):
+                index, x = self.Segment( ticks )
+                return self.Cheb( self.EoT[ index ], x )
+
+        #Apparent geocentric declination [deg]
+        def DeclDeg( self, ticks ):
+                index, x = self.Segment( ticks )
+                return self.Cheb( self.Decl[ index ], x )
+
+        #Array versions, all ticks have to be covered by the table
+        def aSegment( self, ticks ):
+                pos = ( numpy.asarray( ticks, dtype = numpy.float64 ) - self.StartTicks ) / self.SegS
+                index = numpy.floor( pos ).astype( numpy.int64 )
+                if numpy.any( index < 0 ) or numpy.any( index >= self.Count ):
+                        raise ValueError( 'Solar table does not cover all ticks' )
+                return index, 2.0 * ( pos - index ) - 1.0
+
+        @staticmethod
+        def aCheb( coefs, x ):
+                b1 = numpy.zeros_like( x )
+                b2 = numpy.zeros_like( x )
+                x2 = 2.0 * x
+                for k in range( coefs.shape[-1] - 1, 0, -1 ):
+                        b1, b2 = x2 * b1 - b2 + coefs[ ..., k ], b1
+                return x * b1 - b2 + coefs[ ..., 0 ]
+
+        def aEoTs( self, ticks ):
+                index, x = self.aSegment( ticks )
+                return self.aCheb( self.EoTArr[ index ], x )
+
+        def aDeclDeg( self, ticks ):
+                index, x = self.aSegment( ticks )
+                return self.aCheb( self.DeclArr[ index ], x )
+
+        #Local hour angle [deg] out of LAT = UTC + EoL + EoT, 0 at true noon, positive afternoon
+        def aHourAngleDeg( self, ticks, longitude ):
+                lat = numpy.asarray( ticks, dtype = numpy.float64 ) + numpy.asarray( longitude, dtype = numpy.float64 ) * 240.0 + self.aEoTs( ticks )
+                return numpy.remainder( lat, 86400.0 ) / 240.0 - 180.0
+
+        #Geocentric altitude and azimuth [deg] ( azimuth from north over east ), no refraction
+        def aAltAz( self, ticks, longitude, latitude ):
+                hourangle = numpy.radians( self.aHourAngleDeg( ticks, longitude ) )
+                decl = numpy.radians( self.aDeclDeg( ticks ) )
+                phi = numpy.radians( numpy.asarray( latitude, dtype = numpy.float64 ) )
+                alt = numpy.arcsin( numpy.sin( phi ) * numpy.sin( decl ) + numpy.cos( phi ) * numpy.cos( decl ) * numpy.cos( hourangle ) )
+                az = numpy.arctan2( -numpy.cos( decl ) * numpy.sin( hourangle ),
+                                    numpy.cos( phi ) * numpy.sin( decl ) - numpy.sin( phi ) * numpy.cos( decl ) * numpy.cos( hourangle ) )
+                return numpy.degrees( alt ), numpy.remainder( numpy.degrees( az ), 360.0 )
+
+        def AltAz( self, ticks, longitude, latitude ):
+                hourangle = math.radians( ( ticks + longitude * 240.0 + self.EoTs( ticks ) ) % 86400.0 / 240.0 - 180.0 )
+                decl = math.radians( self.DeclDeg( ticks ) )
+                phi = math.radians( latitude )
+                alt = math.asin( math.sin( phi ) * math.sin( decl ) + math.cos( phi ) * math.cos( decl ) * math.cos( hourangle ) )
+                az = math.atan2( -math.cos( decl ) * math.sin( hourangle ),
+                                 math.cos( phi ) * math.sin( decl ) - math.sin( phi ) * math.cos( decl ) * math.cos( hourangle ) )
+                return math.degrees( alt ), math.degrees( az ) % 360.0
+
+        #Transit, rise and set in UTC ticks of the solar day starting at starticks ( UTC ticks of LAT 00:00 without EoT )
+        #plus polar state: 1 polar day, -1 polar night, 0 sun rises and sets
+        def RiseTransitSet( self, starticks, latitude, height = RiseSetDeg ):
+                noonlat = starticks + 43200.0
+                transit = noonlat
+                for i in range( 3 ):
+                        transit = noonlat - self.EoTs( transit )
+                events = []
+                polar = 0
+                for sign in ( -1, 1 ):
+                        ticks = transit
+                        for i in range( 3 ):
+                                decl = math.radians( self.DeclDeg( ticks ) )
+                                phi = math.radians( latitude )
+                                cosh = ( math.sin( math.radians( height ) ) - math.sin( phi ) * math.sin( decl ) ) / ( math.cos( phi ) * math.cos( decl ) )
+                                if cosh <= -1.0:
+                                        polar = 1
+                                elif cosh >= 1.0:
+                                        polar = -1
+                                hourangles = math.acos( min( max( cosh, -1.0 ), 1.0 ) ) / math.pi * 43200.0
+                                ticks = noonlat - self.EoTs( ticks ) + sign * hourangles
+                        events.append( ticks )
+                return transit, events[0], events[1], polar
+
+#Load the table, None if the file is missing or unreadable
+def LoadTable( filename ):
+        try:
+                with open( filename ) as f:
+                        return SolarTable( json.load( f ) )
+        except ( OSError, ValueError, KeyError ) as e:
+                logging.warning( 'Solar table %s not loaded: %s', filename, e )
+                return None
@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+# sdcsolargen.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdcsolar.py - Solar position out of Chebyshev tables
+# sdcsolargen.py - Generator, validation and benchmark of the solar tables
+# sdcsolar.json - Chebyshev tables of EoT and declination
+#
+# History see Mainmodule
+#
+# Offline tool, generating and validating needs pyerfa ( pip3 install pyerfa ), the benchmark runs on the Pi:
+#   sdcsolargen.py -g -s 2019 -e 2046 -o sdcsolar.json   generate tables
+#   sdcsolargen.py -v                                    validate against reference values and the theory
+#   sdcsolargen.py -b                                    benchmark the table evaluation
+
+import sys, json, time, getopt, calendar
+import numpy
+import numpy.polynomial.chebyshev as chebyshev
+import sdcfun2, sdcsolar
+
+SegDays = 32
+Degree = 12
+TableVersion = 1
+TheoryName = 'IAU 2006/2000A via ERFA, apparent geocentric, UT1 = UTC'
+#Speed of light [AU/day]
+LightAUD = 173.1446326846693
+
+#Reference values: Meeus, Astronomical Algorithms, 1992 Oct 13.0 TD ( TAI-UTC 27 s )
+#Example 25.b apparent right ascension 13h13m30.749s and declination -7 deg 47' 01.74" ( full VSOP87 )
+#Example 28.b equation of time 13m42.6s ( formula 28.3 )
+RefTicks = calendar.timegm( ( 1992, 10, 13, 0, 0, 0 ) ) - 27 - 32.184
+RefRADeg = ( 13 + 13 / 60.0 + 30.749 / 3600.0 ) * 15.0
+RefDeclDeg = -( 7 + 47 / 60.0 + 1.74 / 3600.0 )
+RefEoTs = 13 * 60 + 42.6
+
+#Apparent geocentric sun out of the theory: EoT [s], declination [deg], right ascension [deg] for UTC ticks
+def Theory( ticks ):
+        import erfa
+        ticks = numpy.atleast_1d( numpy.asarray( ticks, dtype = numpy.float64 ) )
+        utc1 = numpy.full( ticks.shape, 2440587.5 )
+        utc2 = ticks / 86400.0
+        tai1, tai2 = erfa.utctai( utc1, utc2 )
+        tt1, tt2 = erfa.taitt( tai1, tai2 )
+        #Earth heliocentric and barycentric, sun taken at the time the light left it
+        pvh, pvb = erfa.epv00( tt1, tt2 )
+        tau = numpy.linalg.norm( pvh[ 'p' ], axis = -1 ) / LightAUD
+        pvhl, pvbl = erfa.epv00( tt1, tt2 - tau )
+        sun = pvbl[ 'p' ] - pvhl[ 'p' ] - pvb[ 'p' ]
+        dist = numpy.linalg.norm( sun, axis = -1 )
+        #Annual aberration, then bias-precession-nutation to true equator and equinox of date
+        v = pvb[ 'v' ] / LightAUD
+        bm1 = numpy.sqrt( 1.0 - numpy.sum( v * v, axis = -1 ) )
+        app = erfa.ab( sun / dist[ :, None ], v, dist, bm1 )
+        true = numpy.einsum( '...ij,...j->...i', erfa.pnm06a( tt1, tt2 ), app )
+        ra = numpy.arctan2( true[ :, 1 ], true[ :, 0 ] )
+        decl = numpy.arctan2( true[ :, 2 ], numpy.hypot( true[ :, 0 ], true[ :, 1 ] ) )
+        #EoT = Greenwich hour angle of the sun + 12 h - UT
+        gast = erfa.gst06a( utc1, utc2, tt1, tt2 )
+        eot = numpy.remainder( gast - ra - 2 * numpy.pi * ( utc2 % 1.0 ), 2 * numpy.pi ) - numpy.pi
+        return eot * 86400 / ( 2 * numpy.pi ), numpy.degrees( decl ), numpy.remainder( numpy.degrees( ra ), 360.0 )
+
+#Chebyshev fit of each segment at the Chebyshev nodes
+def Generate( startyear, endyear, filename ):
+        start = calendar.timegm( ( startyear, 1, 1, 0, 0, 0 ) )
+        end = calendar.timegm( ( endyear, 1, 1, 0, 0, 0 ) )
+        segs = SegDays * 86400
+        count = int( numpy.ceil( ( end - start ) / segs ) )
+        nodes = numpy.cos( numpy.pi * ( numpy.arange( Degree + 1 ) + 0.5 ) / ( Degree + 1 ) )
+        eottab = []
+        decltab = []
+        for index in range( count ):
+                eot, decl, ra = Theory( start + index * segs + ( nodes + 1 ) / 2 * segs )
+                eottab.append( [ round( c, 7 ) for c in chebyshev.chebfit( nodes, eot, Degree ).tolist() ] )
+                decltab.append( [ round( c, 10 ) for c in chebyshev.chebfit( nodes, decl, Degree ).tolist() ] )
+        data = { 'version': TableVersion, 'theory': TheoryName, 'start': start, 'segS': segs, 'eot': eottab, 'decl': decltab }
+        with open( filename, 'w' ) as f:
+                json.dump( data, f, separators = ( ',', ':' ) )
+        print( 'Generated', count, 'segments', startyear, '-', endyear, 'into', filename )
+
+def Validate( filename ):
+        table = sdcsolar.LoadTable( filename )
+        eot, decl, ra = Theory( RefTicks )
+        print( 'Theory vs Meeus 1992 Oct 13.0 TD:' )
+        print( '  RA   {:.7f} deg  ref {:.7f}  diff {:+.3f} arcsec'.format( ra[0], RefRADeg, ( ra[0] - RefRADeg ) * 3600 ) )
+        print( '  Decl {:.7f} deg  ref {:.7f}  diff {:+.3f} arcsec'.format( decl[0], RefDeclDeg, ( decl[0] - RefDeclDeg ) * 3600 ) )
+        print( '  EoT  {:.3f} s  ref {:.1f}  diff {:+.3f} s ( ref from the approximate formula 28.3 )'.format( eot[0], RefEoTs, eot[0] - RefEoTs ) )
+        ok = abs( ra[0] - RefRADeg ) * 3600 < 0.1 and abs( decl[0] - RefDeclDeg ) * 3600 < 0.1 and abs( eot[0] - RefEoTs ) < 0.5
+        if table is None:
+                return ok
+        #Table fit against the theory, and the short series of sdcfun2 for comparison
+        ticks = numpy.random.RandomState( 1 ).uniform( table.StartTicks, table.EndTicks, 5000 )
+        eot, decl, ra = Theory( ticks )
+        eoterr = numpy.abs( table.aEoTs( ticks ) - eot ).max()
+        declerr = numpy.abs( table.aDeclDeg( ticks ) - decl ).max() * 3600
+        scalarerr = max( abs( table.EoTs( t ) - e ) for t, e in zip( ticks[ :200 ], eot[ :200 ] ) )
+        print( 'Table vs theory, 5000 random times {:.0f} - {:.0f}:'.format( table.StartTicks, table.EndTicks ) )
+        print( '  EoT max error {:.6f} s ( scalar {:.6f} s ), declination max error {:.5f} arcsec'.format( eoterr, scalarerr, declerr ) )
+        print( '  short series sdcfun2.fEoTs max error {:.2f} s'.format( numpy.abs( sdcfun2.aEoTs( ticks ) - eot ).max() ) )
+        return ok and eoterr < 0.001 and scalarerr < 0.001 and declerr < 0.01
+
+def Benchmark( filename ):
+        table = sdcsolar.LoadTable( filename )
+        if table is None:
+                exit( 1 )
+        ticks = numpy.linspace( table.StartTicks, table.EndTicks - 1, 10000 )
+        scalar = ticks.tolist()
+        start = time.perf_counter()
+        for t in scalar:
+                table.EoTs( t )
+        print( 'EoTs scalar      {:8.2f} us/call'.format( ( time.perf_counter() - start ) / len( scalar ) * 1e6 ) )
+        start = time.perf_counter()
+        for t in scalar[ :1000 ]:
+                table.AltAz( t, 14.3, 48.3 )
+        print( 'AltAz scalar     {:8.2f} us/call'.format( ( time.perf_counter() - start ) / 1000 * 1e6 ) )
+        start = time.perf_counter()
+        table.aEoTs( ticks )
+        table.aDeclDeg( ticks )
+        print( 'EoT+decl array   {:8.3f} us/value'.format( ( time.perf_counter() - start ) / len( ticks ) * 1e6 ) )
+        start = time.perf_counter()
+        for t in scalar[ :1000 ]:
+                sdcfun2.fEoTs( t )
+        print( 'sdcfun2.fEoTs    {:8.2f} us/call'.format( ( time.perf_counter() - start ) / 1000 * 1e6 ) )
+        start = time.perf_counter()
+        for t in scalar[ :100 ]:
+                table.RiseTransitSet( t, 48.3 )
+        print( 'RiseTransitSet   {:8.2f} us/call'.format( ( time.perf_counter() - start ) / 100 * 1e6 ) )
+
+def main( argv ):
+        mode = 'v'
+        startyear = 2019
+        endyear = 2046
+        filename = 'sdcsolar.json'
+        try:
+                opts, args = getopt.getopt( argv, "gvbs:e:o:", ["generate", "validate", "benchmark", "start=", "end=", "output="] )
+                for opt, arg in opts:
+                        if opt in ( '-g', '--generate' ):
+                                mode = 'g'
+                        elif opt in ( '-v', '--validate' ):
+                                mode = 'v'
+                        elif opt in ( '-b', '--benchmark' ):
+                                mode = 'b'
+                        elif opt in ( '-s', '--start' ):
+                                startyear = int( arg )
+                        elif opt in ( '-e', '--end' ):
+                                endyear = int( arg )
+                        elif opt in ( '-o', '--output' ):
+                                filename = arg
+        except ( getopt.GetoptError, ValueError ):
+                print( 'sdcsolargen.py -g | -v | -b  -s <start year> -e <end year> -o <table file>' )
+                exit( 2 )
+        if mode == 'g':
+                Generate( startyear, endyear, filename )
+        elif mode == 'b':
+                Benchmark( filename )
+        elif not Validate( filename ):
+                print( 'Validation FAILED' )
+                exit( 1 )
+        else:
+                print( 'Validation passed' )
+
+if __name__ == "__main__":
+        main( sys.argv[1:] )
@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+# sdcspool.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdcspool.py - Store-and-forward spool of failed uploads
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+# sdcspool.db - Pending uploads
+#
+# History see Mainmodule
+
+import os, json, time, sqlite3, logging
+
+#Class Spool - pending uploads kept on disk until the server is reachable again
+#The database is opened on the first failed upload only, so a station online all day
+#does not write to the SD card. The spool is capped to MaxBytes, oldest entries are evicted first.
+class Spool:
+        BackoffMinS = 10
+        BackoffMaxS = 600
+        MaxTries = 10
+
+        def __init__( self, filename, maxmb ):
+                self.FileName = filename
+                self.MaxBytes = int( maxmb * 1024 * 1024 )
+                self.Db = None
+                self.Pending = 0
+                self.Evicted = 0
+                self.BackoffS = 0
+                self.NextTry = 0.0
+                if os.path.isfile( filename ):
+                        self.Open()
+
+        def Enabled( self ):
+                return self.MaxBytes > 0
+
+        #WAL and synchronous=NORMAL keep the number of flash writes per entry low
+        def Open( self ):
+                if self.Db is not None:
+                        return
+                db = sqlite3.connect( self.FileName, check_same_thread = False )
+                db.execute( 'PRAGMA journal_mode=WAL' )
+                db.execute( 'PRAGMA synchronous=NORMAL' )
+                db.execute( 'CREATE TABLE IF NOT EXISTS pending ( id INTEGER PRIMARY KEY, target TEXT, ticks REAL, '
+                            'meta TEXT, imgtotal BLOB, imgdetail BLOB, size INTEGER, tries INTEGER DEFAULT 0 )' )
+                db.execute( 'CREATE INDEX IF NOT EXISTS pendingticks ON pending ( target, ticks )' )
+                db.commit()
+                self.Db = db
+                self.Pending = db.execute( 'SELECT COUNT(*) FROM pending' ).fetchone()[0]
+                logging.info( 'Spool opened, %i uploads pending', self.Pending )
+
+        #Record a failed upload, replace = 1 keeps only this newest entry of the target
+        def Put( self, target, ticks, meta, imgtotal, imgdetail, replace = 0 ):
+                if not self.Enabled():
+                        return
+                self.Open()
+                size = len( imgtotal or b'' ) + len( imgdetail or b'' )
+                with self.Db:
+                        if replace:
+                                self.Db.execute( 'DELETE FROM pending WHERE target = ?', ( target, ) )
+                        self.Db.execute( 'INSERT INTO pending ( target, ticks, meta, imgtotal, imgdetail, size ) VALUES ( ?, ?, ?, ?, ?, ? )',
+                                         ( target, ticks, json.dumps( meta ), imgtotal, imgdetail, size ) )
+                self.Evict()
+                self.Count()
+
+        #Drop the oldest entries until the images fit into MaxBytes, the newest entry is always kept
+        def Evict( self ):
+                total = self.Db.execute( 'SELECT COALESCE( SUM( size ), 0 ) FROM pending' ).fetchone()[0]
+                if total <= self.MaxBytes:
+                        return
+                drop = []
+                for rowid, size in self.Db.execute( 'SELECT id, size FROM pending ORDER BY ticks ASC' ).fetchall()[:-1]:
+                        if total <= self.MaxBytes:
+                                break
+                        drop.append( ( rowid, ) )
+                        total -= size
+                if not drop:
+                        return
+                with self.Db:
+                        self.Db.executemany( 'DELETE FROM pending WHERE id = ?', drop )
+                self.Evicted += len( drop )
+                logging.warning( 'Spool full - evicted %i oldest uploads', len( drop ) )
+
+        def Count( self ):
+                self.Pending = 0
+                if self.Db is not None:
+                        self.Pending = self.Db.execute( 'SELECT COUNT(*) FROM pending' ).fetchone()[0]
+                return self.Pending
+
+        def Entry( self, row ):
+                return ( row[0], row[1], json.loads( row[2] ), row[3], row[4] )
+
+        #Newest entry of target as ( id, ticks, meta, imgtotal, imgdetail ), None if empty
+        def Newest( self, target ):
+                if not self.Pending:
+                        return None
+                row = self.Db.execute( 'SELECT id, ticks, meta, imgtotal, imgdetail FROM pending WHERE target = ? ORDER BY ticks DESC LIMIT 1',
+                                       ( target, ) ).fetchone()
+                return self.Entry( row ) if row else None
+
+        #Up to count oldest entries of target
+        def Oldest( self, target, count ):
+                if not self.Pending:
+                        return []
+                rows = self.Db.execute( 'SELECT id, ticks, meta, imgtotal, imgdetail FROM pending WHERE target = ? ORDER BY ticks ASC LIMIT ?',
+                                        ( target, count ) ).fetchall()
+                return [ self.Entry( row ) for row in rows ]
+
+        def Done( self, ids ):
+                if not ids:
+                        return
+                with self.Db:
+                        self.Db.executemany( 'DELETE FROM pending WHERE id = ?', [ ( i, ) for i in ids ] )
+                self.Count()
+
+        #Count a failed resend, entries the server keeps refusing are dropped after MaxTries
+        def Retry( self, ids ):
+                if not ids:
+                        return
+                with self.Db:
+                        self.Db.executemany( 'UPDATE pending SET tries = tries + 1 WHERE id = ?', [ ( i, ) for i in ids ] )
+                        gone = self.Db.execute( 'DELETE FROM pending WHERE tries >= ?', ( self.MaxTries, ) ).rowcount
+                if gone:
+                        logging.warning( 'Spool dropped %i uploads after %i tries', gone, self.MaxTries )
+                self.Count()
+
+        def Discard( self, target ):
+                if not self.Pending:
+                        return
+                with self.Db:
+                        self.Db.execute( 'DELETE FROM pending WHERE target = ?', ( target, ) )
+                self.Count()
+
+        #Replay allowed, not backing off after a failed batch
+        def Ready( self ):
+                return self.Pending and ( time.monotonic() >= self.NextTry )
+
+        def Failed( self ):
+                self.BackoffS = min( max( self.BackoffS * 2, self.BackoffMinS ), self.BackoffMaxS )
+                self.NextTry = time.monotonic() + self.BackoffS
+
+        def Succeeded( self ):
+                self.BackoffS = 0
+                self.NextTry = 0.0
+
+        #Spool state for the status output
+        def Stats( self ):
+                return { 'spooled': self.Pending, 'spoolevicted': self.Evicted }
+
+        def Close( self ):
+                if self.Db is not None:
+                        self.Db.close()
+                        self.Db = None
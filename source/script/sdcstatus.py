@@ -0,0 +1,108 @@
+#!/usr/bin/python3
+# sdcstatus.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcstatus.py - Status publisher
+# status.txt - Live status values
+#
+# History see Mainmodule
+
+import os, json
+
+#Status values: section and key of status.txt, key of the REST status, attribute of RunStatus
+Fields = (
+        ( 'System', 'swversion',          'swVersion',          'SWVersion' ),
+        ( 'System', 'capturetime',        'captureTime',        'ImgUTC' ),
+        ( 'System', 'capturelat',         'captureLat',         'ImgLAT' ),
+        ( 'System', 'cputemperature',     'cpuTemparature',     'CPUTemp' ),
+        ( 'System', 'cameratemperature',  'cameraTemparature',  'CamTemp' ),
+        ( 'System', 'outcasetemperature', 'outcaseTemparature', 'OutTemp' ),
+        ( 'Dial',   'brightness',         'brightness',         'IMGBright' ),
+        ( 'Dial',   'sunny',              'sunny',              'Sunny' ),
+        ( 'Dial',   'cloudy',             'cloudy',             'Cloudy' ),
+        ( 'Dial',   'night',              'night',              'Night' ) )
+
+#Values changing with every frame, not counted as a status change
+Volatile = ( 'ImgUTC', 'ImgLAT' )
+
+#Class Status - one serialised status: INI bytes for status.txt and FTP, JSON bytes for the REST body
+class Status:
+        __slots__ = ( 'INI', 'JSON', 'Key', 'Due' )
+
+        def __init__( self, ini, js, key ):
+                self.INI = ini
+                self.JSON = js
+                self.Key = key
+                self.Due = 1
+
+#Class StatusPublisher - status serialised once per frame and written atomically onto the ramdisk
+#A status equal to the last sent one apart from the capture times is not re-sent unless older than maxs.
+class StatusPublisher:
+        def __init__( self, filename ):
+                self.FileName = filename
+                self.Written = b''
+                self.Last = None
+                self.Skipped = 0
+
+        def Serialise( self, runstat ):
+                lines = []
+                section = ''
+                rest = {}
+                for sect, key, restkey, attr in Fields:
+                        value = getattr( runstat, attr )
+                        if sect != section:
+                                if section:
+                                        lines.append( '' )
+                                lines.append( '[' + sect + ']' )
+                                section = sect
+                        lines.append( '{} = {}'.format( key, value ) )
+                        rest[ restkey ] = value
+                if runstat.Pipeline:
+                        lines.append( '' )
+                        lines.append( '[Pipeline]' )
+                        for key, value in runstat.Pipeline.items():
+                                lines.append( '{} = {}'.format( key, value ) )
+                rest[ 'pipeline' ] = runstat.Pipeline
+                if runstat.Latency:
+                        lines.append( '' )
+                        lines.append( '[Latency]' )
+                        for stage, latency in runstat.Latency.items():
+                                lines.append( '{} = {} {} {}'.format( stage, latency[ 'p50ms' ], latency[ 'p95ms' ], latency[ 'maxms' ] ) )
+                rest[ 'latency' ] = runstat.Latency
+                lines.append( '' )
+                lines.append( '' )
+                key = tuple( getattr( runstat, attr ) for sect, k, r, attr in Fields if attr not in Volatile )
+                return Status( '\n'.join( lines ).encode( 'utf-8' ), json.dumps( rest ).encode( 'utf-8' ), key )
+
+        #Serialise and write status.txt if its bytes changed ( temp file and rename ), returns the Status
+        def Publish( self, runstat ):
+                status = self.Serialise( runstat )
+                if status.INI != self.Written:
+                        tmpname = self.FileName + '.tmp'
+                        with open( tmpname, 'wb' ) as f:
+                                f.write( status.INI )
+                        os.replace( tmpname, self.FileName )
+                        self.Written = status.INI
+                return status
+
+        #Sending needed: images go along, nothing sent yet, changed, or last send older than maxs
+        def Due( self, status, ticks, sentimage, maxs ):
+                status.Due = 1
+                if sentimage or ( self.Last is None ) or ( status.Key != self.Last[0] ) or ( ticks - self.Last[1] >= maxs ):
+                        return 1
+                self.Skipped += 1
+                status.Due = 0
+                return 0
+
+        #Remember a status that was sent
+        def Commit( self, status, ticks ):
+                self.Last = ( status.Key, ticks )
+
+        def Stats( self ):
+                return { 'statusskipped': self.Skipped }
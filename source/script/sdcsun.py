@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# sdcsun.py
+VERSION = "Oct_18_2026"
+# Autor: Kurt Niel, http://kepleruhr.at
+# Aim: Intelligent webcam for sundials
+# HW: Raspberry PI Std/Zero with PiCam, W1ThermSensors
+# SW: Python3.4, PIL, PI-Cam, W1ThermSensor
+# Modules
+# sundialcam.py - Mainmodule
+# sdcfun.py - Functions for parameter handling
+# sdcfun2.py - Functions for further processing
+# sdcsun.py - Solar day plan of the station
+# sdcsolar.py - Solar position out of Chebyshev tables
+# station.cfg - Containing working parameter
+# remotecmd.cfg - Containing remote commands parameter
+# sundialcam.log - Log file
+# status.txt - Live status values
+# sdcdayplan.json - Day plan of today
+#
+# History see Mainmodule
+
+import os, json, logging
+import numpy
+from time import gmtime, strftime
+import sdcfun2
+
+#Class DayPlan - sunrise, noon, sunset and EoT of one local mean solar day of the station
+#Computed once per day, EoT interpolated out of a table in StepS steps.
+#Engine 'cheb' out of the solar tables ( sub-second ), 'series' the short series of sdcfun2 ( +/-4 sec ).
+class DayPlan:
+        Version = 3
+        StepS = 600
+        NoonWindowS = 15 * 60
+
+        def __init__( self, day, longitude, latitude ):
+                self.Day = day
+                self.Longitude = longitude
+                self.Latitude = latitude
+                self.EoLs = sdcfun2.fEoLs( longitude )
+                #Solar day in UTC ticks
+                self.StartTicks = day * 86400 - self.EoLs
+                self.EoT = []
+                self.NoonTicks = 0.0
+                self.SunRiseTicks = 0.0
+                self.SunSetTicks = 0.0
+                self.Polar = 0
+                self.Engine = 'series'
+
+        #Solar day number of ticks at longitude
+        @staticmethod
+        def DayOf( ticks, longitude ):
+                return int( ( ticks + sdcfun2.fEoLs( longitude ) ) // 86400 )
+
+        def Compute( self, table = None ):
+                steps = self.StartTicks + numpy.arange( 86400 // self.StepS + 1 ) * self.StepS
+                if ( table is not None ) and table.Covers( steps[0] ) and table.Covers( steps[-1] ):
+                        self.Engine = 'cheb'
+                        self.EoT = table.aEoTs( steps ).tolist()
+                        noon, sunrise, sunset, polar = table.RiseTransitSet( self.StartTicks, self.Latitude )
+                else:
+                        self.Engine = 'series'
+                        self.EoT = sdcfun2.aEoTs( steps ).tolist()
+                        noon, sunrise, sunset, polar = sdcfun2.aSunRiseSetUTC( self.StartTicks + 43200, self.Longitude, self.Latitude )
+                self.NoonTicks = float( noon )
+                self.SunRiseTicks = float( sunrise )
+                self.SunSetTicks = float( sunset )
+                self.Polar = int( polar )
+                return self
+
+        #Equation of time [s] at ticks, linear between the table values
+        def EoTs( self, ticks ):
+                pos = ( ticks - self.StartTicks ) / self.StepS
+                index = int( pos )
+                if ( index < 0 ) or ( index >= len( self.EoT ) - 1 ):
+                        return sdcfun2.fEoTs( ticks )
+                frac = pos - index
+                return self.EoT[ index ] + ( self.EoT[ index + 1 ] - self.EoT[ index ] ) * frac
+
+        #Noon burst window +/- NoonWindowS around noon
+        def NoonStartTicks( self ):
+                return self.NoonTicks - self.NoonWindowS
+
+        def NoonEndTicks( self ):
+                return self.NoonTicks + self.NoonWindowS
+
+        def Text( self, ticks ):
+                return strftime( '%H:%M:%S', gmtime( ticks ) )
+
+        def Matches( self, day, longitude, latitude ):
+                return ( day, longitude, latitude ) == ( self.Day, self.Longitude, self.Latitude )
+
+        def Save( self, filename ):
+                data = { 'version': self.Version, 'day': self.Day, 'longitude': self.Longitude, 'latitude': self.Latitude,
+                         'stepS': self.StepS, 'noon': self.NoonTicks, 'sunrise': self.SunRiseTicks, 'sunset': self.SunSetTicks,
+                         'polar': self.Polar, 'engine': self.Engine, 'eot': self.EoT }
+                tmpname = filename + '.tmp'
+                with open( tmpname, 'w' ) as f:
+                        json.dump( data, f )
+                os.replace( tmpname, filename )
+
+        #Plan out of file, None if missing, outdated or not for this station
+        @classmethod
+        def Load( cls, filename, day, longitude, latitude ):
+                try:
+                        with open( filename ) as f:
+                                data = json.load( f )
+                        if ( data[ 'version' ] != cls.Version ) or ( data[ 'stepS' ] != cls.StepS ):
+                                return None
+                        plan = cls( data[ 'day' ], data[ 'longitude' ], data[ 'latitude' ] )
+                        if not plan.Matches( day, longitude, latitude ):
+                                return None
+                        plan.NoonTicks = data[ 'noon' ]
+                        plan.SunRiseTicks = data[ 'sunrise' ]
+                        plan.SunSetTicks = data[ 'sunset' ]
+                        plan.Polar = data[ 'polar' ]
+                        plan.Engine = data[ 'engine' ]
+                        plan.EoT = data[ 'eot' ]
+                        return plan
+                except ( OSError, ValueError, KeyError, TypeError ):
+                        return None
+
+#Class DayPlanner - day plan of today, loaded or computed on the first call of a new day
+class DayPlanner:
+        def __init__( self, filename, table = None ):
+                self.FileName = filename
+                self.Table = table
+                self.Plan = None
+
+        def Get( self, ticks, longitude, latitude ):
+                day = DayPlan.DayOf( ticks, longitude )
+                if ( self.Plan is not None ) and self.Plan.Matches( day, longitude, latitude ):
+                        return self.Plan
+                plan = DayPlan.Load( self.FileName, day, longitude, latitude )
+                if ( plan is not None ) and ( plan.Engine == 'series' ) and ( self.Table is not None ):
+                        plan = None
+                if plan is None:
+                        plan = DayPlan( day, longitude, latitude ).Compute( self.Table )
+                        try:
+                                plan.Save( self.FileName )
+                        except OSError as e:
+                                logging.warning( 'Day plan not saved: %s', e )
+                        logging.info( 'Day plan computed ( %s ): sunrise %s noon %s sunset %s UTC', plan.Engine, plan.Text( plan.SunRiseTicks ),
+                                      plan.Text( plan.NoonTicks ), plan.Text( plan.SunSetTicks ) )
+                self.Plan = plan
+                return plan
@@ -9,10 +9,36 @@ VERSION = "Dec_08_2019"
 # sundialcam.py - Mainmodule
 # sdcfun.py - Functions for parameter handling
 # sdcfun2.py - Functions for further processing
+# sdccam.py - Camera backends and station clock
+# sdcoverlay.py - Info overlay of the total image
+# sdcimage.py - Image processing stages
+# sdcpipe.py - Pipelined capture / process / upload stages
+# sdcftp.py - Persistent FTP session
+# sdcrest.py - REST push client
+# sdcspool.py - Store-and-forward spool of failed uploads
+# sdcsun.py - Solar day plan of the station
+# sdcsolar.py - Solar position out of Chebyshev tables
+# sdcsolargen.py - Generator, validation and benchmark of the solar tables
+# sdcsolar.json - Chebyshev tables of EoT and declination
+# sdcsched.py - Capture slot scheduler
+# sdcstatus.py - Status publisher
+# sdcsensor.py - Background sampler of the temperature sensors
+# sdcsky.py - Sky and brightness classifier
+# sdcarchive.py - Daily archive of the series
+# sdcmovie.py - Time-lapse movie of the day
+# sdcmemory.py - Memory budget and per stage memory report
+# sdcmetrics.py - Latency of every stage, rolling p50 / p95 / max
+# sdcprofile.py - Remote triggered profiling session
 # station.cfg - Containing working parameter
 # remotecmd.cfg - Containing remote commands parameter
 # sundialcam.log - Log file
 # status.txt - Live status values
+# sdcspool.db - Pending uploads
+# sdcdayplan.json - Day plan of today
+# sdcarchiveYYYYDDD.tar/.idx - Series archive of one day
+# sdcmovieYYYYDDD.mp4 - Time-lapse movie of one day
+# sdcmetrics.prom - Stage latencies for the node exporter
+# sdcprofileNNN.txt - Result of the profiling session NNN
 #
 # History:
 # Apr 24 2019 - starting version
@@ -25,16 +51,57 @@ VERSION = "Dec_08_2019"
 #               insert name to the total image
 # Dec 08 2019 - cleanup naming conventions
 #               cleanup parameters for more convenient usage.
+# Oct 18 2026 - pluggable camera backend: PiCamera or replay of an archived image series
+#               station clock with speed factor to run the whole loop off-Pi
+#               capture into memory, imgLive.bmp only as debug dump ( dumplive = 1 )
+#               continuous capture without warmup per frame ( continuous = 1 ), noon period down to 10 sec
+#               info overlay with cached static layer and glyph cache ( sdcoverlay.py )
+#               blur mask kept in memory, blur skipped when off and limited to the mask box
+#               pipelined runtime: processing and upload on worker threads with drop-oldest queues ( pipeline = 1 )
+#               persistent FTP session with NOOP keepalive and reconnect backoff, no ping per cycle
+#               REST push on a keep-alive session with timeouts, binary multipart opt-in ( restmode = json | multipart )
+#               change gate: unchanged images are not uploaded ( changethres % luminance, changemaxs refresh )
+#               failed uploads spooled to sdcspool.db and resent after outages ( spoolmb, spoolbatch, spoolworkers )
+#               day plan: sunrise, noon, sunset and EoT table once per solar day, kept in sdcdayplan.json
+#               sunrise/noon/sunset anchored to the solar date of the capture, not the local date of the Pi
+#               solar position engine: EoT, declination, rise/set out of Chebyshev tables ( sdcsolar.json )
+#               slot scheduler: absolute deadlines on the monotonic clock, no busy wait, jitter in the status
+#               config store: station.cfg reparsed only on change or SIGHUP, written atomically and only if changed,
+#               remote commands as overlay in memory ( remote periodm now holds until the next command )
+#               status publisher: status serialised once to INI and JSON, written atomically, same bytes to FTP and REST,
+#               unchanged status not re-sent ( changemaxs refresh )
+#               sensor sampler: W1 sensors and CPU temperature ( sysfs ) read on their own thread every sensorperiods,
+#               85.0 and outliers filtered, the loop takes the latest values without waiting
+#               sky classifier: brightness thresholds in station.cfg [Sky], shadow contrast and saturation of a crop
+#               thumbnail, each with hysteresis; sdcsky.py -a re-classifies archived series for tuning
+#               series archive: frames appended in-process to sdcarchiveYYYYDDD.tar with an index of capture time,
+#               offset and status row, no sudo mkdir / cp per frame; replay reads the archive
+#               time-lapse movie: archived frames piped into ffmpeg during the day in segments, resumed after a
+#               crash out of the archive, concatenated after sunset ( DoAfterSunset ); VideoWriter.py streams frames
+#               renditions: web images resized straight out of the camera frame by box, no crop copies, JPEG
+#               sources decoded scaled down; declared in station.cfg [Total] renditions, further ones as img<Name>.jpg
+#               JPEG encoded once per rendition, quality bisected to an optional byte budget of the rendition,
+#               progressive / optimised Huffman tables optional; FTP, REST, spool, archive and movie send these bytes
+#               low memory mode: capture of the crop region only ( camera zoom ), one frame less in flight,
+#               RSS / tracemalloc peak per stage in the status, parameter files over the memory budget refused
+#               stage latencies: sensor read, slot wait, settle, capture, render, overlay, encode, upload legs and
+#               config reload timed on the monotonic clock, p50 / p95 / max of the last runs in the status
+#               ( [Latency], REST latency ) and in sdcmetrics.prom on the ramdisk
+#               profiling session by remote command ( remotecmd.cfg [Profile] session / cycles, REST profileSession /
+#               profileCycles ): cProfile per thread and tracemalloc top allocations for the cycles, the result
+#               uploaded by FTP or as REST part 'profile'; nothing enabled while no session runs
 
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
-import os, sys, getopt, time, ftplib, configparser, logging
-import picamera
-from w1thermsensor import W1ThermSensor
-import sdcfun, sdcfun2
+import os, sys, io, copy, json, getopt, time, ftplib, configparser, logging, threading, concurrent.futures
+try:
+        from w1thermsensor import W1ThermSensor
+except ImportError:
+        W1ThermSensor = None
+import sdcfun, sdcfun2, sdccam, sdcoverlay, sdcimage, sdcpipe, sdcftp, sdcrest, sdcspool, sdcsun, sdcsolar, sdcsched, sdcstatus, sdcsensor, sdcsky, sdcarchive, sdcmovie, sdcmemory, sdcmetrics, sdcprofile
+from sdccam import SysClock
 from time import gmtime, strftime
 from datetime import date, datetime, timedelta
 from math import sin
-import requests, base64
 
 # FontPath = "/usr/share/fonts/truetype/dejavu/DejaVuSansCondensed.ttf"
 # FontPathBold = "/usr/share/fonts/truetype/dejavu/DejaVuSansCondensed-Bold.ttf"
@@ -46,21 +113,450 @@ Sans12 = ImageFont.truetype( FontPath, 12 )
 SansBold12 = ImageFont.truetype( FontPathBold, 12 )
 Sans16 = ImageFont.truetype( FontPathBold, 16 )
 
+#Class Frame - captured frame with the parameter snapshot it was taken with
+class Frame:
+        def __init__( self ):
+                self.TicksCap = 0.0
+                self.TicksIm = 0.0
+                self.Renditions = None
+                self.SourceFile = ''
+                self.Cam = None
+                self.Run = None
+                self.Status = None
+                self.ImgEoT = ''
+                self.ImgEoL = ''
+                self.Plan = None
+                self.TransTot = 0
+                self.TransDet = 0
+                self.Series = 0
+                self.Signature = None
+                self.Published = None
+                self.ImgTotal = b''
+                self.ImgDetail = b''
+                self.ImgExtra = {}
+
+#Class Processor - image processing stage: renditions, blur, info print, save
+class Processor:
+        def __init__( self, filetotal, filedetail, publisher, station, overlay, blur, gate, pipe, render, metrics ):
+                self.FileImgTotal = filetotal
+                self.FileImgDetail = filedetail
+                self.Publisher = publisher
+                self.Station = station
+                self.Overlay = overlay
+                self.Blur = blur
+                self.Gate = gate
+                self.Pipe = pipe
+                self.Render = render
+                self.Encoder = sdcimage.JpegEncoder()
+                self.Blurs = {}
+                self.BlurImage = 0
+                self.PlotInfo = 0
+                self.StatsSources = []
+                self.Archive = None
+                self.Movie = None
+                self.Metrics = metrics
+
+        def Run( self, frame ):
+                logging.debug( 'Start image processing' )
+                SDCCam = frame.Cam
+
+                #Web images out of crop and magnifier region, the live image is rendered at capture already
+                SDCRun = frame.Run
+                if frame.SourceFile:
+                        start = time.monotonic()
+                        self.Render.Configure( SDCRun.Renditions )
+                        with Image.open( frame.SourceFile ) as pil_imo:
+                                renditions = self.Render.Render( pil_imo, SDCCam )
+                        self.Metrics.Since( 'renderstatic', start )
+                else:
+                        renditions = frame.Renditions
+                frame.Renditions = None
+                out = renditions.pop( 'total' )
+                outdetail = renditions.pop( 'detail' )
+                scale = out.size[0] / float( SDCCam.CropWebWidth )
+                if self.PlotInfo:
+                        im = array( out )
+                        imshow( im )
+                        x = [ v * scale for v in ( SDCCam.ZoomX1w, SDCCam.ZoomX1w, SDCCam.ZoomX2w, SDCCam.ZoomX2w ) ]
+                        y = [ v * scale for v in ( SDCCam.ZoomY1w, SDCCam.ZoomY2w, SDCCam.ZoomY1w, SDCCam.ZoomY2w ) ]
+                        plot( x, y, 'r*' )
+                        show()
+
+                #Blur accesable region, of the further crop renditions too
+                if self.BlurImage == 1:
+                        self.Blur.Apply( out )
+                        for name, image in renditions.items():
+                                if self.Render.Region( name ) == 'crop':
+                                        if name not in self.Blurs:
+                                                self.Blurs[ name ] = sdcimage.BlurMask( self.Blur.FileName, self.Blur.Radius )
+                                        self.Blurs[ name ].Radius = max( 1, int( self.Blur.Radius * image.size[0] / out.size[0] ) )
+                                        self.Blurs[ name ].Apply( image )
+
+                #Images visually unchanged against the last uploaded frame are not sent, status only
+                if frame.TransTot or frame.TransDet:
+                        frame.Signature = self.Gate.Signature( out )
+                        if not self.Gate.Changed( frame.Signature, frame.TicksIm, SDCRun.ChangeThres, SDCRun.ChangeMaxS ):
+                                logging.debug( 'Image unchanged - upload status only' )
+                                frame.TransTot = 0
+                                frame.TransDet = 0
+
+                #Print info onto total image: cached static layer, changing strings per frame
+                SDCStatus = frame.Status
+                Plan = frame.Plan
+                start = time.monotonic()
+                self.Overlay.Prepare( out.size[0], out.size[1], self.Station.Name,
+                                      Plan.Text( Plan.SunRiseTicks ), Plan.Text( Plan.NoonTicks ), Plan.Text( Plan.SunSetTicks ) )
+                zoomrect = None
+                if SDCRun.ZoomDrawRect:
+                        zoomrect = ( ( int( SDCCam.ZoomX1w * scale ), int( SDCCam.ZoomY1w * scale ) ),
+                                     ( int( SDCCam.ZoomX2w * scale ), int( SDCCam.ZoomY2w * scale ) ) )
+                self.Overlay.Render( out, SDCStatus.ImgUTC, frame.ImgEoT, frame.ImgEoL, SDCStatus.ImgLAT,
+                                     SDCStatus.OutTemp, SDCStatus.CamTemp, SDCStatus.CPUTemp, zoomrect )
+                start = self.Metrics.Since( 'overlay', start )
+
+                #Save composed total image and detail image, the frame keeps the bytes for the upload
+                self.Encoder.Configure( SDCRun.JpegQuality, SDCRun.JpegProgressive, SDCRun.JpegOptimize )
+                frame.ImgTotal = self.Save( 'total', out, self.FileImgTotal )
+                frame.ImgDetail = self.Save( 'detail', outdetail, self.FileImgDetail )
+                for name, image in renditions.items():
+                        frame.ImgExtra[ name ] = self.Save( name, image, os.path.join( os.path.dirname( self.FileImgTotal ), 'img' + name.capitalize() + '.jpg' ) )
+                self.Metrics.Since( 'encode', start )
+                #Only the JPEG bytes are kept from here on
+                out = outdetail = renditions = None
+
+                #Publish status information: serialised once, the upload sends these bytes if due
+                SDCStatus.Pipeline = self.Pipe.Stats()
+                for source in self.StatsSources:
+                        SDCStatus.Pipeline.update( source.Stats() )
+                SDCStatus.Latency = self.Metrics.Summary()
+                frame.Published = self.Publisher.Publish( SDCStatus )
+                self.Publisher.Due( frame.Published, frame.TicksIm, frame.TransTot or frame.TransDet, SDCRun.ChangeMaxS )
+
+                #Archive status row and total image of the day, in-process; the sdcstatus log is kept for the tools reading it
+                if frame.Series:
+                        start = time.monotonic()
+                        try:
+                                sdcfun2.LogStatus( SysClock.Time(), SDCStatus.CPUTemp, SDCStatus.CamTemp, SDCStatus.OutTemp, str( SDCStatus.IMGBright ) )
+                                self.Archive.Append( frame.TicksIm, frame.ImgTotal if SDCStatus.Night == 0 else None,
+                                                     ( SDCStatus.CPUTemp, SDCStatus.CamTemp, SDCStatus.OutTemp, SDCStatus.IMGBright,
+                                                       SDCStatus.Night, SDCStatus.Cloudy, SDCStatus.Sunny ) )
+                        except OSError as e:
+                                print( 'Store status or copy images failed' )
+                                logging.warning( 'Archive frame failed: %s', e )
+                        #Time-lapse of the day encoded along
+                        if SDCRun.Movie and ( SDCStatus.Night == 0 ):
+                                self.Movie.Configure( SDCRun.MovieFPS, SDCRun.MovieWidth, SDCRun.MovieCodec, SDCRun.MovieSegment )
+                                self.Movie.Add( frame.TicksIm, frame.ImgTotal )
+                        self.Metrics.Since( 'archive', start )
+
+                #Finalize image processing
+                logging.debug( 'End image processing' )
+                return frame
+
+        #Encode JPEG once within the budget of the rendition, write it to the ramdisk and return the bytes
+        #The file is replaced as a whole, a local stream never reads a half written image.
+        def Save( self, name, image, filename ):
+                data = self.Encoder.Encode( name, image, self.Render.BudgetKB( name ) )
+                tmpname = filename + '.tmp'
+                with open( tmpname, 'wb' ) as f:
+                        f.write( data )
+                os.replace( tmpname, filename )
+                return data
+
+#Class Uploader - transfer stage: images and status via FTP or REST, fetching remote commands
+class Uploader:
+        def __init__( self, filestationinfo, publisher, fileremotecmd, station, gate, spool, metrics, profiler ):
+                self.FileStationInfo = filestationinfo
+                self.Publisher = publisher
+                self.FileRemoteCmdCfg = fileremotecmd
+                self.Station = station
+                self.Gate = gate
+                self.Spool = spool
+                self.SpoolBatch = 10
+                self.SpoolWorkers = 2
+                self.Workers = None
+                self.CmdReady = threading.Event()
+                self.Remote = None
+                self.IPSDCon = 0
+                self.FTPSDCon = 0
+                self.FTP = sdcftp.FTPSession( timeout = 10 )
+                self.Rest = sdcrest.RestClient( 'json' )
+                self.P_TransInfo = 1
+                self.OPDelayMax = 20
+                self.Metrics = metrics
+                self.Profiler = profiler
+
+        def Run( self, frame ):
+                if ( frame.Run.FTPupload ):
+                        self.RunFTP( frame )
+                else:
+                        self.RunREST( frame )
+                logging.debug( 'End period' )
+                return None
+
+        def CheckDelay( self, frame ):
+                OPDelayS = int( SysClock.Time() - frame.TicksCap )
+                if ( OPDelayS > self.OPDelayMax ):
+                        logging.warning( 'Exceeded expected runtime - OPDelayS %i sec', OPDelayS )
+
+        #Transfer images via FTP on the persistent session
+        def RunFTP( self, frame ):
+                SDCRun = frame.Run
+                logging.debug( 'Start image transfer' )
+
+                #connect and login to FTP server unless the session is open, the session tells reachability
+                start = time.monotonic()
+                self.FTP.Configure( SDCRun.Host, SDCRun.User, SDCRun.Password )
+                self.FTPSDCon = self.FTP.Connect()
+                self.IPSDCon = self.FTP.Reachable
+                start = self.Metrics.Since( 'ftpconnect', start )
+                if not self.FTPSDCon:
+                        print( 'FTP error connecting' )
+                        self.SpoolFTP( frame )
+
+                #send, the connection stays open for the next cycle
+                if self.FTPSDCon:
+                        try:
+                                if self.P_TransInfo:
+                                        with open( self.FileStationInfo, 'rb' ) as f:
+                                                self.FTP.Store( 'stationinfo.txt', f.read() )
+                                        logging.debug( 'End stationinfo transfer' )
+                                        self.P_TransInfo = 0
+                                        start = self.Metrics.Since( 'ftpinfo', start )
+                                if frame.TransTot:
+                                        self.FTP.Store( 'imgtotal.jpg', frame.ImgTotal )
+                                        logging.debug( 'End imgtotal transfer' )
+                                        start = self.Metrics.Since( 'ftptotal', start )
+                                if frame.TransDet:
+                                        self.FTP.Store( 'imgdetail.jpg', frame.ImgDetail )
+                                        logging.debug( 'End imgdetail transfer' )
+                                        start = self.Metrics.Since( 'ftpdetail', start )
+                                if frame.TransTot:
+                                        self.Gate.Commit( frame.Signature, frame.TicksIm )
+                                        self.Spool.Discard( 'ftp' )
+                                elif self.DrainFTP():
+                                        start = self.Metrics.Since( 'ftpspool', start )
+                                if frame.Published.Due:
+                                        self.FTP.Store( 'status.txt', frame.Published.INI )
+                                        self.Publisher.Commit( frame.Published, frame.TicksIm )
+                                        logging.debug( 'End status transfer' )
+                                        start = self.Metrics.Since( 'ftpstatus', start )
+                                profile = self.Profiler.Ready()
+                                if profile is not None:
+                                        self.FTP.Store( profile[0], profile[1] )
+                                        self.Profiler.Sent()
+                                        logging.info( 'Profile %s sent', profile[0] )
+                                        start = self.Metrics.Since( 'ftpprofile', start )
+                                remotecmd = self.FTP.Retrieve( 'remotecmd.cfg' )
+                                start = self.Metrics.Since( 'ftpremotecmd', start )
+                                if remotecmd is not None:
+                                        with open( self.FileRemoteCmdCfg, 'wb' ) as f:
+                                                f.write( remotecmd )
+                                        logging.debug( 'End remotecmd transfer' )
+                                        try:
+                                                self.Remote = sdcfun.GetRemote( self.FileRemoteCmdCfg )
+                                                self.CmdReady.set()
+                                        except ( configparser.Error, ValueError ) as e:
+                                                logging.warning( 'remotecmd.cfg not applied: %s', e )
+                        except ( ftplib.all_errors ) as e:
+                                self.FTP.Failed( 'Error uploading to FTP server: %s' % e )
+                                self.FTPSDCon = 0
+                                print( 'FTP error uploading' )
+                                self.SpoolFTP( frame )
+
+                        self.CheckDelay( frame )
+
+                logging.debug( 'End image transfer' )
+
+        #FTP server keeps the live images only, so the spool holds the newest images not sent
+        def SpoolFTP( self, frame ):
+                if frame.TransTot or frame.TransDet:
+                        self.Spool.Put( 'ftp', frame.TicksIm, {},
+                                        frame.ImgTotal if frame.TransTot else None,
+                                        frame.ImgDetail if frame.TransDet else None, replace = 1 )
+
+        #Images spooled during an outage, sent when the current frame brought none, returns 1 if sent
+        def DrainFTP( self ):
+                entry = self.Spool.Newest( 'ftp' )
+                if entry is None:
+                        return 0
+                rowid, ticks, meta, imgtotal, imgdetail = entry
+                if imgtotal is not None:
+                        self.FTP.Store( 'imgtotal.jpg', imgtotal )
+                if imgdetail is not None:
+                        self.FTP.Store( 'imgdetail.jpg', imgdetail )
+                self.Spool.Done( [ rowid ] )
+                logging.info( 'Spooled images of %s sent', strftime( '%H:%M:%S', gmtime( ticks ) ) )
+                return 1
+
+        #Transfer images via REST
+        def RunREST( self, frame ):
+                SDCRun = frame.Run
+                SDCStation = self.Station
+                #Nothing new to push: skipped only without remote commands, they come with the answer of a push
+                #and would wait up to changemaxs otherwise; with remotecmd = 1 the status goes once per period
+                profile = self.Profiler.Ready()
+                if not ( frame.TransTot or frame.TransDet or frame.Published.Due or profile or SDCRun.RemoteCMD ):
+                        logging.debug( 'Status unchanged - no push' )
+                        return
+
+                # image transfer via REST: pooled session, JSON or opt-in binary multipart with JSON fallback
+                logging.debug( 'Start image transfer' )
+                requestData = {
+                        'stationName': SDCRun.IDName,
+                        'stationId': SDCRun.IDNo,
+                        'sundialName': SDCStation.Name,
+                        'location': SDCStation.Location,
+                        'latitude': SDCStation.Latitude,
+                        'longitude':SDCStation.Longitude,
+                        'webcamType': SDCStation.TypeWebcam,
+                        'transferType': SDCStation.TypeTransfer,
+                        'sundialInfo': SDCStation.Text,
+                        'websiteUrl': SDCStation.Website,
+                        'teamName': SDCStation.Team,
+                        'nearbyPublicInstitute': SDCStation.NearbyPublicInst,
+                        'organizationalForm': SDCStation.Organization
+                }
+
+                #Station data with the status bytes of the publisher, embedded as encoded by the publisher
+                fields = list( requestData.items() ) + [ ( 'Status', frame.Published.JSON ) ]
+
+                imgTotal = frame.ImgTotal if frame.TransTot else None
+                imgDetail = frame.ImgDetail if frame.TransDet else None
+                files = [ ( 'profile', profile[0], 'text/plain', profile[1] ) ] if profile else []
+
+                #Spooled only if not delivered, a push the server accepted is never sent again
+                start = time.monotonic()
+                self.Rest.SetMode( SDCRun.RestMode )
+                try:
+                        responseData = self.Rest.Push( SDCRun.ApiUrl, SDCRun.ApiKey, SDCRun.IDNo, fields, imgTotal, imgDetail, files )
+                except sdcrest.TransportError as e:
+                        print( 'REST error pushing' )
+                        logging.warning( 'REST push failed, spooled: %s', e )
+                        requestData[ 'Status' ] = json.loads( frame.Published.JSON.decode( 'utf-8' ) )
+                        self.Spool.Put( 'rest', frame.TicksIm, requestData, imgTotal, imgDetail )
+                        self.CheckDelay( frame )
+                        return
+                except sdcrest.ResponseError as e:
+                        logging.warning( 'REST push accepted, no remote commands: %s', e )
+                        responseData = None
+                start = self.Metrics.Since( 'restpush', start )
+                if profile:
+                        self.Profiler.Sent()
+                        logging.info( 'Profile %s sent', profile[0] )
+                self.Publisher.Commit( frame.Published, frame.TicksIm )
+                if imgTotal is not None:
+                        self.Gate.Commit( frame.Signature, frame.TicksIm )
+                if self.DrainREST( SDCRun, imgTotal is not None ):
+                        self.Metrics.Since( 'restspool', start )
+
+                #Remote commands of the answer, a malformed answer keeps the last ones
+                if responseData is not None:
+                        try:
+                                self.ApplyResponse( responseData )
+                        except ( KeyError, TypeError, ValueError, OSError ) as e:
+                                logging.warning( 'REST response without valid remote commands: %s', e )
+
+                self.CheckDelay( frame )
+                logging.debug( 'End image transfer' )
+
+        #Remote commands out of the REST answer, kept in remotecmd.cfg as with FTP
+        def ApplyResponse( self, responseData ):
+                SDCRemote = sdcfun.Remote()
+                SDCRemote.CamOffLine = int(responseData['isCamOffline'])
+                SDCRemote.PeriodM = int(responseData['period'])
+                SDCRemote.Series = int(responseData['isSeries'])
+                SDCRemote.ZoomMove = int(responseData['isZoomMove'])
+                SDCRemote.ZoomDrawRect = int(responseData['isZoomDrawRect'])
+                SDCRemote.ZoomCentPercX = int(responseData['zoomCenterPerCX'])
+                SDCRemote.ZoomCentPercY = int(responseData['zoomCenterPerCy'])
+                SDCRemote.Profile = int(responseData.get('profileSession', 0))
+                SDCRemote.ProfileCycles = int(responseData.get('profileCycles', 10))
+                sdcfun.WriteRemote(self.FileRemoteCmdCfg, SDCRemote)
+
+                self.Remote = SDCRemote
+                self.CmdReady.set()
+
+        #Resend spooled pushes in batches on SpoolWorkers connections, returns the number of pushes tried:
+        #the newest first if the live push had no image, then the series oldest first
+        def DrainREST( self, SDCRun, sentimage ):
+                if not self.Spool.Ready():
+                        return 0
+                entries = []
+                if not sentimage:
+                        newest = self.Spool.Newest( 'rest' )
+                        if newest is not None:
+                                entries.append( newest )
+                for entry in self.Spool.Oldest( 'rest', self.SpoolBatch ):
+                        if not entries or entry[0] != entries[0][0]:
+                                entries.append( entry )
+                if not entries:
+                        return 0
+                if self.Workers is None:
+                        self.Workers = concurrent.futures.ThreadPoolExecutor( max_workers = self.SpoolWorkers )
+                jobs = [ ( entry[0], self.Workers.submit( self.ResendREST, SDCRun, entry ) ) for entry in entries ]
+                done = []
+                failed = []
+                for rowid, job in jobs:
+                        try:
+                                job.result()
+                                done.append( rowid )
+                        except Exception as e:
+                                failed.append( rowid )
+                                logging.warning( 'Spooled push failed: %s', e )
+                self.Spool.Done( done )
+                self.Spool.Retry( failed )
+                if failed:
+                        self.Spool.Failed()
+                else:
+                        self.Spool.Succeeded()
+                logging.info( 'Spool resent %i pushes, %i pending', len( done ), self.Spool.Pending )
+                return len( entries )
+
+        #Push as captured, flagged as spooled, the remote commands of the answer are outdated
+        def ResendREST( self, SDCRun, entry ):
+                rowid, ticks, requestData, imgTotal, imgDetail = entry
+                requestData[ 'Status' ][ 'spooled' ] = 1
+                try:
+                        self.Rest.Push( SDCRun.ApiUrl, SDCRun.ApiKey, SDCRun.IDNo, requestData, imgTotal, imgDetail )
+                except sdcrest.ResponseError as e:
+                        logging.debug( 'Spooled push accepted: %s', e )
+
+        def Close( self ):
+                if self.Workers is not None:
+                        self.Workers.shutdown()
+                self.FTP.Stop()
+                self.Rest.Close()
+                self.Spool.Close()
+
 def main( argv ):
         print( 'Sundialcam warmup ..........' )
-        #Delay on startup
-        time.sleep( 30 )
 
         loglevel = "INFO"
+        camspec = "picam"
+        speed = 1.0
+        ramdisk = '/mnt/ramdisk'
         try:
-                opts, args = getopt.getopt( argv, "l:", ["llevel="] )
-        except getopt.GetoptError:
+                opts, args = getopt.getopt( argv, "l:c:s:d:", ["llevel=", "camera=", "speed=", "ramdisk="] )
+                for opt, arg in opts:
+                        if opt in ( '-l', '--llevel' ):
+                                loglevel = arg
+                        elif opt in ( '-c', '--camera' ):
+                                camspec = arg
+                        elif opt in ( '-s', '--speed' ):
+                                speed = float( arg )
+                        elif opt in ( '-d', '--ramdisk' ):
+                                ramdisk = arg
+        except ( getopt.GetoptError, ValueError ):
                 print( 'sundialcam.py -l <loglevel> DEBUG | INFO | WARNING | ERROR | CRITITCAL' )
+                print( '              -c <camera> picam | replay:<directory>  -s <speed>  -d <ramdisk>' )
                 print( '.Terminated.' )
                 exit( 2 )
-        for opt, arg in opts:
-                if opt == '-l':
-                        loglevel = arg
+        if speed != 1.0:
+                SysClock.Init( speed, 0 )
+
+        #Delay on startup
+        SysClock.Sleep( 30 )
 
         numeric_level = getattr( logging, loglevel.upper(), None )
         if not isinstance( numeric_level, int ):
@@ -69,7 +565,7 @@ def main( argv ):
                 exit( 2 )
 
         #Start after warmup
-        TicksAct = time.time()
+        TicksAct = SysClock.Time()
         ActTime = time.asctime( time.localtime( TicksAct ) )
         print( 'Starting after warmup ......', ActTime )
         logfilename = strftime( "sdc%Y%b.log", gmtime( TicksAct ) )
@@ -84,36 +580,36 @@ def main( argv ):
         InPeriod       = 1
         AfterSunset    = 0
         WLANon         = 0                #yet not checked and in use
-        IPSDCon        = 0                #yet not checked and in use
-        FTPSDCon       = 0
         P_Capture      = 1
         P_TransTot     = 1
         P_TransDet     = 1
-        P_TransInfo    = 1
         P_TransOffline = 0
         P_TransDark    = 0
         BlurImage      = 0                #Blur region off/on, region parameters at blur section
 
         #File parameter
-        FileImgLive        = '/mnt/ramdisk/imgLive.bmp'
-        FileImgTotal       = '/mnt/ramdisk/imgTotal.jpg'
-        FileImgDetail      = '/mnt/ramdisk/imgDetail.jpg'
-        FileImgMask        = '/mnt/ramdisk/imgMask.png'
+        FileImgLive        = ramdisk + '/imgLive.bmp'
+        FileImgTotal       = ramdisk + '/imgTotal.jpg'
+        FileImgDetail      = ramdisk + '/imgDetail.jpg'
+        FileImgMask        = ramdisk + '/imgMask.png'
         FileImgOffline     = 'imgCamOffLine.jpg'
         FileImgCloudyNight = 'imgCloudyNight.jpg'
         FileStationCfg     = 'station.cfg'
         FileStationInfo    = 'stationinfo.txt'
-        FileStatus         = '/mnt/ramdisk/status.txt'
-        FileRemoteCmdCfg   = '/mnt/ramdisk/remotecmd.cfg'
+        FileStatus         = ramdisk + '/status.txt'
+        FileMetrics        = ramdisk + '/sdcmetrics.prom'
+        FileRemoteCmdCfg   = ramdisk + '/remotecmd.cfg'
+        FileSpool          = 'sdcspool.db'
+        FileDayPlan        = 'sdcdayplan.json'
+        FileSolarTable     = 'sdcsolar.json'
+        DirArchive         = '.'
+        DirProfile         = '.'
 
         #Time parameters
         PeriodS    = 60
         DayYear    = 0
         EoTs       = 0
         EoLs       = 0
-        NoonUTC    = '00:00:00'
-        SunRiseUTC = '00:00:00'
-        SunSetUTC  = '00:00:00'
 
         #Control parameter - stored within parameter file
         PeriodM      = 1
@@ -125,43 +621,64 @@ def main( argv ):
         SysOffline   = 1
         RemoteCmd    = 0
 
-        #Control parameter - not yet stored within parameter file
-        BThresCloudy = 3300
-        BThresSunny = 280000
-        BThresCloudyHyst = 200
-        BThresSunnyHyst = 20000
-
-        #Initializing Pi Camera
+        #Initializing camera backend
         try:
-                Cam = picamera.PiCamera()
-        except:
-                print( 'Could not connect to camera.' )
+                Cam = sdccam.OpenCamera( camspec )
+        except Exception as e:
+                print( 'Could not connect to camera.', e )
                 logging.info( 'End: Could not connect to camera ----------' )
                 exit( 2 )
 
-        Cam.resolution = Cam.MAX_RESOLUTION
-        camwidth = Cam.resolution.width
-        camheight = Cam.resolution.height
+        #Replay runs on its own station clock starting just before the first frame
+        if Cam.Simulated:
+                SysClock.Init( speed, Cam.FirstTicks() - 60 )
+                logging.info( 'Replay camera at speed %.1f', speed )
+
+        camwidth = Cam.Width
+        camheight = Cam.Height
 
         #Initializing camera, capturing, and remote parameter
         SDCCam = sdcfun.Cam( camwidth, camheight )
         SDCRun = sdcfun.RunPar()
         PeriodS = SDCRun.AdjustPeriod( SDCRun.PeriodM )
+        SlotS = 30
         SDCRun.Init( PeriodM, FTPupload, Stream, Series, ZoomMove, ZoomDrawRect, SysOffline, RemoteCmd )
         SDCStatus = sdcfun.RunStatus( VERSION )
         SDCStatus.Sunny = 0
         SDCStatus.Cloudy = 0
         SDCStatus.Night = 0
-        SDCRemote = sdcfun.Remote()
+        Overlay = sdcoverlay.Overlay( Sans11, SansBold12, Sans12 )
+        Blur = sdcimage.BlurMask( FileImgMask, 5 )
 
         #Write parameter file if not exist
         sdcfun.WriteParameter( FileStationCfg, SDCCam, SDCRun, 0 )
-        sdcfun.WriteStatus( FileStatus, SDCStatus )
+        Publisher = sdcstatus.StatusPublisher( FileStatus )
+        Publisher.Publish( SDCStatus )
 
-        #Read parameter file and write if modified
-        SDCRun = sdcfun.GetParameter( FileStationCfg, SDCCam )
+        #Read parameter file and write if modified, later reloaded on change or SIGHUP only
+        Store = sdcfun.ConfigStore( FileStationCfg )
+        Memory = sdcmemory.MemoryMonitor( camwidth, camheight )
+        Store.Check = Memory.CheckParameter
+        try:
+                Store.Load()
+        except ValueError as e:
+                #Over the memory budget already at startup: low memory mode until a file within the budget is loaded
+                print( 'Parameter file over the memory budget - low memory mode' )
+                logging.error( 'Parameter file %s refused: %s - starting in low memory mode', FileStationCfg, e )
+                Store.Check = None
+                Store.Load()
+                Store.Check = Memory.CheckParameter
+                Store.Override = { 'LowMemory': 1 }
+        Store.Watch()
+        SDCRun = Store.Get( SDCCam )
         if ( SDCCam.AdjustParameterset() == 1 ):
-            sdcfun.WriteParameter( FileStationCfg, SDCCam, SDCRun, 1 )
+            Store.Save( SDCCam, SDCRun )
+        try:
+                Memory.Check( SDCCam, SDCRun )
+        except ValueError as e:
+                logging.warning( 'Still over the memory budget: %s', e )
+        Cam.SetContinuous( SDCRun.Continuous )
+        Memory.SetTrace( SDCRun.MemoryTrace )
 
         #Initialize, read, and write station parameter
         SDCStation = sdcfun.Station()
@@ -172,18 +689,53 @@ def main( argv ):
         N_W1Sensors = 0
         W1Sensors = []
         try:
+                if Cam.Simulated:
+                        raise RuntimeError( 'no sensors on replay' )
                 for sensor in W1ThermSensor.get_available_sensors():
                         W1Sensors.append( sensor )
                         N_W1Sensors += 1
                 print( "T.Sensors: ", N_W1Sensors )
         except:
                 logging.info( 'No W1ThermSensor applied.' )
+        Metrics = sdcmetrics.LatencyMetrics()
+        Profiler = sdcprofile.Profiler( DirProfile )
+        Sensors = sdcsensor.SensorSampler( W1Sensors, SDCRun.SensorPeriodS, Metrics )
+        Sensors.Start()
 
         #Start evaluation
-        TicksAct = time.time()
+        TicksAct = SysClock.Time()
         ActTime = time.asctime( time.localtime( TicksAct ) )
         print( 'Start evaluation ...........', ActTime )
 
+        #Pipeline: capture here locked to the slot clock, processing and upload on worker threads
+        Planner = sdcsun.DayPlanner( FileDayPlan, sdcsolar.LoadTable( FileSolarTable ) )
+        Pipe = sdcpipe.Pipeline( SDCRun.Pipeline, sdcmemory.PipeDepth( SDCRun ) )
+        Gate = sdcimage.ChangeGate()
+        Render = sdcimage.RenditionEngine()
+        Proc = Processor( FileImgTotal, FileImgDetail, Publisher, SDCStation, Overlay, Blur, Gate, Pipe, Render, Metrics )
+        Proc.BlurImage = BlurImage
+        Proc.PlotInfo = PlotInfo
+        Proc.Archive = sdcarchive.ArchiveWriter( DirArchive )
+        Proc.Movie = sdcmovie.MovieEncoder( DirArchive, DirArchive, SDCRun.MovieFPS, SDCRun.MovieWidth, SDCRun.MovieCodec, SDCRun.MovieSegment )
+        Spool = sdcspool.Spool( FileSpool, SDCRun.SpoolMB )
+        Upload = Uploader( FileStationInfo, Publisher, FileRemoteCmdCfg, SDCStation, Gate, Spool, Metrics, Profiler )
+        Upload.OPDelayMax = OPDelayMax
+        Upload.SpoolBatch = max( 1, SDCRun.SpoolBatch )
+        Upload.SpoolWorkers = max( 1, min( SDCRun.SpoolWorkers, 2 ) )
+        Pipe.AddStage( 'process', Proc.Run )
+        Pipe.AddStage( 'upload', Upload.Run )
+        Pipe.AddMonitor( Memory )
+        Pipe.AddMonitor( Metrics )
+        Pipe.AddMonitor( Profiler )
+        Pipe.Start()
+        Upload.FTP.Start()
+        Sched = sdcsched.SlotScheduler()
+        Sky = sdcsky.SkyClassifier()
+        Proc.StatsSources = [ Spool, Sched, Store, Publisher, Sensors, Sky, Proc.Archive, Proc.Movie, Render, Proc.Encoder, Memory, Profiler ]
+        #Wake up ahead of the slot: camera warmup and capture start, continuous capture is immediate
+        LeadS = 0.1 if Cam.Continuous else 4.1
+        Sched.Plan( PeriodS, SlotS, LeadS )
+
         #Infinit loop
         InPeriod = 1
         while InPeriod:
@@ -192,35 +744,27 @@ def main( argv ):
                         if ( (SDCStatus.Night == 0) and (SDCRun.CamOffLine == 0) ):
                                 P_TransTot = 1
                                 P_TransDet = 1
-                        P_TransCmd = 0
 
-                        #Check CPU and system parameter
-                        res = os.popen("vcgencmd measure_temp").readline()
-                        CPUTemp = (res.replace("temp=", "").replace("'C\n",""))
-                        SDCStatus.CPUTemp = CPUTemp
+                        #Sleep until shortly before the slot, the final wait is short and precise
+                        Sched.Approach( LeadS + 10 )
+                        Profiler.Begin( 'cycle' )
+
+                        #Latest temperatures of the sensor sampler
+                        SDCStatus.CPUTemp = Sensors.Text( 'cpu', 'TT.T' )
+                        SDCStatus.CamTemp = Sensors.Text( 'cam', SDCStatus.CamTemp )
+                        SDCStatus.OutTemp = Sensors.Text( 'out', SDCStatus.OutTemp )
                         if N_W1Sensors == 1:
-                                SDCStatus.CamTemp = "%.1f" % W1Sensors[0].get_temperature()
                                 text = ( 'Temperature: Case {a}°C  CPU {b}°C' ).format( a = SDCStatus.CamTemp, b = SDCStatus.CPUTemp )
-                                print( text )
                         elif N_W1Sensors == 2:
-                                SDCStatus.OutTemp = "%.1f" % W1Sensors[0].get_temperature()
-                                if ( float( SDCStatus.OutTemp ) == 85.0 ):
-                                    SDCStatus.OutTemp = "%.1f" % W1Sensors[0].get_temperature()
-                                    if ( float( SDCStatus.OutTemp ) == 85.0 ):
-                                        SDCStatus.OutTemp = "TT.T"
-                                SDCStatus.CamTemp = "%.1f" % W1Sensors[1].get_temperature()
-                                if ( float( SDCStatus.CamTemp ) == 85.0 ):
-                                    SDCStatus.CamTemp = "%.1f" % W1Sensors[1].get_temperature()
-                                    if ( float( SDCStatus.CamTemp ) == 85.0 ):
-                                        SDCStatus.CamTemp = "TT.T"
                                 text = ( 'Temperature: Out {a}°C  Case {b}°C  CPU {c}°C' ).format( a = SDCStatus.OutTemp, b = SDCStatus.CamTemp, c= SDCStatus.CPUTemp )
-                                print( text )
                         else:
                                 text = ( 'Temperature: CPU {a}°C' ).format( a = SDCStatus.CPUTemp )
-                                print( text )
+                        print( text )
 
-                        #Waiting to get an exact capturing time = hh:mm:00 or hh:mm:30 ( sec, prolog )
-                        sdcfun2.WaitCapture( 30, 3.1 ) #prolog 3.3 until Feb. 25 2019
+                        #Waiting to get an exact capturing time = hh:mm:00 or hh:mm:30 ( lead: prolog 3.1 + warmup 1 sec )
+                        start = time.monotonic()
+                        Sched.Wait( LeadS )
+                        Metrics.Since( 'slotwait', start )
 
                         #Image capture and evaluate timings
 ##                        TicksCap = time.time()
@@ -228,10 +772,10 @@ def main( argv ):
 ##                        DayYear = int( strftime( '%j', gmtime( TicksCap ) ) )
 ##                        #tbd: correction with fractions of a day; in the meanwhile take half of the day - high noon
 ##                        EoTs = sdcfun2.fEoTs( DayYear + 0.5 )
-                        TicksCap = time.time()
-                        NoonUTC, SunRiseUTC, SunSetUTC = sdcfun2.SunRiseSetUTC( TicksCap, SDCStation.Longitude, SDCStation.Latitude )
-                        EoTs = sdcfun2.fEoTs( TicksCap )
-                        EoLs = sdcfun2.fEoLs( SDCStation.Longitude )
+                        TicksCap = SysClock.Time()
+                        Plan = Planner.Get( TicksCap, SDCStation.Longitude, SDCStation.Latitude )
+                        EoTs = Plan.EoTs( TicksCap )
+                        EoLs = Plan.EoLs
                         if ( EoTs < 0 ):
                                 ImgEoT = strftime( 'EoT:  -%M:%S', gmtime( -EoTs ) )
                         else:
@@ -241,402 +785,171 @@ def main( argv ):
                         else:
                                 ImgEoL = strftime( 'EoL: +%H:%M:%S', gmtime( EoLs ) )
                         if P_Capture:
-                                #preview() + sleep() for brightness control
-                                Cam.start_preview()
-                                time.sleep( 1 )
-                                Cam.stop_preview()
-                                Cam.capture( FileImgLive )
+                                #Let exposure settle and capture, low memory: the crop region of the sensor only
+                                CaptureStart = time.monotonic()
+                                cropbox = (SDCCam.CropX1, SDCCam.CropY1, SDCCam.CropX2, SDCCam.CropY2)
+                                Region = Cam.SetRegion( cropbox if SDCRun.LowMemory else None )
+                                Cam.Warmup()
+                                start = Metrics.Since( 'settle', CaptureStart )
+                                Memory.Begin( 'capture' )
+                                pil_live = Cam.CaptureImage()
+                                Memory.End( 'capture' )
+                                Metrics.Since( 'capture', start )
+                                if SDCRun.DumpLive:
+                                        pil_live.convert( 'RGB' ).save( FileImgLive )
                                 logging.debug( 'Image capture - period %i sec', PeriodS )
-                                TicksIm = time.time()
+                                TicksIm = SysClock.Time()
                                 ImageTime = time.asctime( time.localtime( TicksIm ) )
                                 SDCStatus.ImgUTC = strftime( "UTC: %d %b %Y %H:%M:%S", gmtime( TicksIm ) )
                                 SDCStatus.ImgLAT = strftime( 'LAT: %d %b %Y %H:%M:%S', gmtime( TicksIm + EoTs + EoLs ) )
                                 print( 'Image capture', ImageTime, 'Ticks', TicksIm, 'Period', PeriodS )
 
                                 #Evaluating image brightness caused by weather condition
-                                again = float( Cam.analog_gain )
-                                dgain = float( Cam.digital_gain )
+                                again = float( Cam.AnalogGain )
+                                dgain = float( Cam.DigitalGain )
                                 gain = again * dgain + 0.01
-                                SDCStatus.IMGBright = int( 1e9 / float( Cam.exposure_speed ) / gain )
-
-                                if SDCStatus.IMGBright > (BThresCloudy + BThresCloudyHyst):
-                                        BThresCloudyHyst = -abs( BThresCloudyHyst )
-                                        SDCStatus.Night = 0
-                                        SDCStatus.Cloudy = 1
-                                        SDCStatus.Sunny = 0
+                                SDCStatus.IMGBright = int( 1e9 / float( Cam.ExposureSpeed ) / gain )
+
+                                #Weather condition out of brightness and a thumbnail of the crop, switches with hysteresis
+                                livebox = ( cropbox[0] - Region[0], cropbox[1] - Region[1], cropbox[2] - Region[0], cropbox[3] - Region[1] )
+                                zoombox = (SDCCam.ZoomX1, SDCCam.ZoomY1, SDCCam.ZoomX2, SDCCam.ZoomY2)
+                                Sky.Configure( SDCRun )
+                                night = SDCStatus.Night
+                                start = time.monotonic()
+                                SDCStatus.Night, SDCStatus.Cloudy, SDCStatus.Sunny = Sky.Classify( SDCStatus.IMGBright, Sky.Measure( pil_live, livebox, zoombox ) )
+                                Metrics.Since( 'sky', start )
+                                if SDCStatus.Night == 0:
                                         P_TransTot = 1
                                         P_TransDet = 1
                                         P_TransDark = 0
+                                elif night == 0:
+                                        P_TransDark = 1
                                 else:
-                                        BThresCloudyHyst = abs( BThresCloudyHyst )
-                                        if SDCStatus.Night == 0:
-                                                P_TransDark = 1
-                                        else:
-                                                P_TransDark = 0
-                                        SDCStatus.Night = 1
-                                        SDCStatus.Cloudy = 0
-                                        SDCStatus.Sunny = 0
-                                if SDCStatus.IMGBright > (BThresSunny + BThresSunnyHyst):
-                                        BThresSunnyHyst = -abs( BThresSunnyHyst )
-                                        SDCStatus.Night = 0
-                                        SDCStatus.Cloudy = 0
-                                        SDCStatus.Sunny = 1
-                                else:
-                                        BThresSunnyHyst = abs( BThresSunnyHyst )
+                                        P_TransDark = 0
                                 print( 'IMGBright ', SDCStatus.IMGBright,'Night ', SDCStatus.Night, 'Cloudy ', SDCStatus.Cloudy, 'Sunny ', SDCStatus.Sunny )
 
-                                #Image processing
-                                logging.debug( 'Start image processing' )
-
                                 #Select image by online/offline and brightness
-                                if ( not( SDCRun.RemoteCMD ) and SDCRun.CamOffLine ) or ( SDCRun.RemoteCMD and SDCRemote.CamOffLine ):
-                                        pil_imo = Image.open( FileImgOffline ).convert( 'RGB' )
+                                frame = Frame()
+                                frame.TicksCap = TicksCap
+                                frame.TicksIm = TicksIm
+                                frame.Cam = copy.copy( SDCCam )
+                                frame.Run = copy.copy( SDCRun )
+                                frame.Status = copy.copy( SDCStatus )
+                                frame.ImgEoT = ImgEoT
+                                frame.ImgEoL = ImgEoL
+                                frame.Plan = Plan
+                                if SDCRun.CamOffLine:
+                                        frame.SourceFile = FileImgOffline
                                         P_TransOffline = 1
                                 else:
                                         P_TransOffline = 0
                                         if SDCStatus.Night == 1:
-                                                pil_imo = Image.open( FileImgCloudyNight ).convert( 'RGB' )
+                                                frame.SourceFile = FileImgCloudyNight
                                         else:
-                                                pil_imo = Image.open( FileImgLive ).convert( 'RGB' )
-
-                                #Croping camera image to fit the sundial
-                                cropbox = (SDCCam.CropX1, SDCCam.CropY1, SDCCam.CropX2, SDCCam.CropY2)
-                                total_im = pil_imo.crop( cropbox )
-                                if PlotInfo:
-                                        im = array( total_im )
-                                        imshow( im )
-                                        x = [SDCCam.ZoomCentX, SDCCam.ZoomX1, SDCCam.ZoomX1, SDCCam.ZoomX2, SDCCam.ZoomX2]
-                                        y = [SDCCam.ZoomCentY, SDCCam.ZoomY1, SDCCam.ZoomY2, SDCCam.ZoomY1, SDCCam.ZoomY2]
-                                        plot( x, y, 'r*' )
-                                        show()
-
-                                #Magnifier for detail onto croped image
-                                zoombox = ( SDCCam.ZoomX1, SDCCam.ZoomY1, SDCCam.ZoomX2, SDCCam.ZoomY2 )
-                                detail_im = total_im.crop( zoombox )
-
-                                #Fit images for web
-                                out = total_im.resize( (SDCCam.CropWebWidth, SDCCam.CropWebHeight) )
-                                outdetail = detail_im.resize( (SDCCam.ZoomWebWidth, SDCCam.ZoomWebHeight) )
-
-                                #Blur accesable region
-                                if not os.path.isfile( FileImgMask ):
-                                        #create polygon mask
-                                        mask = Image.new( 'L', out.size, 0 )
-                                        maskdraw = ImageDraw.Draw( mask )
-                                        #the follwing polygon defines the blur region
-                                        maskdraw.polygon( [ ( 2, SDCCam.CropWebHeight - 70 ),
-                                                            ( SDCCam.CropWebWidth - 3, SDCCam.CropWebHeight - 130 ),
-                                                            ( SDCCam.CropWebWidth - 3, SDCCam.CropWebHeight - 3 ),
-                                                            ( 2, SDCCam.CropWebHeight - 3 ) ], fill = "white" )
-                                        mask.save( FileImgMask )
-                                else:
-                                        mask = Image.open( FileImgMask )
-                                mask = mask.resize( (SDCCam.CropWebWidth, SDCCam.CropWebHeight) )
-                                blurred = out.filter( ImageFilter.GaussianBlur( 5 ) )
-                                if BlurImage == 1:
-                                        out.paste( blurred, mask = mask )
-
-                                #Prepare info print onto total image
-                                watermark = Image.new( 'RGBA', out.size )
-                                #watermark = Image.new( 'RGBA', out.size, (255,255,255,0) )
-                                draw = ImageDraw.Draw( watermark, 'RGBA' )
-                                #Print brand onto total image
-                                draw.rectangle( ( (   0, 0), ( 95, 14 ) ), fill = "gray", outline = "gray" )
-                                draw.text( (  2,  1), 'Sdcam@kepleruhr', font = Sans11, fill = "white" )
-                                #Print station name onto total image
-                                namecent = SDCCam.CropWebWidth / 2
-                                namelenpix2 = 52 / 16 * len( SDCStation.Name )
-                                draw.rectangle( ( ( namecent - namelenpix2 - 15, 2), ( namecent + namelenpix2 + 15, 20 ) ), fill = "white", outline = "white" )
-                                #draw.rectangle( ( ( namecent - 100, 2), ( namecent + 100, 21 ) ), fill = (255,255,255,128), outline = "white" )
-                                draw.text( (  namecent - namelenpix2,  5), SDCStation.Name, font = SansBold12, fill = "black" )
-                                #Print Noon, Sunrise, Sunset (UTC) on top of the image
-                                TodayUTCstr   = 'Today locals in UTC:'
-                                SunRiseUTCstr = 'Sunrise  {:%H:%M:%S}'.format( SunRiseUTC )
-                                NoonUTCstr    = 'Noon      {:%H:%M:%S}'.format( NoonUTC )
-                                SunSetUTCstr  = 'Sunset   {:%H:%M:%S}'.format( SunSetUTC )
-                                draw.rectangle( ( ( SDCCam.CropWebWidth - 119, 2), ( SDCCam.CropWebWidth - 3, 78 ) ), fill = "white", outline = "white" )
-                                draw.text( (SDCCam.CropWebWidth - 116,   6), TodayUTCstr, font = Sans12, fill = "black" )
-                                draw.text( (SDCCam.CropWebWidth - 111,  25), SunRiseUTCstr, font = Sans12, fill = "black" )
-                                draw.text( (SDCCam.CropWebWidth - 111,  44), NoonUTCstr, font = Sans12, fill = "black" )
-                                draw.text( (SDCCam.CropWebWidth - 111,  63), SunSetUTCstr, font = Sans12, fill = "black" )
-                                #Print capturing time (UTC, EoT, EoL, LAT) onto total image
-                                draw.rectangle( ( (   2, SDCCam.CropWebHeight - 22), ( 160, SDCCam.CropWebHeight - 3 ) ), fill = "white", outline = "white" )
-                                draw.rectangle( ( ( 163, SDCCam.CropWebHeight - 22), ( 240, SDCCam.CropWebHeight - 3 ) ), fill = "white", outline = "white" )
-                                draw.rectangle( ( ( 243, SDCCam.CropWebHeight - 22), ( 334, SDCCam.CropWebHeight - 3 ) ), fill = "white", outline = "white" )
-                                draw.rectangle( ( ( 337, SDCCam.CropWebHeight - 22), ( 494, SDCCam.CropWebHeight - 3 ) ), fill = "white", outline = "white" )
-                                draw.text( (  5, SDCCam.CropWebHeight - 18), SDCStatus.ImgUTC, font = Sans12, fill = "black" )
-                                draw.text( (166, SDCCam.CropWebHeight - 18), ImgEoT, font = Sans12, fill = "black" )
-                                draw.text( (246, SDCCam.CropWebHeight - 18), ImgEoL, font = Sans12, fill = "black" )
-                                draw.text( (340, SDCCam.CropWebHeight - 18), SDCStatus.ImgLAT, font = Sans12, fill = "black" )
-                                #Print temperature values onto total image
-                                draw.rectangle( ( ( SDCCam.CropWebWidth - 269, SDCCam.CropWebHeight - 22), ( SDCCam.CropWebWidth - 3, SDCCam.CropWebHeight - 3 ) ), fill="white", outline = "white" )
-                                draw.text( (SDCCam.CropWebWidth - 265, SDCCam.CropWebHeight - 18), 'Temp:', font = Sans12, fill = "black" )
-                                draw.text( (SDCCam.CropWebWidth - 223, SDCCam.CropWebHeight - 18), 'Out ' + SDCStatus.OutTemp + '°C', font = Sans12, fill = "black" )
-                                draw.text( (SDCCam.CropWebWidth - 153, SDCCam.CropWebHeight - 18), 'Case ' + SDCStatus.CamTemp + '°C', font = Sans12, fill = "black" )
-                                draw.text( (SDCCam.CropWebWidth -  75, SDCCam.CropWebHeight - 18), 'CPU ' + SDCStatus.CPUTemp + '°C', font = Sans12, fill = "black" )
-
-                                #Print zoom window onto total image
-                                if (not( SDCRun.RemoteCMD ) and SDCRun.ZoomDrawRect) or (SDCRun.RemoteCMD and SDCRemote.ZoomDrawRect):
-                                        draw.rectangle( ( ( SDCCam.ZoomX1w, SDCCam.ZoomY1w ), ( SDCCam.ZoomX2w, SDCCam.ZoomY2w ) ), fill = 0, outline = "white" )
-
-                                #Save composed total image
-                                Image.composite( watermark, out, watermark ).save( FileImgTotal )
-                                #testing transparent overlay - still not finished
-                                #Image.alpha_composite( watermark, out ).save( FileImgTotal )
-
-                                #Save detail image
-                                outdetail.save( FileImgDetail )
-
-                                #Finalize image processing
-                                logging.debug( 'End image processing' )
+                                                #Web images straight out of the camera frame, frees the capture buffer for the next frame
+                                                Render.Configure( SDCRun.Renditions )
+                                                start = time.monotonic()
+                                                Memory.Begin( 'render' )
+                                                frame.Renditions = Render.Render( pil_live, SDCCam, Region[:2] )
+                                                Memory.End( 'render' )
+                                                Metrics.Since( 'render', start )
+                                pil_live = None
+                                frame.TransTot = P_TransTot or P_TransOffline or P_TransDark
+                                frame.TransDet = P_TransDet or P_TransOffline or P_TransDark
+                                frame.Series = SDCRun.Series
+                                P_TransTot = 0
+                                P_TransDet = 0
+
+                                #Hand over to processing and upload
+                                Pipe.CaptureS = time.monotonic() - CaptureStart
+                                Pipe.Submit( frame )
+                                frame = None
                                 P_Capture = 0
 
-                        #Store status information
-                        sdcfun.WriteStatus( FileStatus, SDCStatus )
-
-                        #Transfer images via FTP
-                        if ( SDCRun.FTPupload ):
-
-                                logging.debug( 'Start image transfer' )
-
-                                #Check internet connection
-                                if os.system( "sudo ping -c 1 " + SDCRun.Host + " > /dev/null 2>&1 &") == 0:
-                                        IPSDCon = 1
-                                        logging.debug( 'Host is reachable' )
-                                else:
-                                        IPSDCon = 0
-                                        logging.warning( 'Host not reachable' )
-
-                                #connect and login to FTP server
-                                if ( FTPSDCon == 0 ):
-                                        try:
-                                                logging.debug( 'Opening FTP connection' )
-                                                ftp = ftplib.FTP( SDCRun.Host, timeout=10 )
-                                                logging.debug( 'Before connection to FTP server' )
-                                                ftp.login( SDCRun.User, SDCRun.Password )
-                                                logging.debug( 'Connected to FTP server' )
-                                                FTPSDCon = 1
-                                        except:
-                                                logging.warning( 'Error connecting to FTP server' )
-                                                FTPSDCon = 0
-                                                print( 'FTP error connecting' )
-
-                                #send and quit FTP connection
-                                if FTPSDCon:
-                                        try:
-                                                if P_TransInfo:
-                                                        f = open( FileStationInfo, 'rb' )
-                                                        ftp.storbinary( 'STOR stationinfo.txt', f )
-                                                        logging.debug( 'End stationinfo transfer' )
-                                                        f.close()
-                                                        P_TransInfo = 0
-                                                if P_TransTot or P_TransOffline or P_TransDark:
-                                                        f = open( FileImgTotal, 'rb' )
-                                                        ftp.storbinary( 'STOR imgtotal.jpg', f )
-                                                        logging.debug( 'End imgtotal transfer' )
-                                                        f.close()
-                                                        P_TransTot = 0
-                                                if P_TransDet or P_TransOffline or P_TransDark:
-                                                        f = open( FileImgDetail, 'rb' )
-                                                        ftp.storbinary( 'STOR imgdetail.jpg', f )
-                                                        logging.debug( 'End imgdetail transfer' )
-                                                        f.close()
-                                                        P_TransDet = 0
-                                                f = open( FileStatus, "rb" )
-                                                ftp.storbinary( "STOR status.txt", f )
-                                                logging.debug( 'End status transfer' )
-                                                f.close()
-                                                try:
-                                                        f = open( FileRemoteCmdCfg, 'wb' )
-                                                        ftp.retrbinary( 'RETR remotecmd.cfg', f.write )
-                                                        logging.debug( 'End remotecmd transfer' )
-                                                        f.close()
-                                                        P_TransCmd = 1
-                                                except:
-                                                        P_TransCmd = 0
-                                                ftp.quit()
-                                                logging.debug( 'FTP closed' )
-                                                FTPSDCon = 0
-                                        except:
-                                                logging.warning( 'Error uploading to FTP server' )
-                                                FTPSDCon = 0
-                                                print( 'FTP error uploading' )
-
-                                        TicksAct = time.time()
-                                        OPDelayS = int( TicksAct - TicksCap )
-                                        if ( OPDelayS > OPDelayMax ):
-                                                logging.warning( 'Exceeded expected runtime - OPDelayS %i sec', OPDelayS )
-
-                                logging.debug( 'End image transfer' )
-                        
-                        else:
-
-                                print("start image transfer")
-
-                                # image transfer via REST
-                                logging.debug( 'Start image transfer' )
-                                requestData = {}
-
-                                requestData = {
-                                        'stationName': SDCRun.IDName,
-                                        'stationId': SDCRun.IDNo,
-                                        'sundialName': SDCStation.Name,
-                                        'location': SDCStation.Location,
-                                        'latitude': SDCStation.Latitude,
-                                        'longitude':SDCStation.Longitude,
-                                        'webcamType': SDCStation.TypeWebcam,
-                                        'transferType': SDCStation.TypeTransfer,
-                                        'sundialInfo': SDCStation.Text,
-                                        'websiteUrl': SDCStation.Website,
-                                        'teamName': SDCStation.Team,
-                                        'nearbyPublicInstitute': SDCStation.NearbyPublicInst,
-                                        'organizationalForm': SDCStation.Organization
-                                }
-
-                                if P_TransTot or P_TransOffline or P_TransDark:
-                                        imgTotal_base64 = ''
-                                        with open(FileImgTotal, 'rb') as image_file:
-                                                imgTotal_base64 = base64.b64encode(image_file.read()).decode('utf-8')
-                                        requestData['imgTotal'] = imgTotal_base64
-                                        P_TransTot = 0
-
-                                if P_TransDet or P_TransOffline or P_TransDark:
-                                        imgDetail_base64 = ''
-                                        with open(FileImgTotal, 'rb') as image_file:
-                                                imgDetail_base64 = base64.b64encode(image_file.read()).decode('utf-8')
-                                        requestData['imgDetail'] = imgDetail_base64
-                                        P_TransDet = 0
-                                
-                                requestData['Status'] = {
-                                        'swVersion': SDCStatus.SWVersion,
-                                        'captureTime': SDCStatus.ImgUTC,
-                                        'captureLat': SDCStatus.ImgLAT,
-                                        'cpuTemparature': SDCStatus.CPUTemp,
-                                        'cameraTemparature': SDCStatus.CamTemp,
-                                        'outcaseTemparature': SDCStatus.OutTemp,
-                                        'brightness': SDCStatus.IMGBright,
-                                        'sunny': SDCStatus.Sunny,
-                                        'cloudy': SDCStatus.Cloudy,
-                                        'night': SDCStatus.Night
-                                }
-                                
-                                try:
-                                        route = SDCRun.ApiUrl + '%s/Push' % SDCRun.IDNo                                        
-
-                                        print(route)
-                                        
-                                        headers = {'x-functions-key': SDCRun.ApiKey}
-
-                                        response = requests.post(route, json=requestData, headers=headers)
-                                        
-                                        responseData = response.json()['value']
-
-                                        SDCRemote.CamOffLine = int(responseData['isCamOffline'])
-                                        SDCRemote.PeriodM = int(responseData['period'])
-                                        SDCRemote.Series = int(responseData['isSeries'])
-                                        SDCRemote.ZoomMove = int(responseData['isZoomMove'])
-                                        SDCRemote.ZoomDrawRect = int(responseData['isZoomDrawRect'])
-                                        SDCRemote.ZoomCentPercX = int(responseData['zoomCenterPerCX'])
-                                        SDCRemote.ZoomCentPercY = int(responseData['zoomCenterPerCy'])
-                                        sdcfun.WriteRemote(FileRemoteCmdCfg, SDCRemote)
-
-                                        P_TransCmd = 1
-                                except Exception as e:
-                                        print('error')
-                                        print(e)
-                                        logging.debug( 'error getting reponse' )
-                                        P_TransCmd = 0
-
-                                TicksAct = time.time()
-                                OPDelayS = int( TicksAct - TicksCap )
-                                if ( OPDelayS > OPDelayMax ):
-                                        logging.warning( 'Exceeded expected runtime - OPDelayS %i sec', OPDelayS )
-                                logging.debug( 'End image transfer' )
-
-                        logging.debug( 'End period' )
-
-                        #Read operating parameter
-                        if P_TransCmd:
-                                try:
-                                        text = ( 'Before fetch remotecmd.cfg: SDCRemote.Series {a}' ).format( a = SDCRemote.Series )
-                                        print( text ) SDCRemote = sdcfun.GetRemote( FileRemoteCmdCfg ) 
-                                        text = ( 'Got remotecmd.cfg: SDCRemote.Series {a}' ).format( a = SDCRemote.Series )
-                                        print( text )
-                                except:
-                                        P_TransCmd = 0
-                                        print( 'No fetch remotecmd.cfg' )
-                        SDCRun = sdcfun.GetParameter( FileStationCfg, SDCCam )
-                        if P_TransCmd:
+                        #Remote commands fetched by the upload stage, kept in memory as overlay of station.cfg
+                        if Upload.CmdReady.is_set():
+                                Upload.CmdReady.clear()
+                                Store.Remote = Upload.Remote
+                                text = ( 'Got remote commands: Series {a} PeriodM {b}' ).format( a = Store.Remote.Series, b = Store.Remote.PeriodM )
+                                print( text )
+                                #Like all remote commands only with remotecmd = 1 in station.cfg
                                 if SDCRun.RemoteCMD:
-                                        SDCCam.ZoomCentPercX = SDCRemote.ZoomCentPercX
-                                        SDCCam.ZoomCentPercY = SDCRemote.ZoomCentPercY
-                                        SDCRun.PeriodM = SDCRemote.PeriodM
-                                        sdcfun.WriteParameter( FileStationCfg, SDCCam, SDCRun, 0 )
-                        if (not( SDCRun.RemoteCMD ) and SDCRun.ZoomMove) or (SDCRun.RemoteCMD and SDCRemote.ZoomMove):
-                                SDCCam.AdjustZoomParameterset( time.time() )
+                                        Profiler.Request( Store.Remote.Profile, Store.Remote.ProfileCycles )
+
+                        #Read operating parameter, station.cfg reparsed only if it changed and within the memory budget
+                        Memory.Calibrate()
+                        start = time.monotonic()
+                        Store.Load()
+                        SDCRun = Store.Get( SDCCam )
+                        Sensors.SetPeriod( SDCRun.SensorPeriodS )
+                        Metrics.Since( 'config', start )
+                        if SDCRun.ZoomMove:
+                                SDCCam.AdjustZoomParameterset( SysClock.Time() )
                         SDCCam.AdjustParameterset()
+                        Cam.SetContinuous( SDCRun.Continuous )
+                        Memory.SetTrace( SDCRun.MemoryTrace )
                         PeriodS = SDCRun.AdjustPeriod( SDCRun.PeriodM )
                         print( 'Period new: ', PeriodS, 'sec' )
 
-                        #Store camera status and actual image
-                        if( (not( SDCRun.RemoteCMD ) and SDCRun.Series ) or ( SDCRun.RemoteCMD and SDCRemote.Series ) ):
-                                try:
-                                        sdcfun2.LogStatus( time.time(), SDCStatus.CPUTemp, SDCStatus.CamTemp, SDCStatus.OutTemp, str( SDCStatus.IMGBright ) )
-                                        if( SDCStatus.Night == 0 ):
-                                            ImgPathName = strftime( 'images%j', gmtime( TicksIm ) )
-                                            if not os.path.isdir( ImgPathName ):
-                                                    os.system( 'sudo mkdir ' + ImgPathName )
-                                            ImgFileName = strftime( ImgPathName + '/img%j%H%M%S.jpg', gmtime( TicksIm ) )
-                                            os.system( 'sudo cp ' + FileImgTotal + ' ' + ImgFileName )
-                                except:
-                                        print( 'Store status or copy images failed' )
-                                        logging.warning( 'Store status or copy images failed' )
+                        #Profiling session counted in capture cycles, its result goes with the next upload
+                        Profiler.End( 'cycle' )
+                        try:
+                                Profiler.Cycle()
+                        except OSError as e:
+                                logging.warning( 'Profile not written: %s', e )
+
+                        #Latencies for the node exporter textfile collector
+                        try:
+                                Metrics.Write( FileMetrics, SDCRun.IDName )
+                        except OSError as e:
+                                logging.warning( 'Metrics not written: %s', e )
 
                         #Prepare wait for the next time slot
-                        TicksAct = time.time()
-                        ActUTC = datetime.utcfromtimestamp( TicksAct )
-                        Now = time.localtime( TicksAct )
-                        NowS = int( time.strftime( "%S", Now ) ) % 30
+                        TicksAct = SysClock.Time()
+                        Plan = Planner.Get( TicksAct, SDCStation.Longitude, SDCStation.Latitude )
 
-#                        ActUTC   = datetime.combine( datetime.today(), datetime.strptime( '11:16:35', '%H:%M:%S').time() )
                         #While near noon (+/-0.25 h) capture/transfer images more frequent
-                        noonTicks = NoonUTC.timestamp()
-                        nextCapt = datetime.fromtimestamp( ActUTC.timestamp() + PeriodS )
-                        quarterHS = 15 * 60
-                        noon1UTC = datetime.fromtimestamp( noonTicks - quarterHS )
-                        noon2UTC = datetime.fromtimestamp( noonTicks + quarterHS )
-                        WaitNearNoonS = NoonUTC.timestamp() - quarterHS - ActUTC.timestamp()
-                        if ( nextCapt > noon1UTC and ActUTC < noon2UTC ):
+                        WaitNearNoonS = Plan.NoonStartTicks() - TicksAct
+                        if ( TicksAct + PeriodS > Plan.NoonStartTicks() and TicksAct < Plan.NoonEndTicks() ):
                                 if WaitNearNoonS > SDCRun.AdjustPeriod( 0 ):
                                         PeriodS = WaitNearNoonS
                                 else:
                                         PeriodS = SDCRun.AdjustPeriod( 0 )
 
                         #When after sunset prepare finish
-                        if ( ActUTC > SunSetUTC and SDCStatus.Night == 1 and P_TransDark == 0 ):
+                        if ( TicksAct > Plan.SunSetTicks and SDCStatus.Night == 1 and P_TransDark == 0 ):
                                 AfterSunset = 1
                                 print( 'After Sunset' )
                                 break
                         else:
                                 print( 'Before Sunset' )
 
-                        #Wait until next capture time approaching
-                        if ( PeriodS - NowS ) > 10:
-                                #print( 'Sleeping ', PeriodS - int( NowS2 / 2 ) - 10, 'sec' )
-                                time.sleep( PeriodS - NowS - 10 )
+                        #Next capture slot, waiting for it at the start of the cycle
+                        SlotS = SDCRun.SlotPeriod( PeriodS )
+                        LeadS = 0.1 if Cam.Continuous else 4.1
+                        Sched.Plan( PeriodS, SlotS, LeadS )
 
                 except KeyboardInterrupt:
                         InPeriod = 0
                 pass
 
-        Cam.close()
+        #Finish frames still in the pipeline
+        Pipe.Stop( 60 )
+        Upload.Close()
+        Sensors.Close()
+        Proc.Archive.Close()
+        Cam.Close()
+        for line in Memory.Report():
+                logging.info( line )
         ActTime = time.asctime( time.localtime( TicksAct ) )
         if ( AfterSunset ):
-                sdcfun2.DoAfterSunset()
+                sdcfun2.DoAfterSunset( Proc.Movie )
                 print( 'Finishing by sunset ........', ActTime )
                 logging.info( 'End by sunset reached ---------------------' )
-                os.system( 'sudo halt' )
+                if not Cam.Simulated:
+                        os.system( 'sudo halt' )
         else:
+                Proc.Movie.Close()
                 print( 'Finishing by user <ctrl-C> .', ActTime )
                 logging.info( 'End by user <ctrl-C> ----------------------' )
 
@@ -0,0 +1,7 @@
+# conftest.py
+# Aim: Behaviour tests of the sdcam modules, run with pytest from the repository root
+# The modules in source/script import each other by name, so that directory goes onto the path.
+
+import os, sys
+
+sys.path.insert( 0, os.path.join( os.path.dirname( os.path.dirname( os.path.abspath( __file__ ) ) ), 'source', 'script' ) )
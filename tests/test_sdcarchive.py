@@ -0,0 +1,79 @@
+# test_sdcarchive.py
+# Aim: ArchiveWriter / ArchiveReader round trip, tar compatibility and the repair after a crash
+
+import os, tarfile
+import sdcarchive
+
+Day = 20553 * 86400
+
+def Status( i ):
+        return ( '45.0', '20.5', '12.1', 1000 + i, 0, 0, 1 )
+
+def Write( directory, count, start = 0 ):
+        writer = sdcarchive.ArchiveWriter( str( directory ) )
+        for i in range( start, start + count ):
+                data = None if i % 3 == 2 else bytes( [ i ] ) * ( 700 + i )
+                writer.Append( Day + 36000 + i * 60, data, Status( i ) )
+        writer.Close()
+        return writer.Base( Day )
+
+def test_round_trip( tmp_path ):
+        base = Write( tmp_path, 6 )
+        reader = sdcarchive.ArchiveReader( base + '.idx' )
+        assert len( reader.Entries ) == 6
+        images = reader.Range( Day, Day + 86400 )
+        assert [ e.Ticks for e in images ] == [ Day + 36000 + i * 60 for i in ( 0, 1, 3, 4 ) ]
+        for entry in images:
+                i = int( entry.Ticks - Day - 36000 ) // 60
+                assert reader.Read( entry ) == bytes( [ i ] ) * ( 700 + i )
+        assert len( reader.Range( Day, Day + 86400, status = 1 ) ) == 6
+        assert reader.Entries[2].Offset == -1 and reader.Entries[2].Size == 0
+        assert reader.Entries[2].Status == [ str( s ) for s in Status( 2 ) ]
+        reader.Close()
+
+def test_find( tmp_path ):
+        base = Write( tmp_path, 3 )
+        reader = sdcarchive.ArchiveReader( base + '.idx' )
+        assert reader.Find( Day ) is None
+        assert reader.Find( Day + 36000 ).Ticks == Day + 36000
+        assert reader.Find( Day + 36000 + 119 ).Ticks == Day + 36060
+
+def test_tar_readable( tmp_path ):
+        base = Write( tmp_path, 4 )
+        with tarfile.open( base + '.tar' ) as tar:
+                names = tar.getnames()
+                assert len( names ) == 3
+                assert tar.extractfile( names[0] ).read() == bytes( [ 0 ] ) * 700
+
+def test_reopen_appends( tmp_path ):
+        Write( tmp_path, 2 )
+        base = Write( tmp_path, 2, start = 3 )
+        reader = sdcarchive.ArchiveReader( base + '.idx' )
+        assert len( reader.Entries ) == 4
+        assert reader.Read( reader.Entries[-1] ) == bytes( [ 4 ] ) * 704
+        with open( base + '.idx' ) as f:
+                assert f.read().count( sdcarchive.IndexHead ) == 1
+
+def test_repair_partial_index_line( tmp_path ):
+        base = Write( tmp_path, 2 )
+        with open( base + '.idx', 'a' ) as f:
+                f.write( '{}; 2048; 70'.format( Day + 36120 ) )
+        assert sdcarchive.RepairIndex( base + '.idx' ) > 0
+        assert sdcarchive.RepairIndex( base + '.idx' ) == 0
+        assert len( sdcarchive.ReadIndex( base + '.idx' ) ) == 2
+        assert sdcarchive.RepairIndex( str( tmp_path / 'missing.idx' ) ) == 0
+
+def test_crash_member_without_index_overwritten( tmp_path ):
+        base = Write( tmp_path, 2 )
+        #A member written without its index line, then the index line cut in the middle
+        with open( base + '.tar', 'ab' ) as f:
+                f.write( bytes( 3 * sdcarchive.Block ) )
+        with open( base + '.idx', 'a' ) as f:
+                f.write( '{}; 2560; 1'.format( Day + 36120 ) )
+        base = Write( tmp_path, 1, start = 4 )
+        reader = sdcarchive.ArchiveReader( base + '.idx' )
+        assert [ int( e.Ticks - Day - 36000 ) // 60 for e in reader.Entries ] == [ 0, 1, 4 ]
+        assert reader.Read( reader.Entries[-1] ) == bytes( [ 4 ] ) * 704
+        assert os.path.getsize( base + '.tar' ) == reader.Entries[-1].End()
+        with tarfile.open( base + '.tar' ) as tar:
+                assert len( tar.getnames() ) == 3
@@ -0,0 +1,49 @@
+# test_sdcimage_gate.py
+# Aim: ChangeGate: unchanged frames skipped, changed ones and the changemaxs refresh uploaded
+
+from PIL import Image
+import sdcimage
+
+def Frame( grey ):
+        return Image.new( 'RGB', ( 640, 320 ), ( grey, grey, grey ) )
+
+def test_gate_off_and_first_frame():
+        gate = sdcimage.ChangeGate()
+        sig = gate.Signature( Frame( 100 ) )
+        assert gate.Changed( sig, 0, 1.0, 900 ) == 1
+        gate.Commit( sig, 0 )
+        assert gate.Changed( sig, 10, 0, 900 ) == 1
+        assert gate.Skipped == 0
+
+def test_gate_skips_unchanged():
+        gate = sdcimage.ChangeGate()
+        sig = gate.Signature( Frame( 100 ) )
+        gate.Commit( sig, 0 )
+        assert gate.Changed( gate.Signature( Frame( 100 ) ), 60, 1.0, 900 ) == 0
+        assert gate.Changed( gate.Signature( Frame( 101 ) ), 120, 1.0, 900 ) == 0
+        assert gate.Skipped == 2
+
+def test_gate_threshold():
+        gate = sdcimage.ChangeGate()
+        gate.Commit( gate.Signature( Frame( 100 ) ), 0 )
+        #5 of 255 grey levels are 1.96 %
+        sig = gate.Signature( Frame( 105 ) )
+        assert abs( gate.Difference( sig ) - 5 * 100.0 / 255.0 ) < 0.01
+        assert gate.Changed( sig, 60, 1.0, 900 ) == 1
+        assert gate.Changed( sig, 60, 2.5, 900 ) == 0
+
+def test_gate_refresh_after_maxs():
+        gate = sdcimage.ChangeGate()
+        sig = gate.Signature( Frame( 100 ) )
+        gate.Commit( sig, 1000 )
+        assert gate.Changed( sig, 1899, 1.0, 900 ) == 0
+        assert gate.Changed( sig, 1900, 1.0, 900 ) == 1
+
+def test_gate_compares_with_last_uploaded():
+        gate = sdcimage.ChangeGate()
+        gate.Commit( gate.Signature( Frame( 100 ) ), 0 )
+        #Small steps not uploaded add up against the last uploaded frame
+        assert gate.Changed( gate.Signature( Frame( 102 ) ), 60, 1.0, 900 ) == 0
+        assert gate.Changed( gate.Signature( Frame( 104 ) ), 120, 1.0, 900 ) == 1
+        gate.Commit( None, 180 )
+        assert gate.Last[1] == 0
@@ -0,0 +1,62 @@
+# test_sdcimage_jpeg.py
+# Aim: JpegEncoder: highest quality within the byte budget, found in few encodes on a steady scene
+
+import io
+import numpy
+from PIL import Image, ImageFilter
+import sdcimage
+
+def Scene( seed = 1 ):
+        rng = numpy.random.RandomState( seed )
+        data = rng.randint( 0, 256, ( 240, 320, 3 ) ).astype( numpy.uint8 )
+        return Image.fromarray( data ).filter( ImageFilter.GaussianBlur( 1 ) )
+
+def IsJPEG( data ):
+        return Image.open( io.BytesIO( data ) ).format == 'JPEG'
+
+def test_no_budget_configured_quality():
+        encoder = sdcimage.JpegEncoder()
+        encoder.Configure( 80, 0, 0 )
+        image = Scene()
+        data = encoder.Encode( 'total', image, 0 )
+        assert data == encoder.EncodeAt( image, 80 )
+        assert encoder.Last[ 'total' ] == 80
+
+def test_budget_highest_quality_that_fits():
+        encoder = sdcimage.JpegEncoder()
+        encoder.Configure( 90, 0, 0 )
+        image = Scene()
+        sizes = dict( ( q, len( encoder.EncodeAt( image, q ) ) ) for q in range( encoder.QualityMin, 91 ) )
+        for budgetkb in ( 20, 30, 45 ):
+                encoder.Last = {}
+                data = encoder.Encode( 'total', image, budgetkb )
+                quality = encoder.Last[ 'total' ]
+                assert IsJPEG( data )
+                assert len( data ) == sizes[ quality ] <= budgetkb * 1024
+                assert ( quality == 90 ) or ( sizes[ quality + 1 ] > budgetkb * 1024 )
+
+def test_budget_search_from_last_quality():
+        encoder = sdcimage.JpegEncoder()
+        encoder.Configure( 90, 0, 0 )
+        image = Scene()
+        first = encoder.Encode( 'total', image, 30 )
+        encodes = encoder.Encodes
+        assert encoder.Encode( 'total', image, 30 ) == first
+        assert encoder.Encodes - encodes <= 3
+
+def test_budget_per_rendition():
+        encoder = sdcimage.JpegEncoder()
+        encoder.Configure( 90, 0, 0 )
+        image = Scene()
+        encoder.Encode( 'total', image, 45 )
+        encoder.Encode( 'detail', image, 20 )
+        assert encoder.Last[ 'detail' ] < encoder.Last[ 'total' ]
+        assert encoder.Stats()[ 'jpegquality' ] == encoder.Last[ 'total' ]
+
+def test_budget_too_small_sends_minimum():
+        encoder = sdcimage.JpegEncoder()
+        encoder.Configure( 90, 0, 0 )
+        image = Scene()
+        data = encoder.Encode( 'total', image, 1 )
+        assert encoder.Last[ 'total' ] == encoder.QualityMin
+        assert data == encoder.EncodeAt( image, encoder.QualityMin )
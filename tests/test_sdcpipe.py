@@ -0,0 +1,46 @@
+# test_sdcpipe.py
+# Aim: DropQueue of the pipeline: bounded, oldest dropped, the producer never waits
+
+import time, threading
+import sdcpipe
+
+def test_dropqueue_fifo():
+        queue = sdcpipe.DropQueue( 3 )
+        for item in ( 1, 2, 3 ):
+                assert queue.Put( item ) is None
+        assert queue.Len() == 3
+        assert [ queue.Get( 0 ) for i in range( 3 ) ] == [ 1, 2, 3 ]
+        assert queue.Len() == 0
+
+def test_dropqueue_full_drops_oldest():
+        queue = sdcpipe.DropQueue( 2 )
+        queue.Put( 'a' )
+        queue.Put( 'b' )
+        assert queue.Put( 'c' ) == 'a'
+        assert queue.Put( 'd' ) == 'b'
+        assert queue.Dropped == 2
+        assert queue.Get( 0 ) == 'c'
+        assert queue.Get( 0 ) == 'd'
+
+def test_dropqueue_depth_at_least_one():
+        queue = sdcpipe.DropQueue( 0 )
+        assert queue.Depth == 1
+        queue.Put( 1 )
+        assert queue.Put( 2 ) == 1
+        assert queue.Get( 0 ) == 2
+
+def test_dropqueue_get_timeout():
+        queue = sdcpipe.DropQueue( 1 )
+        start = time.monotonic()
+        assert queue.Get( 0.05 ) is None
+        assert time.monotonic() - start >= 0.04
+
+def test_dropqueue_get_wakes_on_put():
+        queue = sdcpipe.DropQueue( 1 )
+        got = []
+        consumer = threading.Thread( target = lambda: got.append( queue.Get( 5 ) ) )
+        consumer.start()
+        time.sleep( 0.05 )
+        queue.Put( 'frame' )
+        consumer.join( 5 )
+        assert got == [ 'frame' ]
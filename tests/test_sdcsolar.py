@@ -0,0 +1,71 @@
+# test_sdcsolar.py
+# Aim: Chebyshev solar table against the short series of sdcfun2 and known solar values
+
+import os, calendar
+import numpy
+import pytest
+import sdcsolar, sdcsun, sdcfun2
+
+Vienna = ( 16.37, 48.21 )
+Table = sdcsolar.LoadTable( os.path.join( os.path.dirname( sdcsolar.__file__ ), 'sdcsolar.json' ) )
+
+def Ticks( year, month, day, hour = 12 ):
+        return calendar.timegm( ( year, month, day, hour, 0, 0 ) )
+
+def test_table_loaded():
+        assert Table is not None
+        assert Table.Covers( Ticks( 2019, 1, 1 ) ) and Table.Covers( Ticks( 2045, 12, 31 ) )
+        assert not Table.Covers( Ticks( 2018, 12, 31 ) )
+        with pytest.raises( ValueError ):
+                Table.EoTs( Ticks( 2050, 1, 1 ) )
+        with pytest.raises( ValueError ):
+                Table.aEoTs( [ Ticks( 2030, 1, 1 ), Ticks( 2050, 1, 1 ) ] )
+
+def test_known_values():
+        #EoT extremes of November and February, declination at the solstices
+        assert abs( Table.EoTs( Ticks( 2026, 11, 3 ) ) - 987 ) < 5
+        assert abs( Table.EoTs( Ticks( 2026, 2, 11 ) ) + 850 ) < 5
+        assert abs( Table.DeclDeg( Ticks( 2026, 6, 21 ) ) - 23.44 ) < 0.01
+        assert abs( Table.DeclDeg( Ticks( 2026, 12, 21 ) ) + 23.44 ) < 0.01
+
+def test_eot_against_series():
+        ticks = numpy.arange( Table.StartTicks, Table.EndTicks - 1, 86400 * 0.37 )
+        assert numpy.abs( Table.aEoTs( ticks ) - sdcfun2.aEoTs( ticks ) ).max() < 5.0
+
+def test_scalar_and_array_agree():
+        ticks = numpy.arange( Ticks( 2026, 1, 1 ), Ticks( 2027, 1, 1 ), 86400 * 3.7 )
+        eot = Table.aEoTs( ticks )
+        decl = Table.aDeclDeg( ticks )
+        alt, az = Table.aAltAz( ticks, Vienna[0], Vienna[1] )
+        for i in range( 0, len( ticks ), 7 ):
+                assert abs( Table.EoTs( ticks[i] ) - eot[i] ) < 1e-6
+                assert abs( Table.DeclDeg( ticks[i] ) - decl[i] ) < 1e-9
+                salt, saz = Table.AltAz( float( ticks[i] ), Vienna[0], Vienna[1] )
+                assert abs( salt - alt[i] ) < 1e-6 and abs( saz - az[i] ) < 1e-6
+
+def test_clenshaw_against_numpy():
+        index, x = Table.Segment( Ticks( 2030, 5, 17, 9 ) )
+        coef = Table.EoT[ index ]
+        assert abs( Table.Cheb( coef, x ) - numpy.polynomial.chebyshev.chebval( x, coef ) ) < 1e-9
+
+def test_segments_continuous():
+        for k in range( 1, Table.Count, 37 ):
+                ticks = Table.StartTicks + k * Table.SegS
+                assert abs( Table.EoTs( ticks - 1e-3 ) - Table.EoTs( ticks ) ) < 0.01
+
+def test_noon_rise_set_against_series():
+        for ticks in numpy.arange( Ticks( 2020, 1, 3 ), Ticks( 2045, 12, 1 ), 86400 * 23.3 ):
+                day = sdcsun.DayPlan.DayOf( ticks, Vienna[0] )
+                noon, sunrise, sunset, polar = Table.RiseTransitSet( day * 86400 - sdcfun2.fEoLs( Vienna[0] ), Vienna[1] )
+                snoon, ssunrise, ssunset, spolar = sdcfun2.aSunRiseSetUTC( day * 86400 + 43200 - sdcfun2.fEoLs( Vienna[0] ), Vienna[0], Vienna[1] )
+                assert abs( noon - snoon ) < 5.0
+                assert abs( sunrise - ssunrise ) < 240.0 and abs( sunset - ssunset ) < 240.0
+                assert polar == spolar == 0
+
+def test_noon_altitude():
+        #Sun at transit: azimuth south, altitude 90 - latitude + declination
+        day = sdcsun.DayPlan.DayOf( Ticks( 2026, 6, 21 ), Vienna[0] )
+        noon = Table.RiseTransitSet( day * 86400 - sdcfun2.fEoLs( Vienna[0] ), Vienna[1] )[0]
+        alt, az = Table.AltAz( noon, Vienna[0], Vienna[1] )
+        assert abs( az - 180.0 ) < 0.01
+        assert abs( alt - ( 90.0 - Vienna[1] + Table.DeclDeg( noon ) ) ) < 0.01
@@ -0,0 +1,93 @@
+# test_sdcspool.py
+# Aim: Spool of failed uploads: lazy open, eviction of the oldest, retries and backoff
+
+import os
+import sdcspool
+
+def Spool( tmp_path, maxmb = 1 ):
+        return sdcspool.Spool( str( tmp_path / 'sdcspool.db' ), maxmb )
+
+def test_no_file_until_first_failure( tmp_path ):
+        spool = Spool( tmp_path )
+        assert not os.path.isfile( spool.FileName )
+        assert spool.Newest( 'rest' ) is None and spool.Oldest( 'rest', 5 ) == []
+        spool.Put( 'rest', 100, { 'a': 1 }, b'x', None )
+        assert os.path.isfile( spool.FileName )
+        spool.Close()
+
+def test_put_newest_oldest( tmp_path ):
+        spool = Spool( tmp_path )
+        for ticks in ( 300, 100, 200 ):
+                spool.Put( 'rest', ticks, { 'ticks': ticks }, b'total', b'detail' )
+        spool.Put( 'ftp', 400, {}, b'total', None )
+        assert spool.Count() == 4
+        rowid, ticks, meta, imgtotal, imgdetail = spool.Newest( 'rest' )
+        assert ( ticks, meta, imgtotal, imgdetail ) == ( 300, { 'ticks': 300 }, b'total', b'detail' )
+        assert [ e[1] for e in spool.Oldest( 'rest', 2 ) ] == [ 100, 200 ]
+        spool.Done( [ e[0] for e in spool.Oldest( 'rest', 2 ) ] )
+        assert spool.Count() == 2
+        spool.Discard( 'ftp' )
+        assert spool.Stats() == { 'spooled': 1, 'spoolevicted': 0 }
+        spool.Close()
+
+def test_replace_keeps_newest_only( tmp_path ):
+        spool = Spool( tmp_path )
+        spool.Put( 'ftp', 100, {}, b'a', None )
+        spool.Put( 'ftp', 200, {}, b'b', None, replace = 1 )
+        assert spool.Count() == 1 and spool.Newest( 'ftp' )[3] == b'b'
+        spool.Close()
+
+def test_evicts_oldest_to_fit( tmp_path ):
+        spool = Spool( tmp_path, 1 )
+        image = bytes( 300 * 1024 )
+        for ticks in range( 5 ):
+                spool.Put( 'rest', ticks, {}, image, None )
+        assert [ e[1] for e in spool.Oldest( 'rest', 10 ) ] == [ 2, 3, 4 ]
+        assert spool.Evicted == 2
+        spool.Close()
+
+def test_newest_kept_above_cap( tmp_path ):
+        spool = Spool( tmp_path, 1 )
+        spool.Put( 'rest', 1, {}, bytes( 100 ), None )
+        spool.Put( 'rest', 2, {}, bytes( 2 * 1024 * 1024 ), None )
+        assert [ e[1] for e in spool.Oldest( 'rest', 10 ) ] == [ 2 ]
+        spool.Close()
+
+def test_disabled_spool( tmp_path ):
+        spool = Spool( tmp_path, 0 )
+        spool.Put( 'rest', 1, {}, b'x', None )
+        assert not os.path.isfile( spool.FileName ) and spool.Count() == 0
+
+def test_retry_drops_after_max_tries( tmp_path ):
+        spool = Spool( tmp_path )
+        spool.Put( 'rest', 1, {}, b'x', None )
+        spool.Put( 'rest', 2, {}, b'y', None )
+        first = spool.Oldest( 'rest', 1 )[0][0]
+        for i in range( spool.MaxTries - 1 ):
+                spool.Retry( [ first ] )
+        assert spool.Count() == 2
+        spool.Retry( [ first ] )
+        assert [ e[1] for e in spool.Oldest( 'rest', 10 ) ] == [ 2 ]
+        spool.Close()
+
+def test_backoff( tmp_path ):
+        spool = Spool( tmp_path )
+        spool.Put( 'rest', 1, {}, b'x', None )
+        assert spool.Ready()
+        spool.Failed()
+        assert spool.BackoffS == spool.BackoffMinS and not spool.Ready()
+        for i in range( 10 ):
+                spool.Failed()
+        assert spool.BackoffS == spool.BackoffMaxS
+        spool.Succeeded()
+        assert spool.Ready()
+        spool.Close()
+
+def test_reopen_keeps_pending( tmp_path ):
+        spool = Spool( tmp_path )
+        spool.Put( 'rest', 1, { 'Status': { 'spooled': 1 } }, b'x', None )
+        spool.Close()
+        spool = Spool( tmp_path )
+        assert spool.Pending == 1
+        assert spool.Newest( 'rest' )[2] == { 'Status': { 'spooled': 1 } }
+        spool.Close()
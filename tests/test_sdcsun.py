@@ -0,0 +1,72 @@
+# test_sdcsun.py
+# Aim: DayPlan: EoT table of the solar day, noon / sunrise / sunset and the plan file
+
+import os
+import sdcsun, sdcsolar, sdcfun2
+
+Vienna = ( 16.37, 48.21 )
+Table = sdcsolar.LoadTable( os.path.join( os.path.dirname( sdcsolar.__file__ ), 'sdcsolar.json' ) )
+
+def Plan( ticks, table = None, station = Vienna ):
+        return sdcsun.DayPlan( sdcsun.DayPlan.DayOf( ticks, station[0] ), station[0], station[1] ).Compute( table )
+
+def test_day_of_local_mean_time():
+        #23:30 UTC is already the next day at 16.37 deg east ( +65 min )
+        ticks = 20553 * 86400 + 23.5 * 3600
+        assert sdcsun.DayPlan.DayOf( ticks, Vienna[0] ) == 20554
+        assert sdcsun.DayPlan.DayOf( ticks, -16.37 ) == 20553
+
+def test_eot_table_interpolation_series():
+        plan = Plan( 20553 * 86400 )
+        assert plan.Engine == 'series'
+        assert len( plan.EoT ) == 86400 // plan.StepS + 1
+        for offset in range( 0, 86400, 731 ):
+                ticks = plan.StartTicks + offset
+                assert abs( plan.EoTs( ticks ) - sdcfun2.fEoTs( ticks ) ) < 0.01
+
+def test_eot_outside_day_falls_back():
+        plan = Plan( 20553 * 86400 )
+        for ticks in ( plan.StartTicks - 3600, plan.StartTicks + 86400 + 3600 ):
+                assert plan.EoTs( ticks ) == sdcfun2.fEoTs( ticks )
+
+def test_eot_table_interpolation_cheb():
+        plan = Plan( 20553 * 86400, Table )
+        assert plan.Engine == 'cheb'
+        for offset in range( 0, 86400, 731 ):
+                ticks = plan.StartTicks + offset
+                assert abs( plan.EoTs( ticks ) - Table.EoTs( ticks ) ) < 0.01
+
+def test_noon_is_true_solar_noon():
+        for table in ( None, Table ):
+                plan = Plan( 20553 * 86400, table )
+                eot = plan.EoTs( plan.NoonTicks )
+                assert abs( plan.NoonTicks + plan.EoLs + eot - ( plan.Day * 86400 + 43200 ) ) < 1.0
+                assert plan.SunRiseTicks < plan.NoonTicks < plan.SunSetTicks
+                assert plan.Polar == 0
+                assert plan.NoonStartTicks() == plan.NoonTicks - plan.NoonWindowS
+
+def test_polar_night():
+        plan = Plan( 20442 * 86400, Table, ( 15.6, 78.2 ) )
+        assert plan.Polar == -1
+
+def test_save_load( tmp_path ):
+        filename = str( tmp_path / 'sdcdayplan.json' )
+        plan = Plan( 20553 * 86400, Table )
+        plan.Save( filename )
+        loaded = sdcsun.DayPlan.Load( filename, plan.Day, Vienna[0], Vienna[1] )
+        assert ( loaded.NoonTicks, loaded.SunRiseTicks, loaded.Engine, loaded.EoT ) == ( plan.NoonTicks, plan.SunRiseTicks, 'cheb', plan.EoT )
+        assert sdcsun.DayPlan.Load( filename, plan.Day + 1, Vienna[0], Vienna[1] ) is None
+        assert sdcsun.DayPlan.Load( filename, plan.Day, Vienna[0], 47.0 ) is None
+        assert sdcsun.DayPlan.Load( str( tmp_path / 'missing.json' ), plan.Day, Vienna[0], Vienna[1] ) is None
+
+def test_planner_once_per_day( tmp_path ):
+        planner = sdcsun.DayPlanner( str( tmp_path / 'sdcdayplan.json' ), Table )
+        first = planner.Get( 20553 * 86400 + 36000, Vienna[0], Vienna[1] )
+        assert planner.Get( 20553 * 86400 + 40000, Vienna[0], Vienna[1] ) is first
+        assert planner.Get( 20554 * 86400 + 36000, Vienna[0], Vienna[1] ).Day == first.Day + 1
+
+def test_planner_replaces_series_plan( tmp_path ):
+        filename = str( tmp_path / 'sdcdayplan.json' )
+        Plan( 20553 * 86400 + 36000 ).Save( filename )
+        assert sdcsun.DayPlanner( filename ).Get( 20553 * 86400 + 36000, Vienna[0], Vienna[1] ).Engine == 'series'
+        assert sdcsun.DayPlanner( filename, Table ).Get( 20553 * 86400 + 36000, Vienna[0], Vienna[1] ).Engine == 'cheb'